@@ -0,0 +1,213 @@
+"""
+In-process caching helpers shared by the automation modules.
+
+TTLCache is an LRU cache with per-entry expiry and an approximate memory bound.
+SingleFlight merges concurrent calls for the same key into one call.
+CoalescingCache combines the two: a miss is computed once, however many
+requests are waiting on it.
+"""
+from collections import OrderedDict
+import json
+import threading
+import time
+
+
+def estimate_size(value):
+    """Rough size of a JSON-like value in bytes"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a time-to-live per entry.
+    Evicts least recently used entries once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, ttl=300, max_entries=1000, max_bytes=None, sizeof=estimate_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    _MISSING = object()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return False
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, size, value)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key):
+        return self.get(key, self._MISSING) is not self._MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run fn once per key at a time.
+    Callers that arrive while a call for the same key is in flight wait for it
+    and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True if another caller did the work"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class CoalescingCache:
+    """
+    TTLCache in front of a SingleFlight.
+    get_or_compute() serves fresh entries from the cache and merges concurrent
+    misses for the same key into a single compute call.
+    """
+
+    def __init__(self, ttl=300, max_entries=1000, max_bytes=None, sizeof=estimate_size):
+        self.cache = TTLCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes, sizeof=sizeof)
+        self.flight = SingleFlight()
+
+    _MISSING = object()
+
+    def get_or_compute(self, key, compute, should_cache=None, ttl_for=None):
+        """
+        Returns (value, outcome) where outcome is 'hit', 'miss' or 'coalesced'.
+        should_cache(value) can veto storing a result (e.g. partial results);
+        ttl_for(value) can pick its TTL (e.g. shorter for negative results).
+        """
+        value = self.cache.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value, 'hit'
+
+        def load():
+            result = compute()
+            if should_cache is None or should_cache(result):
+                self.cache.set(key, result, ttl=ttl_for(result) if ttl_for else None)
+            return result
+
+        value, shared = self.flight.do(key, load)
+        return value, 'coalesced' if shared else 'miss'
+
+    def invalidate(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['coalesced'] = self.flight.coalesced
+        stats['in_flight'] = self.flight.in_flight()
+        return stats
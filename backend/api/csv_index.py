@@ -0,0 +1,226 @@
+"""
+Byte-offset index for append-only CSV files.
+
+A sidecar file (<csv>.idx) records where every data row starts, so a page of
+rows can be read with one seek instead of parsing the file from the top.
+The index only ever scans bytes appended since the last refresh.
+
+Sidecar layout: uint64 indexed_size, uint64 header_end, then one uint64 per row.
+Every worker process shares the sidecar, so it is read under a shared flock and
+written under an exclusive one.
+"""
+from array import array
+import csv
+import fcntl
+import io
+import os
+import struct
+import threading
+
+
+_HEADER = struct.Struct('<QQ')
+
+
+class CSVOffsetIndex:
+    """
+    Row offset index for one CSV file.
+
+    refresh() picks up rows appended since the last call (by this process or
+    any other) and persists their offsets to the sidecar file.
+    """
+
+    def __init__(self, csv_path, index_path=None):
+        self.csv_path = csv_path
+        self.index_path = index_path or f'{csv_path}.idx'
+        self._lock = threading.RLock()
+        self._offsets = array('Q')
+        self._indexed_size = 0
+        self._header_end = 0
+        self._fieldnames = None
+        self._loaded = False
+
+    def __len__(self):
+        self.refresh()
+        return len(self._offsets)
+
+    @property
+    def fieldnames(self):
+        self.refresh()
+        return self._fieldnames or []
+
+    def refresh(self):
+        """Index rows appended since the last refresh; returns the row count"""
+        with self._lock:
+            if not self._loaded:
+                self._load_sidecar()
+            try:
+                size = os.path.getsize(self.csv_path)
+            except OSError:
+                self._reset()
+                return 0
+            if size < self._indexed_size:
+                # File was truncated or replaced
+                self._reset()
+                self._write_sidecar(rewrite=True)
+            if size > self._indexed_size:
+                self._scan(size)
+            elif self._fieldnames is None and self._header_end:
+                self._fieldnames = self._read_header()
+            return len(self._offsets)
+
+    def offset(self, row):
+        """Byte offset where row number row starts (None past the end)"""
+        with self._lock:
+            return self._offsets[row] if 0 <= row < len(self._offsets) else None
+
+    def read_rows(self, start, count):
+        """Return up to count rows (as dicts) starting at row number start"""
+        fieldnames = self.fieldnames
+        return [dict(zip(fieldnames, values)) for values in self.read_values(start, count)]
+
+    def read_values(self, start, count):
+        """Like read_rows, but each row is a list of values in fieldnames order"""
+        self.refresh()
+        with self._lock:
+            total = len(self._offsets)
+            if start >= total or count <= 0:
+                return []
+            begin = self._offsets[start]
+            stop = start + count
+            end = self._offsets[stop] if stop < total else self._indexed_size
+        with open(self.csv_path, 'rb') as f:
+            f.seek(begin)
+            chunk = f.read(end - begin)
+        return list(csv.reader(io.StringIO(chunk.decode('utf-8'), newline='')))
+
+    def read_selected(self, row_numbers):
+        """Return the given rows (as dicts, in the order asked) with one open and a seek per row"""
+        self.refresh()
+        with self._lock:
+            total = len(self._offsets)
+            spans = [
+                (self._offsets[n], self._offsets[n + 1] if n + 1 < total else self._indexed_size)
+                for n in row_numbers if 0 <= n < total
+            ]
+            fieldnames = self._fieldnames
+        rows = []
+        with open(self.csv_path, 'rb') as f:
+            for begin, end in spans:
+                f.seek(begin)
+                values = next(csv.reader(io.StringIO(f.read(end - begin).decode('utf-8'), newline='')), [])
+                rows.append(dict(zip(fieldnames, values)))
+        return rows
+
+    def iter_rows(self, start=0, chunk_size=500):
+        """Yield rows from start to the end of the file, chunk_size rows at a time"""
+        position = start
+        while True:
+            rows = self.read_rows(position, chunk_size)
+            if not rows:
+                return
+            yield from rows
+            position += len(rows)
+
+    def _reset(self):
+        self._offsets = array('Q')
+        self._indexed_size = 0
+        self._header_end = 0
+        self._fieldnames = None
+
+    def _load_sidecar(self):
+        self._loaded = True
+        try:
+            with open(self.index_path, 'rb') as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                head = f.read(_HEADER.size)
+                if len(head) < _HEADER.size:
+                    return
+                indexed_size, header_end = _HEADER.unpack(head)
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return
+        self._indexed_size = indexed_size
+        self._header_end = header_end
+        self._offsets = offsets
+
+    def _write_sidecar(self, rewrite=False, new_offsets=None, previous_size=0):
+        """
+        Persist the index under an exclusive lock. new_offsets (scanned from
+        previous_size) are appended only while the sidecar still ends at
+        previous_size; if another process already indexed past them the
+        sidecar is left alone, and any other mismatch rewrites it whole.
+        """
+        try:
+            fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+b') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)   # released when the file closes
+                head = f.read(_HEADER.size)
+                stored_size = _HEADER.unpack(head)[0] if len(head) == _HEADER.size else None
+                if not rewrite and stored_size is not None:
+                    if stored_size == previous_size and new_offsets is not None:
+                        # Offsets first, header last: a crash in between leaves the old header valid
+                        f.seek(_HEADER.size + 8 * (len(self._offsets) - len(new_offsets)))
+                        new_offsets.tofile(f)
+                        f.truncate()
+                        f.seek(0)
+                        f.write(_HEADER.pack(self._indexed_size, self._header_end))
+                        return
+                    if stored_size >= self._indexed_size:
+                        return
+                f.seek(0)
+                f.truncate()
+                f.write(_HEADER.pack(self._indexed_size, self._header_end))
+                self._offsets.tofile(f)
+        except OSError as e:
+            print(f"❌ Error writing CSV index {self.index_path}: {e}")
+
+    def _read_header(self):
+        with open(self.csv_path, 'rb') as f:
+            line = f.read(self._header_end)
+        return next(csv.reader(io.StringIO(line.decode('utf-8'), newline='')), [])
+
+    def _scan(self, size, block_size=1 << 20):
+        """Record the start offset of every complete record between indexed_size and size"""
+        new_offsets = array('Q')
+        position = self._indexed_size
+        record_start = position
+        quotes = 0
+        pending = b''
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self._indexed_size)
+            remaining = size - self._indexed_size
+            while remaining > 0:
+                block = f.read(min(block_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                data = pending + block
+                cursor = 0
+                while True:
+                    newline = data.find(b'\n', cursor)
+                    if newline == -1:
+                        break
+                    line = data[cursor:newline + 1]
+                    cursor = newline + 1
+                    position += len(line)
+                    quotes += line.count(b'"')
+                    if quotes % 2:
+                        # Newline inside a quoted field
+                        continue
+                    if self._header_end == 0:
+                        self._header_end = position
+                    else:
+                        new_offsets.append(record_start)
+                    record_start = position
+                    quotes = 0
+                # Anything after the last newline is carried into the next block;
+                # at end of file it is an incomplete row still being written
+                pending = data[cursor:]
+
+        previous_size = self._indexed_size
+        self._indexed_size = record_start
+        self._offsets.extend(new_offsets)
+        if self._fieldnames is None and self._header_end:
+            self._fieldnames = self._read_header()
+        self._write_sidecar(new_offsets=new_offsets, previous_size=previous_size)
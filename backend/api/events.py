@@ -0,0 +1,161 @@
+"""
+In-process pub/sub hub for state-change events.
+
+Stores and workers publish() from any thread; async SSE views subscribe()
+and receive matching events on their own event loop. Recent events are kept
+in a ring buffer so a reconnecting client can resume from Last-Event-ID.
+
+    EVENT_HUB.publish('booking', job_id, {'status': 'approved', ...})
+
+    async with EVENT_HUB.subscribe({'booking': {'32475715'}}) as subscription:
+        async for event in subscription.events(timeout=15):
+            ...
+
+Events only reach subscribers in the process that published them; run a
+single ASGI process (or put a shared broker behind publish()) for fan-out
+across workers.
+"""
+from collections import deque
+from django.conf import settings
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+
+EVENT_SETTINGS = getattr(settings, 'EVENT_HUB', {})
+
+
+class Event:
+    __slots__ = ('id', 'type', 'key', 'data', 'timestamp')
+
+    def __init__(self, id, type, key, data):
+        self.id = id
+        self.type = type
+        self.key = key
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_sse(self):
+        payload = json.dumps({'type': self.type, 'key': self.key, **self.data}, default=str)
+        # Snapshots (id 0) carry no id so they don't move the client's Last-Event-ID
+        id_line = f'id: {self.id}\n' if self.id else ''
+        return f'{id_line}event: {self.type}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """
+    One subscriber's queue. topics maps event type -> set of keys, or None for
+    every key of that type. Holds at most max_queue events; when a slow client
+    falls behind, the oldest queued events are dropped and `dropped` counts them.
+    """
+
+    def __init__(self, hub, topics, loop, max_queue):
+        self.hub = hub
+        self.topics = topics
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.max_queue = max_queue
+        self.dropped = 0
+
+    def matches(self, event):
+        if event.type not in self.topics:
+            return False
+        keys = self.topics[event.type]
+        return keys is None or event.key in keys
+
+    def _put(self, event):
+        # Runs on the subscriber's loop
+        while self.queue.qsize() >= self.max_queue:
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the subscriber is gone
+            self.hub._unsubscribe(self)
+
+    async def events(self, timeout=None):
+        """Yield events as they arrive; yields None after timeout seconds of silence"""
+        while True:
+            try:
+                yield await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.hub._unsubscribe(self)
+
+
+class EventHub:
+    """Thread-safe publish, asyncio-side subscribe"""
+
+    def __init__(self, history=1000, max_queue=500):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._snapshots = {}
+
+    def register_snapshot(self, type, provider):
+        """
+        provider(key) returns the current state for one key of this event type
+        (or None); SSE clients get it when they connect, before any live events.
+        """
+        self._snapshots[type] = provider
+
+    def snapshot(self, type, key):
+        provider = self._snapshots.get(type)
+        data = provider(key) if provider else None
+        if data is None:
+            return None
+        return Event(0, type, str(key), data)
+
+    def publish(self, type, key, data):
+        with self._lock:
+            event = Event(next(self._ids), type, str(key), data)
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, topics, last_event_id=None):
+        """
+        Register a subscriber on the running event loop. Events newer than
+        last_event_id still in the history are queued first.
+        """
+        subscription = Subscription(self, topics, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id and subscription.matches(event):
+                        subscription._put(event)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'history': len(self._history),
+                'last_event_id': self._history[-1].id if self._history else 0,
+            }
+
+
+EVENT_HUB = EventHub(
+    history=EVENT_SETTINGS.get('HISTORY', 1000),
+    max_queue=EVENT_SETTINGS.get('MAX_QUEUE', 500)
+)
@@ -0,0 +1,196 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client that sends the same Idempotency-Key twice gets the stored response
+back instead of running the request again, so extension retries and
+double-clicks don't create duplicate bookings or CSV rows:
+
+    @api_view(['POST'])
+    @permission_classes([AllowAny])
+    @idempotent('hotel_search')
+    def search_hotels(request):
+        ...
+
+Keys and responses live in the IdempotencyKey table, so a retry that lands on
+another worker process is replayed too. The first request inserts the
+(scope, key) row and runs; requests with the same key that arrive while it is
+still running poll the row and share its response. Reusing a key with a
+different request body is rejected with 422. 5xx responses and exceptions
+release the key, so those can be retried.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+import hashlib
+import json
+import threading
+import time
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_SETTINGS = getattr(settings, 'IDEMPOTENCY', {})
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+TTL = timedelta(seconds=IDEMPOTENCY_SETTINGS.get('TTL', 24 * 60 * 60))
+# How long a duplicate waits for the first request before giving up with 409
+WAIT_TIMEOUT = IDEMPOTENCY_SETTINGS.get('WAIT_TIMEOUT', 30.0)
+# A claim still unfinished after this long is abandoned (its worker died) and can be taken over
+STALE_AFTER = timedelta(seconds=IDEMPOTENCY_SETTINGS.get('STALE_AFTER', 300))
+PRUNE_INTERVAL = IDEMPOTENCY_SETTINGS.get('PRUNE_INTERVAL', 60 * 60)
+
+_lock = threading.Lock()
+_last_prune = 0.0
+_counters = {'misses': 0, 'replays': 0, 'waits': 0, 'conflicts': 0, 'timeouts': 0}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def request_fingerprint(request):
+    """Hash of the method, path and canonical JSON body"""
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode('utf-8')).hexdigest()
+
+
+def prune_expired(now=None):
+    """Delete keys older than TTL; returns the number deleted"""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=(now or timezone.now()) - TTL).delete()
+    return deleted
+
+
+def _maybe_prune():
+    global _last_prune
+    with _lock:
+        if time.monotonic() - _last_prune < PRUNE_INTERVAL:
+            return
+        _last_prune = time.monotonic()
+    prune_expired()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Insert the key row. Returns (True, row) when this request should run, or
+    (False, row) with the stored row of an earlier request.
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                return True, IdempotencyKey.objects.create(scope=scope, key=key, fingerprint=fingerprint)
+        except IntegrityError:
+            pass
+        row = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if row is None:
+            # Released between our insert and read; try again
+            continue
+        now = timezone.now()
+        expired = row.created_at < now - TTL
+        abandoned = row.status_code is None and row.created_at < now - STALE_AFTER
+        if expired or abandoned:
+            # Take it over only if nobody else did first
+            IdempotencyKey.objects.filter(pk=row.pk, created_at=row.created_at).delete()
+            continue
+        return False, row
+
+
+def _wait(row):
+    """Poll a claimed key until its response is stored; None if released or still running at WAIT_TIMEOUT"""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    delay = 0.05
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+        row = IdempotencyKey.objects.filter(pk=row.pk).first()
+        if row is None or row.status_code is not None:
+            return row
+    return None
+
+
+def idempotency_stats():
+    with _lock:
+        counters = dict(_counters)
+    return {
+        'stored_keys': IdempotencyKey.objects.count(),
+        'in_progress': IdempotencyKey.objects.filter(status_code__isnull=True).count(),
+        'ttl_seconds': int(TTL.total_seconds()),
+        **counters,
+    }
+
+
+def idempotent(scope):
+    """
+    Decorator for DRF function views (place it below @api_view).
+    scope namespaces keys so the same key on two endpoints never collides.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({
+                    'success': False,
+                    'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            _maybe_prune()
+            fingerprint = request_fingerprint(request)
+            while True:
+                claimed, row = _claim(scope, key, fingerprint)
+                if claimed:
+                    break
+                if row.fingerprint != fingerprint:
+                    _count('conflicts')
+                    return Response({
+                        'success': False,
+                        'error': f'{HEADER} was already used with a different request'
+                    }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if row.status_code is None:
+                    _count('waits')
+                    finished = _wait(row)
+                    if finished is None and IdempotencyKey.objects.filter(pk=row.pk).exists():
+                        _count('timeouts')
+                        return Response({
+                            'success': False,
+                            'error': f'A request with this {HEADER} is still in progress; retry later'
+                        }, status=status.HTTP_409_CONFLICT)
+                    if finished is None:
+                        # The first request failed and released the key: run this one
+                        continue
+                    row = finished
+                _count('replays')
+                response = Response(row.response, status=row.status_code)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            _count('misses')
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                row.delete()
+                raise
+            if response.status_code >= 500:
+                row.delete()
+                return response
+            try:
+                IdempotencyKey.objects.filter(pk=row.pk).update(
+                    status_code=response.status_code,
+                    response=response.data,
+                    completed_at=timezone.now()
+                )
+            except (TypeError, ValueError) as e:
+                # Not storable as JSON: release the key rather than leave it in progress
+                print(f"⚠️ Idempotent response for {scope} not stored: {e}")
+                row.delete()
+            return response
+        return wrapper
+    return decorator
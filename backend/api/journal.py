@@ -0,0 +1,215 @@
+"""
+Write-behind CSV journal.
+
+Rows are appended to an in-process queue and a background thread writes them
+to the CSV file in batches, so request threads never wait on disk I/O.
+
+    journal = CSVJournal('data/log.csv', ['id', 'status', 'created_at'])
+    journal.append({'id': '1', 'status': 'ok', 'created_at': '...'})
+    journal.flush()   # wait until everything appended so far is on disk
+
+fsync policy:
+    'never'     leave durability to the OS page cache
+    'batch'     fsync after every batch
+    'interval'  fsync once every fsync_interval seconds while there are unsynced rows,
+                and on close
+
+A batch that fails to write is kept and retried (ahead of newer rows) until it
+succeeds; flush() only counts rows that actually reached the file.
+"""
+from django.conf import settings
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+
+
+JOURNAL_SETTINGS = getattr(settings, 'CSV_JOURNAL', {})
+
+FSYNC_POLICIES = ('never', 'batch', 'interval')
+
+_journals = []
+
+
+class JournalFull(Exception):
+    """Raised when the journal queue stays full for longer than put_timeout"""
+
+
+class CSVJournal:
+    """
+    Buffered, batched appender for one CSV file.
+
+    append() blocks for up to put_timeout when the queue is full (backpressure)
+    and raises JournalFull if there is still no room.
+    """
+
+    def __init__(self, path, fieldnames, flush_interval=None, batch_size=None,
+                 fsync=None, fsync_interval=None, max_queue=None, put_timeout=None, on_flush=None):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_interval = flush_interval if flush_interval is not None else JOURNAL_SETTINGS.get('FLUSH_INTERVAL', 0.5)
+        self.batch_size = batch_size or JOURNAL_SETTINGS.get('BATCH_SIZE', 500)
+        self.fsync = fsync or JOURNAL_SETTINGS.get('FSYNC', 'batch')
+        self.fsync_interval = fsync_interval if fsync_interval is not None else JOURNAL_SETTINGS.get('FSYNC_INTERVAL', 1.0)
+        self.put_timeout = put_timeout if put_timeout is not None else JOURNAL_SETTINGS.get('PUT_TIMEOUT', 2.0)
+        self.on_flush = on_flush
+
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {FSYNC_POLICIES}')
+
+        self._queue = queue.Queue(maxsize=max_queue or JOURNAL_SETTINGS.get('MAX_QUEUE', 10000))
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._last_fsync = 0.0
+        self._unsynced = False
+        self._retry = []
+        self._thread = None
+        self._closed = False
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+
+        _journals.append(self)
+
+    def append(self, row):
+        """Queue a row for writing"""
+        if self._closed:
+            raise RuntimeError(f'Journal {self.path} is closed')
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            raise JournalFull(f'Journal queue for {self.path} is full')
+        with self._cond:
+            self._enqueued += 1
+
+    def flush(self, timeout=None):
+        """Block until every row appended before this call has been written"""
+        with self._cond:
+            target = self._enqueued
+            return self._cond.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def close(self, timeout=10.0):
+        """Drain the queue and stop the background writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'queued': self._queue.qsize(),
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written,
+            'write_errors': self.write_errors,
+            'retrying': len(self._retry),
+            'fsync': self.fsync
+        }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    thread = threading.Thread(
+                        target=self._run,
+                        name=f'csv-journal-{os.path.basename(self.path)}',
+                        daemon=True
+                    )
+                    thread.start()
+                    self._thread = thread
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # Rows of a failed write are retried first; new rows top the batch up
+            batch, self._retry = self._retry, []
+            if len(batch) >= self.batch_size:
+                time.sleep(self.flush_interval)
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                # Pick up anything that was queued behind the stop marker
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        batch.append(item)
+            if batch:
+                self._write(batch)
+            if self._unsynced and (stopping or time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._sync()
+        if self._retry:
+            print(f"❌ Dropped {len(self._retry)} rows that could not be written to {self.path}")
+
+    def _write(self, batch):
+        start = None
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', newline='') as f:
+                start = f.tell()
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+                if start == 0:
+                    writer.writeheader()
+                writer.writerows(batch)
+                f.flush()
+                if self.fsync == 'batch':
+                    os.fsync(f.fileno())
+                elif self.fsync == 'interval':
+                    self._unsynced = True
+        except Exception as e:
+            # Nothing counts as written; the rows stay in order for the next attempt
+            self.write_errors += 1
+            if start is not None:
+                try:
+                    os.truncate(self.path, start)
+                except OSError:
+                    pass
+            self._retry = batch
+            print(f"❌ Error writing {len(batch)} rows to {self.path}, will retry: {e}")
+            return
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        with self._cond:
+            self._written += len(batch)
+            self._cond.notify_all()
+        if self.on_flush is not None:
+            try:
+                self.on_flush(self)
+            except Exception as e:
+                print(f"❌ Journal flush callback failed for {self.path}: {e}")
+
+    def _sync(self):
+        """fsync rows written since the last sync ('interval' policy)"""
+        try:
+            with open(self.path, 'a') as f:
+                os.fsync(f.fileno())
+        except OSError as e:
+            self.write_errors += 1
+            print(f"❌ Error syncing {self.path}: {e}")
+            return
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+
+
+@atexit.register
+def close_all_journals():
+    for journal in list(_journals):
+        journal.close()
@@ -0,0 +1,88 @@
+"""
+Benchmark the enrichment provider client against the local stub provider.
+
+    python manage.py bench_enrichment_provider --requests 500 --concurrency 32 --stub-rate 50
+    python manage.py bench_enrichment_provider --naive      # no pacing or retries, for comparison
+    python manage.py bench_enrichment_provider --url http://127.0.0.1:8765
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+import json
+import statistics
+import time
+import urllib.request
+
+from platforms.salesforce.lead_enrichment.provider import ProviderClient, ProviderError
+from platforms.salesforce.lead_enrichment.stub_provider import parse_latency, start_stub_provider
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent company lookups through the provider client and report throughput and throttling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--concurrency', type=int, default=32, help='Caller threads')
+        parser.add_argument('--url', default=None, help='Provider to hit instead of an in-process stub')
+        parser.add_argument('--rate', type=float, default=None, help='Client token bucket rate (default: stub rate)')
+        parser.add_argument('--max-concurrency', type=int, default=16)
+        parser.add_argument('--latency-target', type=float, default=1.0)
+        parser.add_argument('--naive', action='store_true', help='No token bucket, fixed concurrency, no retries')
+        parser.add_argument('--stub-rate', type=float, default=50)
+        parser.add_argument('--stub-max-concurrent', type=int, default=8)
+        parser.add_argument('--stub-latency', default='0.02,0.08')
+        parser.add_argument('--stub-error-rate', type=float, default=0.02)
+
+    def handle(self, *args, **options):
+        server = None
+        url = options['url']
+        if url is None:
+            server = start_stub_provider(
+                rate=options['stub_rate'],
+                max_concurrent=options['stub_max_concurrent'],
+                latency=parse_latency(options['stub_latency']),
+                error_rate=options['stub_error_rate']
+            )
+            url = server.base_url
+
+        if options['naive']:
+            client = ProviderClient(url, rate=1e9, burst=1e9, initial_concurrency=options['concurrency'],
+                                    min_concurrency=options['concurrency'], max_concurrency=options['concurrency'],
+                                    max_retries=0)
+        else:
+            client = ProviderClient(url, rate=options['rate'] or options['stub_rate'],
+                                    max_concurrency=options['max_concurrency'],
+                                    latency_target=options['latency_target'],
+                                    backoff_base=0.05, backoff_max=2)
+
+        def one_lookup(i):
+            started = time.perf_counter()
+            try:
+                client.company_facts(f'Benchmark Builders {i}')
+                ok = True
+            except ProviderError:
+                ok = False
+            return ok, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(one_lookup, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(ms for _, ms in results)
+        succeeded = sum(1 for ok, _ in results if ok)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        stats = client.stats()
+
+        self.stdout.write(f"Lookups:       {len(results)} in {wall:.2f}s ({succeeded / wall:.1f} succeeded/s)")
+        self.stdout.write(f"Succeeded:     {succeeded}  failed: {len(results) - succeeded}")
+        self.stdout.write(f"Latency (ms):  p50={statistics.median(latencies):.1f} p95={p95:.1f} max={latencies[-1]:.1f}")
+        self.stdout.write(f"Attempts:      {stats['attempts']}  retries: {stats['retries']}  "
+                          f"429s: {stats['throttled']}  5xx: {stats['server_errors']}")
+        self.stdout.write(f"Concurrency:   final limit {stats['concurrency_limit']}")
+        self.stdout.write(f"Connections:   opened {stats['connections_opened']}  reused {stats['connections_reused']}")
+        if server is not None:
+            with urllib.request.urlopen(f'{url}/stats') as response:
+                self.stdout.write(f"Stub:          {json.load(response)}")
+            server.shutdown()
+            server.server_close()
+        client.pool.close()
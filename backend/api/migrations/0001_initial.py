@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrichment',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('lead_data', models.JSONField(default=dict)),
+                ('enriched_data', models.JSONField(default=dict)),
+                ('status', models.CharField(default='completed', max_length=32)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='enrichment_created_idx'), models.Index(fields=['status', 'created_at'], name='enrichment_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrichment',
+            name='batch_id',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='enrichment',
+            index=models.Index(fields=['batch_id', 'created_at', 'id'], name='enrichment_batch_idx'),
+        ),
+    ]
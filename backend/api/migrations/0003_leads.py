@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_enrichment_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lead',
+            fields=[
+                ('id', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('company', models.CharField(blank=True, default='', max_length=255)),
+                ('email', models.CharField(blank=True, default='', max_length=254)),
+                ('phone', models.CharField(blank=True, default='', max_length=64)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(blank=True, default='', max_length=64)),
+                ('lead_source', models.CharField(blank=True, default='', max_length=128)),
+                ('email_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('last_modified', models.DateTimeField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=32)),
+                ('import_id', models.CharField(blank=True, default='', max_length=32)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='lead_created_idx'), models.Index(fields=['email_hash'], name='lead_email_hash_idx'), models.Index(fields=['last_modified'], name='lead_modified_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadImport',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('source', models.CharField(max_length=32)),
+                ('status', models.CharField(default='queued', max_length=32)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('counts', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True, default='')),
+                ('automation_id', models.CharField(blank=True, default='', max_length=32)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'status', 'created_at'], name='lead_import_source_idx')],
+            },
+        ),
+    ]
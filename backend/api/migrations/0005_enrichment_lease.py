@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrichment',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='enrichment',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='enrichment',
+            index=models.Index(fields=['status', 'lease_expires'], name='enrichment_lease_idx'),
+        ),
+    ]
@@ -1,3 +1,142 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Enrichment(models.Model):
+    """Salesforce lead enrichment result"""
+    id = models.CharField(max_length=32, primary_key=True)
+    lead_data = models.JSONField(default=dict)
+    enriched_data = models.JSONField(default=dict)
+    status = models.CharField(max_length=32, default='completed')
+    # Bulk enrichment batch this lead belongs to ('' for single enrichments)
+    batch_id = models.CharField(max_length=32, blank=True, default='')
+    # Process whose priority queue holds this lead, until lease_expires ('' when unclaimed)
+    claimed_by = models.CharField(max_length=64, blank=True, default='')
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='enrichment_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='enrichment_status_idx'),
+            models.Index(fields=['batch_id', 'created_at', 'id'], name='enrichment_batch_idx'),
+            models.Index(fields=['status', 'lease_expires'], name='enrichment_lease_idx'),
+        ]
+
+    def to_dict(self):
+        enrichment = {
+            'id': self.id,
+            'lead_data': self.lead_data,
+            'enriched_data': self.enriched_data,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+        }
+        if self.batch_id:
+            enrichment['batch_id'] = self.batch_id
+        return enrichment
+
+
+class Lead(models.Model):
+    """Salesforce lead imported from a report or Bulk API export"""
+    # 18-character Salesforce Id, or 'email-<hash>' for exports without an Id column
+    id = models.CharField(max_length=40, primary_key=True)
+    name = models.CharField(max_length=255, blank=True, default='')
+    company = models.CharField(max_length=255, blank=True, default='')
+    email = models.CharField(max_length=254, blank=True, default='')
+    phone = models.CharField(max_length=64, blank=True, default='')
+    title = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=64, blank=True, default='')
+    lead_source = models.CharField(max_length=128, blank=True, default='')
+    # sha256 of the lowercased email; matches Id-less rows to existing leads
+    email_hash = models.CharField(max_length=64, blank=True, default='')
+    # Salesforce LastModifiedDate
+    last_modified = models.DateTimeField(null=True, blank=True)
+    # Hash of the imported fields, so re-imports skip unchanged rows without a write
+    content_hash = models.CharField(max_length=32, blank=True, default='')
+    import_id = models.CharField(max_length=32, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='lead_created_idx'),
+            models.Index(fields=['email_hash'], name='lead_email_hash_idx'),
+            models.Index(fields=['last_modified'], name='lead_modified_idx'),
+        ]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'company': self.company,
+            'email': self.email,
+            'phone': self.phone,
+            'title': self.title,
+            'status': self.status,
+            'lead_source': self.lead_source,
+            'last_modified': self.last_modified.isoformat() if self.last_modified else None,
+            'import_id': self.import_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
+
+
+class LeadImport(models.Model):
+    """One run of the Salesforce lead importer"""
+    id = models.CharField(max_length=32, primary_key=True)
+    # 'upload' (CSV export) or 'stub' (local Salesforce stand-in)
+    source = models.CharField(max_length=32)
+    status = models.CharField(max_length=32, default='queued')
+    # Rows last modified before this were skipped (None: full import)
+    since = models.DateTimeField(null=True, blank=True)
+    # Latest LastModifiedDate seen; where the next incremental import starts
+    watermark = models.DateTimeField(null=True, blank=True)
+    counts = models.JSONField(default=dict)
+    error = models.TextField(blank=True, default='')
+    automation_id = models.CharField(max_length=32, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['source', 'status', 'created_at'], name='lead_import_source_idx'),
+        ]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'since': self.since.isoformat() if self.since else None,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'counts': self.counts,
+            'error': self.error,
+            'automation_id': self.automation_id,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for an Idempotency-Key (api/idempotency.py).
+    The unique (scope, key) pair is the claim: the worker that inserts it runs
+    the request, and every other worker replays or waits for its response.
+    """
+    scope = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # Null until the first request finishes
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
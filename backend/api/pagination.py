@@ -0,0 +1,70 @@
+"""
+Pagination helpers shared by the list endpoints.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of a small JSON value.
+"""
+from datetime import datetime
+from django.db.models import Q
+import base64
+import json
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(value):
+    raw = json.dumps(value, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read per_page (or limit) from the query string, clamped to [1, maximum]"""
+    value = request.query_params.get('per_page', request.query_params.get('limit', default))
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = default
+    return max(1, min(value, maximum))
+
+
+def keyset_queryset_page(queryset, cursor, limit, serialize=None):
+    """
+    Fetch one page of a queryset ordered by (created_at, pk).
+
+    The cursor holds the (created_at, pk) of the last row of the previous page,
+    so the next page is a single indexed range scan. Returns (records, next_cursor).
+    """
+    queryset = queryset.order_by('created_at', 'pk')
+    if cursor:
+        cursor_key = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(cursor_key[0])
+            pk = cursor_key[1]
+        except (TypeError, ValueError, IndexError, KeyError):
+            raise InvalidCursor('Invalid cursor')
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        )
+
+    rows = list(queryset[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if more:
+        last = rows[-1]
+        next_cursor = encode_cursor([last.created_at.isoformat(), last.pk])
+    records = [serialize(row) for row in rows] if serialize else rows
+    return records, next_cursor
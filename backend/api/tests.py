@@ -1,3 +1,451 @@
-from django.test import TestCase
+from array import array
+from datetime import timedelta
+from unittest import mock
+import asyncio
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from . import views
+from .cache import CoalescingCache, TTLCache
+from .csv_index import CSVOffsetIndex, _HEADER
+from .events import EventHub
+from .idempotency import idempotent, request_fingerprint
+from .journal import CSVJournal, JournalFull
+from .models import Enrichment, IdempotencyKey
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_queryset_page
+
+
+class TempDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+
+class CSVOffsetIndexTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp, 'rows.csv')
+        self.append(['id', 'note'], *[[str(n), f'row {n}'] for n in range(3)])
+
+    def append(self, *rows):
+        with open(self.path, 'a', newline='') as f:
+            csv.writer(f).writerows(rows)
+
+    def sidecar(self):
+        with open(f'{self.path}.idx', 'rb') as f:
+            indexed_size, _ = _HEADER.unpack(f.read(_HEADER.size))
+            offsets = array('Q')
+            offsets.frombytes(f.read())
+        return indexed_size, list(offsets)
+
+    def test_reads_rows_and_picks_up_appends(self):
+        index = CSVOffsetIndex(self.path)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.fieldnames, ['id', 'note'])
+        self.assertEqual(index.read_rows(1, 5), [{'id': '1', 'note': 'row 1'}, {'id': '2', 'note': 'row 2'}])
+
+        self.append(['3', 'multi\nline'], ['4', 'row 4'])
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.read_selected([4, 3]), [{'id': '4', 'note': 'row 4'}, {'id': '3', 'note': 'multi\nline'}])
+
+    def test_truncated_file_is_reindexed(self):
+        index = CSVOffsetIndex(self.path)
+        self.assertEqual(len(index), 3)
+        os.remove(self.path)
+        self.append(['id', 'note'], ['9', 'only'])
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.read_rows(0, 1), [{'id': '9', 'note': 'only'}])
+        self.assertEqual(len(self.sidecar()[1]), 1)
+
+    def test_sidecar_is_reused_by_a_new_index(self):
+        self.assertEqual(len(CSVOffsetIndex(self.path)), 3)
+        self.append(['3', 'row 3'])
+        index = CSVOffsetIndex(self.path)
+        self.assertEqual(index.read_rows(3, 1), [{'id': '3', 'note': 'row 3'}])
+        self.assertEqual(self.sidecar(), (os.path.getsize(self.path), [index.offset(n) for n in range(4)]))
+
+    def test_processes_sharing_a_sidecar_do_not_duplicate_offsets(self):
+        # Two indexes over one file stand in for two worker processes
+        first, second = CSVOffsetIndex(self.path), CSVOffsetIndex(self.path)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+        self.append(['3', 'row 3'])
+        self.assertEqual(len(first), 4)
+        self.assertEqual(len(second), 4)
+        self.append(['4', 'row 4'])
+        self.assertEqual(len(second), 5)
+        self.assertEqual(len(first), 5)
+
+        indexed_size, offsets = self.sidecar()
+        self.assertEqual(indexed_size, os.path.getsize(self.path))
+        self.assertEqual(offsets, [first.offset(n) for n in range(5)])
+        self.assertEqual(len(CSVOffsetIndex(self.path)), 5)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        created = timezone.now()
+        # Two rows share each timestamp, so the id breaks ties
+        for n in range(7):
+            Enrichment.objects.create(id=f'e{n}', created_at=created + timedelta(seconds=n // 2))
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(['2026-10-17T00:00:00+00:00', 'e1'])),
+                         ['2026-10-17T00:00:00+00:00', 'e1'])
+        pages, cursor = [], None
+        while True:
+            rows, cursor = keyset_queryset_page(Enrichment.objects.all(), cursor, 3, serialize=lambda e: e.id)
+            pages.append(rows)
+            if not cursor:
+                break
+        self.assertEqual(pages, [['e0', 'e1', 'e2'], ['e3', 'e4', 'e5'], ['e6']])
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        rows, cursor = keyset_queryset_page(Enrichment.objects.all(), None, 3)
+        Enrichment.objects.create(id='early', created_at=timezone.now() - timedelta(days=1))
+        rows, _ = keyset_queryset_page(Enrichment.objects.all(), cursor, 3, serialize=lambda e: e.id)
+        self.assertEqual(rows, ['e3', 'e4', 'e5'])
+
+    def test_invalid_cursor(self):
+        for token in ('not base64 !', encode_cursor('x'), encode_cursor(['not a date', 'e1'])):
+            with self.assertRaises(InvalidCursor):
+                keyset_queryset_page(Enrichment.objects.all(), token, 3)
+
+
+calls = []
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@idempotent('test')
+def idempotent_view(request):
+    calls.append(request.data)
+    if request.data.get('fail'):
+        return Response({'success': False}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response({'success': True, 'call': len(calls)}, status=status.HTTP_201_CREATED)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.factory = APIRequestFactory()
+
+    def post(self, data, key='key-1'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return idempotent_view(self.factory.post('/test/', data, format='json', **headers))
+
+    def test_retry_replays_stored_response(self):
+        first = self.post({'job': 1})
+        second = self.post({'job': 1})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((second.status_code, second.data), (201, {'success': True, 'call': 1}))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(IdempotencyKey.objects.get(scope='test', key='key-1').status_code, 201)
+
+    def test_without_key_runs_every_time(self):
+        self.post({'job': 1}, key=None)
+        self.post({'job': 1}, key=None)
+        self.assertEqual(len(calls), 2)
+
+    def test_key_reused_with_different_body(self):
+        self.post({'job': 1})
+        self.assertEqual(self.post({'job': 2}).status_code, 422)
+        self.assertEqual(len(calls), 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.assertEqual(self.post({'fail': True}).status_code, 503)
+        self.assertEqual(self.post({'fail': True}).status_code, 503)
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_response_stored_by_another_worker_is_replayed(self):
+        request = self.factory.post('/test/', {'job': 1}, format='json')
+        IdempotencyKey.objects.create(
+            scope='test', key='key-1', fingerprint=request_fingerprint(Request(request, parsers=[JSONParser()])),
+            status_code=201, response={'success': True, 'call': 'elsewhere'}, completed_at=timezone.now()
+        )
+        response = self.post({'job': 1})
+        self.assertEqual(response.data, {'success': True, 'call': 'elsewhere'})
+        self.assertEqual(calls, [])
+
+    def test_in_progress_key_times_out(self):
+        request = self.factory.post('/test/', {'job': 1}, format='json')
+        IdempotencyKey.objects.create(
+            scope='test', key='key-1', fingerprint=request_fingerprint(Request(request, parsers=[JSONParser()]))
+        )
+        with mock.patch('api.idempotency.WAIT_TIMEOUT', 0.1):
+            self.assertEqual(self.post({'job': 1}).status_code, 409)
+        self.assertEqual(calls, [])
+
+    def test_abandoned_and_expired_keys_are_taken_over(self):
+        IdempotencyKey.objects.create(scope='test', key='key-1', fingerprint='x',
+                                      created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.post({'job': 1}).status_code, 201)
+        IdempotencyKey.objects.filter(key='key-1').update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.post({'job': 2}).status_code, 201)
+        self.assertEqual(len(calls), 2)
+
+
+class TTLCacheTests(SimpleTestCase):
+    def test_entries_expire_after_ttl(self):
+        cache = TTLCache(ttl=10)
+        with mock.patch('api.cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=60)
+        with mock.patch('api.cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('b'), 2)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_byte_bound(self):
+        cache = TTLCache(max_bytes=10)
+        self.assertFalse(cache.set('big', 'x' * 20))
+        cache.set('a', 'xxxx')
+        cache.set('b', 'yyyy')
+        self.assertNotIn('a', cache)
+        self.assertLessEqual(cache.stats()['bytes'], 10)
+
+
+class CoalescingCacheTests(SimpleTestCase):
+    def test_concurrent_misses_compute_once(self):
+        cache = CoalescingCache(ttl=60)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'offers': 3}
+
+        outcomes = []
+        threads = [
+            threading.Thread(target=lambda: outcomes.append(cache.get_or_compute('k', compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        # Let every caller join the flight before the leader finishes
+        for _ in range(500):
+            if cache.flight.coalesced == 3:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(outcome for _, outcome in outcomes), ['coalesced'] * 3 + ['miss'])
+        self.assertTrue(all(value == {'offers': 3} for value, _ in outcomes))
+        self.assertEqual(cache.get_or_compute('k', compute), ({'offers': 3}, 'hit'))
+        self.assertEqual(cache.stats()['in_flight'], 0)
+
+    def test_should_cache_and_ttl_for(self):
+        cache = CoalescingCache(ttl=60)
+        value, outcome = cache.get_or_compute('partial', lambda: {'partial': True}, should_cache=lambda v: not v['partial'])
+        self.assertEqual(outcome, 'miss')
+        self.assertEqual(cache.get_or_compute('partial', lambda: {'partial': False})[1], 'miss')
+        self.assertEqual(cache.get_or_compute('partial', lambda: None)[1], 'hit')
+
+        with mock.patch('api.cache.time.monotonic', return_value=100.0):
+            cache.get_or_compute('empty', lambda: [], ttl_for=lambda v: 5 if not v else 60)
+        with mock.patch('api.cache.time.monotonic', return_value=106.0):
+            self.assertEqual(cache.get_or_compute('empty', lambda: ['offer'])[1], 'miss')
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        cache = CoalescingCache()
+
+        def fail():
+            raise RuntimeError('provider down')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute('k', fail)
+        self.assertEqual(cache.get_or_compute('k', lambda: 1), (1, 'miss'))
+
+
+class CSVJournalTests(TempDirMixin, SimpleTestCase):
+    def journal(self, **options):
+        journal = CSVJournal(os.path.join(self.tmp, 'log.csv'), ['id', 'status'], flush_interval=0.05, **options)
+        self.addCleanup(journal.close)
+        return journal
+
+    def read(self):
+        with open(os.path.join(self.tmp, 'log.csv'), newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_flush_writes_rows_in_batches(self):
+        flushed = []
+        journal = self.journal(batch_size=2, on_flush=flushed.append)
+        for n in range(5):
+            journal.append({'id': str(n), 'status': 'ok', 'ignored': 'x'})
+        self.assertTrue(journal.flush(timeout=5))
+        self.assertEqual([row['id'] for row in self.read()], ['0', '1', '2', '3', '4'])
+        stats = journal.stats()
+        self.assertEqual(stats['rows_written'], 5)
+        self.assertGreaterEqual(stats['batches_written'], 3)
+        self.assertEqual(len(flushed), stats['batches_written'])
+
+    def test_full_queue_applies_backpressure(self):
+        journal = self.journal(batch_size=1, max_queue=2, put_timeout=0.05)
+        writing, release = threading.Event(), threading.Event()
+        write = journal._write
+
+        def slow_write(batch):
+            writing.set()
+            release.wait(5)
+            write(batch)
+
+        with mock.patch.object(journal, '_write', slow_write):
+            journal.append({'id': '0', 'status': 'ok'})
+            self.assertTrue(writing.wait(5))
+            journal.append({'id': '1', 'status': 'ok'})
+            journal.append({'id': '2', 'status': 'ok'})
+            with self.assertRaises(JournalFull):
+                journal.append({'id': '3', 'status': 'ok'})
+            self.assertFalse(journal.flush(timeout=0.05))
+            release.set()
+            self.assertTrue(journal.flush(timeout=5))
+        self.assertEqual([row['id'] for row in self.read()], ['0', '1', '2'])
+
+    def test_failed_batch_is_retried(self):
+        journal = self.journal()
+        with mock.patch('api.journal.os.fsync', side_effect=[OSError('disk full'), None]):
+            journal.append({'id': '0', 'status': 'ok'})
+            self.assertTrue(journal.flush(timeout=5))
+        self.assertEqual([row['id'] for row in self.read()], ['0'])
+        stats = journal.stats()
+        self.assertEqual((stats['rows_written'], stats['write_errors'], stats['retrying']), (1, 1, 0))
+
+    def test_interval_fsync_runs_without_another_batch(self):
+        journal = self.journal(fsync='interval', fsync_interval=0.1)
+        with mock.patch('api.journal.os.fsync') as fsync:
+            for n in range(2):
+                journal.append({'id': str(n), 'status': 'ok'})
+                self.assertTrue(journal.flush(timeout=5))
+            deadline = time.monotonic() + 5
+            while fsync.call_count < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(fsync.call_count, 2)
+
+    def test_close_drains_the_queue(self):
+        journal = self.journal(fsync='never')
+        for n in range(3):
+            journal.append({'id': str(n), 'status': 'ok'})
+        journal.close()
+        self.assertEqual(len(self.read()), 3)
+        with self.assertRaises(RuntimeError):
+            journal.append({'id': '4', 'status': 'ok'})
+
+    def test_rejects_unknown_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            CSVJournal(os.path.join(self.tmp, 'log.csv'), ['id'], fsync='sometimes')
+
+
+class EventHubTests(SimpleTestCase):
+    def test_published_events_reach_matching_subscribers(self):
+        hub = EventHub()
+
+        async def listen():
+            async with hub.subscribe({'booking': {'job-1'}, 'automation': None}) as subscription:
+                publisher = threading.Thread(target=lambda: [
+                    hub.publish('booking', 'job-2', {'status': 'approved'}),
+                    hub.publish('booking', 'job-1', {'status': 'approved'}),
+                    hub.publish('automation', 'a1', {'status': 'running'}),
+                ])
+                publisher.start()
+                publisher.join()
+                events = subscription.events(timeout=1)
+                return [await anext(events), await anext(events)]
+
+        first, second = asyncio.run(listen())
+        self.assertEqual((first.type, first.key, first.data), ('booking', 'job-1', {'status': 'approved'}))
+        self.assertEqual((second.type, second.key), ('automation', 'a1'))
+        self.assertEqual(hub.stats(), {'subscribers': 0, 'history': 3, 'last_event_id': 3})
+
+    def test_resume_from_last_event_id(self):
+        hub = EventHub(history=10)
+        for n in range(4):
+            hub.publish('booking', 'job-1', {'n': n})
+
+        async def resume():
+            async with hub.subscribe({'booking': None}, last_event_id=2) as subscription:
+                return [subscription.queue.get_nowait().data['n'] for _ in range(subscription.queue.qsize())]
+
+        self.assertEqual(asyncio.run(resume()), [2, 3])
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        hub = EventHub(max_queue=2)
+
+        async def lag():
+            async with hub.subscribe({'booking': None}) as subscription:
+                for n in range(5):
+                    hub.publish('booking', 'job-1', {'n': n})
+                await asyncio.sleep(0)
+                return subscription.dropped, [subscription.queue.get_nowait().data['n'] for _ in range(2)]
+
+        self.assertEqual(asyncio.run(lag()), (3, [3, 4]))
+
+    def test_sse_format(self):
+        hub = EventHub()
+        hub.register_snapshot('booking', lambda key: {'status': 'pending_approval'})
+        self.assertEqual(
+            hub.snapshot('booking', 'job-1').to_sse(),
+            'event: booking\ndata: {"type": "booking", "key": "job-1", "status": "pending_approval"}\n\n'
+        )
+        self.assertTrue(hub.publish('booking', 'job-1', {}).to_sse().startswith('id: 1\nevent: booking\n'))
+        self.assertIsNone(hub.snapshot('automation', 'a1'))
+
+
+class EventStreamTests(SimpleTestCase):
+    def test_requires_topics(self):
+        response = asyncio.run(views.event_stream(RequestFactory().get('/api/v1/events/')))
+        self.assertEqual(response.status_code, 400)
+
+    def test_streams_published_events(self):
+        hub = EventHub()
+
+        async def read():
+            with mock.patch.object(views, 'EVENT_HUB', hub):
+                response = await views.event_stream(RequestFactory().get('/api/v1/events/', {'automations': '*'}))
+                self.assertEqual(response['Content-Type'], 'text/event-stream')
+                chunks = response.streaming_content
+                retry = await anext(chunks)
+                hub.publish('automation', 'a1', {'status': 'completed'})
+                event = await anext(chunks)
+                await chunks.aclose()
+                return retry, event
+
+        retry, event = asyncio.run(read())
+        self.assertTrue(retry.startswith(b'retry: '))
+        lines = event.decode().splitlines()
+        self.assertEqual(lines[:2], ['id: 1', 'event: automation'])
+        self.assertEqual(json.loads(lines[2][len('data: '):])['status'], 'completed')
+        self.assertEqual(hub.stats()['subscribers'], 0)
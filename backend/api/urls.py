@@ -20,6 +20,9 @@ urlpatterns = [
     # Automations
     path('automations/', include('automations.urls')),
     
+    # Live booking/automation updates (Server-Sent Events)
+    path('events/', views.event_stream, name='event_stream'),
+    
     # ===== PLATFORM-BASED API ROUTES =====
     
     # BuilderTrend Platform (legacy route - kept for backward compatibility)
@@ -5,8 +5,14 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from datetime import datetime
 
+from buildertrend.approval_rules import AUTO_APPROVAL_RULES
+from .events import EVENT_HUB, EVENT_SETTINGS
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -124,7 +130,8 @@ def module_detail(request, module_id):
             'version': '1.0.0',
             'configuration': {
                 'ota_sources': ['internal', 'airbnb', 'expedia', 'kayak', 'booking', 'hotels'],
-                'auto_approve_threshold': 150.00,
+                'auto_approve_threshold': AUTO_APPROVAL_RULES.threshold(),
+                'auto_approval': AUTO_APPROVAL_RULES.describe(),
                 'notification_channels': ['sms', 'email', 'portal']
             },
             'statistics': {
@@ -145,3 +152,66 @@ def module_detail(request, module_id):
         'success': False,
         'error': 'Module not found'
     }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _event_topics(request):
+    """
+    Parse ?bookings=<job_id,...>&automations=<id,...> into hub topics.
+    '*' subscribes to every key of that type.
+    """
+    topics = {}
+    for param, event_type in [('bookings', 'booking'), ('automations', 'automation')]:
+        values = [v.strip() for raw in request.GET.getlist(param) for v in raw.split(',') if v.strip()]
+        if not values:
+            continue
+        topics[event_type] = None if '*' in values else set(values)
+    return topics
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-Sent Events stream of booking and automation state changes.
+    
+    GET /api/v1/events/?bookings=<job_id,...>&automations=<automation_id,...>
+    
+    Sends the current state of each requested key first, then every change
+    as it happens. Reconnecting clients resume from Last-Event-ID. Served
+    asynchronously when running under ASGI (uvicorn surfaceflow.asgi:application).
+    """
+    topics = _event_topics(request)
+    if not topics:
+        return JsonResponse({
+            'success': False,
+            'error': 'Pass bookings=<job_id,...> and/or automations=<id,...>'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0) or None
+    except ValueError:
+        last_event_id = None
+    heartbeat = EVENT_SETTINGS.get('HEARTBEAT', 15)
+    
+    def snapshots():
+        events = []
+        for event_type, keys in topics.items():
+            for key in sorted(keys or ()):
+                event = EVENT_HUB.snapshot(event_type, key)
+                if event is not None:
+                    events.append(event)
+        return events
+    
+    async def stream():
+        # Subscribe before reading the snapshot so no change falls in between
+        async with EVENT_HUB.subscribe(topics, last_event_id) as subscription:
+            yield f'retry: {EVENT_SETTINGS.get("RETRY_MS", 3000)}\n\n'
+            if last_event_id is None:
+                for event in await sync_to_async(snapshots)():
+                    yield event.to_sse()
+            async for event in subscription.events(timeout=heartbeat):
+                yield ': keepalive\n\n' if event is None else event.to_sse()
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
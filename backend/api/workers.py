@@ -0,0 +1,167 @@
+"""
+In-process background worker pool for automation jobs.
+
+enqueue() records an AutomationJob (status 'queued') and runs the function on
+a bounded thread pool, so slow work never holds a request thread. Status,
+progress, logs and result are written to the AutomationJob row, so any
+worker process can serve GET /api/v1/automations/<id>/ while it runs:
+
+    queued -> running -> completed | failed      (or cancelled at any point)
+
+The task function receives a TaskContext as its first argument:
+
+    def search(task, job_id):
+        task.log('Loaded job', progress=10)
+        if task.is_cancelled():
+            return None
+        return {'booking_job_id': ...}
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+import threading
+import uuid
+
+from automations.models import AutomationJob
+from .events import EVENT_HUB
+
+
+WORKER_SETTINGS = getattr(settings, 'WORKER_POOL', {})
+
+
+def automation_event(job):
+    """Compact automation state pushed to SSE subscribers"""
+    if job is None:
+        return None
+    return {
+        'id': job.id,
+        'module': job.module,
+        'action': job.action,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.logs[-1]['message'] if job.logs else None,
+    }
+
+
+def publish_automation(job_id):
+    """Publish the current state of an automation job"""
+    EVENT_HUB.publish('automation', job_id, automation_event(AutomationJob.objects.filter(pk=job_id).first()))
+
+
+EVENT_HUB.register_snapshot('automation', lambda job_id: automation_event(AutomationJob.objects.filter(pk=job_id).first()))
+
+
+class QueueFull(Exception):
+    """Raised when MAX_PENDING jobs are already queued or running"""
+
+
+class TaskContext:
+    """Handle a running task uses to report progress"""
+
+    def __init__(self, job_id, logs):
+        self.job_id = job_id
+        self.logs = list(logs)
+        self.progress = 0
+
+    def log(self, message, progress=None):
+        self.logs.append({'timestamp': timezone.now().isoformat(), 'message': message})
+        if progress is not None:
+            self.progress = max(0, min(int(progress), 100))
+        AutomationJob.objects.filter(pk=self.job_id).exclude(status='cancelled').update(
+            logs=self.logs, progress=self.progress
+        )
+        publish_automation(self.job_id)
+
+    def is_cancelled(self):
+        return AutomationJob.objects.filter(pk=self.job_id, status='cancelled').exists()
+
+
+class WorkerPool:
+    """Bounded thread pool that tracks each submission as an AutomationJob"""
+
+    def __init__(self, max_workers=4, max_pending=100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='automation-worker'
+                    )
+        return self._executor
+
+    def enqueue(self, module, action, fn, params=None):
+        """
+        Create a queued AutomationJob and schedule fn(task, **params).
+        Returns the AutomationJob; raises QueueFull when the pool is saturated.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f'{self.max_pending} automation jobs already pending')
+            self._pending += 1
+        params = params or {}
+        try:
+            job = AutomationJob.objects.create(
+                id=str(uuid.uuid4())[:8],
+                module=module,
+                action=action,
+                params=params,
+                status='queued',
+                progress=0,
+                logs=[{'timestamp': timezone.now().isoformat(), 'message': 'Queued'}]
+            )
+            publish_automation(job.id)
+            self._get_executor().submit(self._run, job.id, job.logs, fn, params)
+        except Exception:
+            self._release()
+            raise
+        return job
+
+    def _run(self, job_id, logs, fn, params):
+        try:
+            # Claim the job unless it was cancelled while queued
+            if not AutomationJob.objects.filter(pk=job_id, status='queued').update(status='running'):
+                return
+            task = TaskContext(job_id, logs)
+            task.log('Started')
+            try:
+                result = fn(task, **params)
+            except Exception as e:
+                print(f"❌ Automation {job_id} failed: {e}")
+                task.logs.append({'timestamp': timezone.now().isoformat(), 'message': f'Failed: {e}'})
+                AutomationJob.objects.filter(pk=job_id).exclude(status='cancelled').update(
+                    status='failed', logs=task.logs, result={'error': str(e)}
+                )
+                publish_automation(job_id)
+                return
+            task.logs.append({'timestamp': timezone.now().isoformat(), 'message': 'Completed'})
+            AutomationJob.objects.filter(pk=job_id).exclude(status='cancelled').update(
+                status='completed', progress=100, logs=task.logs, result=result
+            )
+            publish_automation(job_id)
+        finally:
+            self._release()
+            close_old_connections()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': self._pending,
+        }
+
+
+WORKER_POOL = WorkerPool(
+    max_workers=WORKER_SETTINGS.get('MAX_WORKERS', 4),
+    max_pending=WORKER_SETTINGS.get('MAX_PENDING', 100)
+)
@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AutomationJob
+
+
+@admin.register(AutomationJob)
+class AutomationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'module', 'action', 'status', 'progress', 'created_at')
+    list_filter = ('status', 'module')
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutomationJob',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('module', models.CharField(max_length=64)),
+                ('action', models.CharField(max_length=64)),
+                ('params', models.JSONField(default=dict)),
+                ('status', models.CharField(default='running', max_length=32)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('logs', models.JSONField(default=list)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='automation_created_idx'), models.Index(fields=['status', 'created_at', 'id'], name='automation_status_idx'), models.Index(fields=['module', 'created_at', 'id'], name='automation_module_idx')],
+            },
+        ),
+    ]
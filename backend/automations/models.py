@@ -1,3 +1,40 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class AutomationJob(models.Model):
+    """A triggered automation run and its progress log"""
+    id = models.CharField(max_length=32, primary_key=True)
+    module = models.CharField(max_length=64)
+    action = models.CharField(max_length=64)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=32, default='running')
+    progress = models.PositiveSmallIntegerField(default=0)
+    logs = models.JSONField(default=list)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='automation_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='automation_status_idx'),
+            models.Index(fields=['module', 'created_at', 'id'], name='automation_module_idx'),
+        ]
+
+    def to_dict(self):
+        job = {
+            'id': self.id,
+            'module': self.module,
+            'action': self.action,
+            'params': self.params,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'progress': self.progress,
+            'logs': self.logs,
+        }
+        if self.result is not None:
+            job['result'] = self.result
+        if self.cancelled_at:
+            job['cancelled_at'] = self.cancelled_at.isoformat()
+        return job
@@ -1,3 +1,89 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.workers import QueueFull, WorkerPool
+from .models import AutomationJob
+
+
+class WorkerPoolTests(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = WorkerPool(max_workers=1, max_pending=2)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def wait_for(self, job_id, *statuses):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            job = AutomationJob.objects.get(pk=job_id)
+            if job.status in statuses:
+                return job
+            time.sleep(0.02)
+        self.fail(f'automation {job_id} stuck in {job.status}')
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while self.pool.stats()['pending'] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.pool.stats()['pending'], 0)
+
+    def blocking(self, task):
+        task.log('Waiting', progress=10)
+        self.release.wait(5)
+        return {'waited': True}
+
+    def test_job_runs_and_reports_progress(self):
+        def work(task, count):
+            task.log('Halfway', progress=50)
+            return {'count': count}
+
+        job = self.pool.enqueue('buildertrend', 'search', work, {'count': 3})
+        self.assertEqual(job.status, 'queued')
+        job = self.wait_for(job.id, 'completed')
+        self.assertEqual((job.progress, job.result), (100, {'count': 3}))
+        self.assertEqual([entry['message'] for entry in job.logs], ['Queued', 'Started', 'Halfway', 'Completed'])
+
+        response = self.client.get(f'/api/v1/automations/{job.id}/')
+        self.assertEqual(response.json()['automation']['status'], 'completed')
+        self.wait_idle()
+
+    def test_exception_marks_job_failed(self):
+        def work(task):
+            task.log('Loaded', progress=40)
+            raise RuntimeError('provider down')
+
+        job = self.wait_for(self.pool.enqueue('buildertrend', 'search', work).id, 'failed')
+        self.assertEqual(job.result, {'error': 'provider down'})
+        self.assertEqual(job.progress, 40)
+        self.assertEqual(job.logs[-1]['message'], 'Failed: provider down')
+
+    def test_cancelled_while_queued_never_runs(self):
+        ran = []
+        first = self.pool.enqueue('buildertrend', 'search', self.blocking)
+        self.wait_for(first.id, 'running')
+        second = self.pool.enqueue('buildertrend', 'search', lambda task: ran.append(task.job_id))
+
+        response = self.client.post(f'/api/v1/automations/{second.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.release.set()
+        self.wait_for(first.id, 'completed')
+        self.wait_idle()
+        self.assertEqual(ran, [])
+        self.assertEqual(AutomationJob.objects.get(pk=second.id).status, 'cancelled')
+
+    def test_full_pool_refuses_jobs(self):
+        self.pool.enqueue('buildertrend', 'search', self.blocking)
+        self.pool.enqueue('buildertrend', 'search', self.blocking)
+        with self.assertRaises(QueueFull):
+            self.pool.enqueue('buildertrend', 'search', self.blocking)
+        self.assertEqual(AutomationJob.objects.count(), 2)
+        self.release.set()
+        for job in AutomationJob.objects.all():
+            self.wait_for(job.id, 'completed')
+        self.wait_idle()
+
+    def test_cancel_unknown_job(self):
+        self.assertEqual(self.client.post('/api/v1/automations/nope/cancel/').status_code, 404)
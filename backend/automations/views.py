@@ -5,34 +5,50 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime
+from django.utils import timezone
 import uuid
 
-
-# In-memory storage for demo
-AUTOMATION_JOBS = {}
+from api.pagination import get_page_size, keyset_queryset_page, InvalidCursor
+from api.workers import publish_automation
+from .models import AutomationJob
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def list_automations(request):
     """
-    List all automation jobs with optional filtering.
+    List automation jobs with optional filtering.
+    Keyset-paginated on (created_at, id): pass next_cursor back as ?cursor=.
     """
     status_filter = request.query_params.get('status')
     module_filter = request.query_params.get('module')
+    per_page = get_page_size(request)
     
-    jobs = list(AUTOMATION_JOBS.values())
-    
+    queryset = AutomationJob.objects.all()
     if status_filter:
-        jobs = [j for j in jobs if j.get('status') == status_filter]
+        queryset = queryset.filter(status=status_filter)
     if module_filter:
-        jobs = [j for j in jobs if j.get('module') == module_filter]
+        queryset = queryset.filter(module=module_filter)
+    
+    try:
+        jobs, next_cursor = keyset_queryset_page(
+            queryset,
+            request.query_params.get('cursor'),
+            per_page,
+            serialize=AutomationJob.to_dict
+        )
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'success': True,
         'automations': jobs,
-        'total': len(jobs)
+        'total': queryset.count(),
+        'per_page': per_page,
+        'next_cursor': next_cursor
     })
 
 
@@ -54,18 +70,18 @@ def trigger_automation(request):
     
     job_id = str(uuid.uuid4())[:8]
     
-    AUTOMATION_JOBS[job_id] = {
-        'id': job_id,
-        'module': module,
-        'action': action,
-        'params': params,
-        'status': 'running',
-        'created_at': datetime.utcnow().isoformat(),
-        'progress': 0,
-        'logs': [
-            {'timestamp': datetime.utcnow().isoformat(), 'message': 'Automation started'}
+    AutomationJob.objects.create(
+        id=job_id,
+        module=module,
+        action=action,
+        params=params,
+        status='running',
+        progress=0,
+        logs=[
+            {'timestamp': timezone.now().isoformat(), 'message': 'Automation started'}
         ]
-    }
+    )
+    publish_automation(job_id)
     
     return Response({
         'success': True,
@@ -81,10 +97,11 @@ def automation_detail(request, job_id):
     """
     Get details of a specific automation job.
     """
-    if job_id in AUTOMATION_JOBS:
+    job = AutomationJob.objects.filter(pk=job_id).first()
+    if job:
         return Response({
             'success': True,
-            'automation': AUTOMATION_JOBS[job_id]
+            'automation': job.to_dict()
         })
     
     return Response({
@@ -99,10 +116,8 @@ def cancel_automation(request, job_id):
     """
     Cancel a running automation job.
     """
-    if job_id in AUTOMATION_JOBS:
-        AUTOMATION_JOBS[job_id]['status'] = 'cancelled'
-        AUTOMATION_JOBS[job_id]['cancelled_at'] = datetime.utcnow().isoformat()
-        
+    if AutomationJob.objects.filter(pk=job_id).update(status='cancelled', cancelled_at=timezone.now()):
+        publish_automation(job_id)
         return Response({
             'success': True,
             'job_id': job_id,
@@ -0,0 +1,225 @@
+"""
+Job Address Normalization and Offline Geocoding
+
+Addresses from the Chrome extension arrive in inconsistent shapes, e.g.
+    {'city': 'Orlando FL 32825', 'state': 'FL', 'zip': '32825',
+     'formatted': '3374 Erskine Drive, Orlando FL 32825, FL 32825'}
+    {'city': 'Fairfax', 'state': '', 'zip': '22031', ...}
+
+normalize_address() splits them into clean street/city/state/zip fields,
+rebuilds the formatted line and adds lat/lng from a local ZIP/city gazetteer
+(GAZETTEER['CSV']), so no search waits on a network geocoder. Results are
+memoized per distinct raw address.
+"""
+from django.conf import settings
+from functools import lru_cache
+import csv
+import re
+
+
+GAZETTEER_SETTINGS = getattr(settings, 'GAZETTEER', {})
+
+STATES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV',
+    'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY',
+    'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR',
+    'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+    'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA',
+    'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+}
+STATE_CODES = set(STATES.values())
+
+STREET_SUFFIXES = {
+    'street': 'St', 'avenue': 'Ave', 'drive': 'Dr', 'road': 'Rd', 'boulevard': 'Blvd',
+    'lane': 'Ln', 'court': 'Ct', 'place': 'Pl', 'parkway': 'Pkwy', 'highway': 'Hwy',
+    'circle': 'Cir', 'terrace': 'Ter', 'trail': 'Trl', 'way': 'Way',
+}
+
+_ZIP = re.compile(r'(\d{5})(?:-\d{4})?$')
+_STATE_NAMES = sorted(STATES, key=len, reverse=True)
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return ' '.join(str(value).replace('\n', ' ').split()).strip(' ,')
+
+
+def _state_code(value):
+    value = _clean(value)
+    if value.upper() in STATE_CODES:
+        return value.upper()
+    return STATES.get(value.lower(), '')
+
+
+def _split_state_zip(text, bare_state_name=False):
+    """
+    Peel a trailing ZIP and state off text: 'Orlando FL 32825' -> ('Orlando', 'FL', '32825')
+    A bare full state name ('New York') is only taken as a state with bare_state_name.
+    """
+    text = _clean(text)
+    zip_code = ''
+    match = _ZIP.search(text)
+    if match:
+        zip_code = match.group(1)
+        text = text[:match.start()].strip(' ,')
+
+    state = ''
+    words = text.rsplit(' ', 1)
+    if len(words) == 2 and words[1].upper() in STATE_CODES:
+        state, text = words[1].upper(), words[0].strip(' ,')
+    elif text.upper() in STATE_CODES:
+        state, text = text.upper(), ''
+    elif bare_state_name and text.lower() in STATES:
+        state, text = STATES[text.lower()], ''
+    else:
+        lowered = text.lower()
+        for name in _STATE_NAMES:
+            # 'Buffalo New York' -> NY, but a bare 'New York' or 'Washington' stays a city
+            if len(lowered) > len(name) and lowered.endswith(name) and lowered[-len(name) - 1] in ' ,':
+                state, text = STATES[name], text[:-len(name)].strip(' ,')
+                break
+    return text, state, zip_code
+
+
+def _normalize_street(street):
+    words = _clean(street).split(' ')
+    if len(words) > 1:
+        suffix = STREET_SUFFIXES.get(words[-1].lower().rstrip('.'))
+        if suffix:
+            words[-1] = suffix
+    return ' '.join(words)
+
+
+def _parse_formatted(formatted):
+    """Split '3374 Erskine Drive, Orlando FL 32825, FL 32825' into parts"""
+    parts = [p for p in (_clean(p) for p in _clean(formatted).split(',')) if p]
+    street = city = state = zip_code = ''
+    # Trailing parts that are only state/zip (possibly repeated)
+    while parts:
+        rest, part_state, part_zip = _split_state_zip(parts[-1], bare_state_name=len(parts) > 1)
+        state = state or part_state
+        zip_code = zip_code or part_zip
+        if rest:
+            parts[-1] = rest
+            break
+        parts.pop()
+    if parts and (state or zip_code or len(parts) > 1):
+        city = parts.pop()
+    if parts:
+        street = parts[0]
+    return street, city, state, zip_code
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path):
+    """
+    Read the gazetteer CSV (zip, city, state, latitude, longitude).
+    Returns (by_zip, by_city) lookup dicts; a missing file gives empty lookups.
+    """
+    by_zip = {}
+    by_city = {}
+    try:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    entry = (row['city'], row['state'].upper(), float(row['latitude']), float(row['longitude']))
+                except (KeyError, ValueError):
+                    continue
+                by_zip[row['zip'].zfill(5)] = entry
+                # The first ZIP listed for a city stands in for the city centroid
+                by_city.setdefault((row['city'].lower(), row['state'].upper()), (row['zip'].zfill(5),) + entry)
+    except OSError as e:
+        print(f"⚠️ Gazetteer not loaded ({path}): {e}")
+    return by_zip, by_city
+
+
+def geocode(city='', state='', zip_code=''):
+    """
+    (lat, lng, source) from the gazetteer, by ZIP first and then city/state.
+    source is 'zip', 'city' or None when nothing matched.
+    """
+    by_zip, by_city = load_gazetteer(str(GAZETTEER_SETTINGS.get('CSV', '')))
+    if zip_code and zip_code in by_zip:
+        _, _, lat, lng = by_zip[zip_code]
+        return lat, lng, 'zip'
+    entry = by_city.get((city.lower(), state))
+    if entry:
+        return entry[3], entry[4], 'city'
+    return None, None, None
+
+
+def _raw_key(address):
+    if isinstance(address, dict):
+        return tuple(
+            _clean(address.get(field))
+            for field in ('street', 'city', 'state', 'zip', 'formatted', 'lat', 'lng', 'latitude', 'longitude')
+        )
+    return ('', '', '', '', _clean(address), '', '', '', '')
+
+
+@lru_cache(maxsize=GAZETTEER_SETTINGS.get('CACHE_SIZE', 10000))
+def _normalize_key(key):
+    street, city, state, zip_code, formatted, lat, lng, latitude, longitude = key
+
+    given_state = _state_code(state)
+    split_city, city_state, city_zip = _split_state_zip(city)
+    if given_state and city_state and city_state != given_state:
+        # 'Lake In The Hills' with state IL: the trailing 'In' is part of the name
+        split_city, city_state = _clean(city), ''
+    city = split_city
+    state = given_state or city_state
+    zip_match = _ZIP.search(zip_code)
+    zip_code = zip_match.group(1) if zip_match else city_zip
+
+    if formatted and not (street and city and state and zip_code):
+        f_street, f_city, f_state, f_zip = _parse_formatted(formatted)
+        street = street or f_street
+        city = city or f_city
+        state = state or f_state
+        zip_code = zip_code or f_zip
+
+    by_zip, _ = load_gazetteer(str(GAZETTEER_SETTINGS.get('CSV', '')))
+    if zip_code in by_zip:
+        # Fill gaps from the ZIP (e.g. a missing state)
+        zip_city, zip_state, _, _ = by_zip[zip_code]
+        city = city or zip_city
+        state = state or zip_state
+
+    street = _normalize_street(street)
+    normalized = {
+        'street': street,
+        'city': city,
+        'state': state,
+        'zip': zip_code,
+        'formatted': ', '.join(p for p in [street, city, ' '.join(p for p in [state, zip_code] if p)] if p),
+    }
+
+    try:
+        lat = float(lat or latitude)
+        lng = float(lng or longitude)
+        source = 'provided'
+    except ValueError:
+        lat, lng, source = geocode(city, state, zip_code)
+    if lat is not None:
+        normalized.update({'lat': lat, 'lng': lng})
+    normalized['geocode_source'] = source
+    return normalized
+
+
+def normalize_address(address):
+    """
+    Normalized copy of a job address (dict or formatted string).
+    Always returns a dict with street, city, state, zip, formatted and
+    geocode_source, plus lat/lng when the address could be located.
+    """
+    return dict(_normalize_key(_raw_key(address or {})))
+
+
+def cache_info():
+    return _normalize_key.cache_info()._asdict()
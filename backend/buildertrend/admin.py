@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Booking, HousingUnit, SyncedJob
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'job_id', 'status', 'created_at', 'approved_at')
+    list_filter = ('status',)
+    search_fields = ('id', 'job_id')
+
+
+@admin.register(SyncedJob)
+class SyncedJobAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'source', 'created_at', 'synced_at')
+    search_fields = ('job_id',)
+
+
+@admin.register(HousingUnit)
+class HousingUnitAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'capacity', 'latitude', 'longitude', 'active')
+    list_filter = ('active',)
+    search_fields = ('id', 'name', 'address')
@@ -0,0 +1,171 @@
+"""
+Booking Auto-Approval Rules
+
+Policies from HOTEL_AUTO_APPROVAL['POLICIES'] are compiled once into predicate
+closures. A booking is approved automatically when its recommended offer
+matches any policy; every condition inside a policy must hold. Sample offers
+from the stub sources (stub=True) never match:
+
+    {'name': 'internal-housing', 'conditions': {'is_internal': True}}
+    {'name': 'under-threshold', 'conditions': {'max_price_per_night': 150.0, 'min_rating': 3.5}}
+
+    AUTO_APPROVAL_RULES.match(offer)             -> 'under-threshold' or None
+    AUTO_APPROVAL_RULES.evaluate_many(bookings)  -> [(booking, offer, policy), ...]
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+AUTO_APPROVAL_SETTINGS = getattr(settings, 'HOTEL_AUTO_APPROVAL', {})
+
+
+def _number(offer, field):
+    value = offer.get(field)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _max_price_per_night(limit):
+    limit = float(limit)
+    def check(offer):
+        price = _number(offer, 'price_per_night')
+        return price is not None and price <= limit
+    return check
+
+
+def _max_total_price(limit):
+    limit = float(limit)
+    def check(offer):
+        price = _number(offer, 'total_price')
+        return price is not None and price <= limit
+    return check
+
+
+def _min_rating(floor):
+    floor = float(floor)
+    def check(offer):
+        rating = _number(offer, 'rating')
+        return rating is not None and rating >= floor
+    return check
+
+
+def _max_distance_miles(limit):
+    limit = float(limit)
+    def check(offer):
+        distance = _number(offer, 'distance_miles')
+        return distance is not None and distance <= limit
+    return check
+
+
+def _is_internal(expected):
+    expected = bool(expected)
+    return lambda offer: bool(offer.get('is_internal')) == expected
+
+
+def _sources(names):
+    names = frozenset(names)
+    return lambda offer: offer.get('source') in names
+
+
+def _available(expected):
+    expected = bool(expected)
+    return lambda offer: bool(offer.get('availability', True)) == expected
+
+
+def _not_stub(offer):
+    return not offer.get('stub')
+
+
+# condition name -> factory(configured value) -> predicate(offer)
+CONDITIONS = {
+    'max_price_per_night': _max_price_per_night,
+    'max_total_price': _max_total_price,
+    'min_rating': _min_rating,
+    'max_distance_miles': _max_distance_miles,
+    'is_internal': _is_internal,
+    'sources': _sources,
+    'available': _available,
+}
+
+
+def compile_policy(policy):
+    """One predicate(offer) that is True when every condition of policy holds"""
+    conditions = policy.get('conditions') or {}
+    if not conditions:
+        raise ImproperlyConfigured(f"Auto-approval policy {policy.get('name')!r} has no conditions")
+    checks = []
+    for name, value in conditions.items():
+        factory = CONDITIONS.get(name)
+        if factory is None:
+            raise ImproperlyConfigured(f"Unknown auto-approval condition {name!r} in policy {policy.get('name')!r}")
+        checks.append(factory(value))
+    # Unavailable offers are never auto-approved unless a policy says otherwise
+    if 'available' not in conditions:
+        checks.append(_available(True))
+    # Stub offers stand in for real inventory; approving one would book nothing
+    checks.append(_not_stub)
+    checks = tuple(checks)
+    return lambda offer: all(check(offer) for check in checks)
+
+
+class RuleSet:
+    """Compiled policies, tried in order"""
+
+    def __init__(self, policies, enabled=True):
+        self.enabled = enabled
+        self.policies = [dict(policy) for policy in policies]
+        self._compiled = [
+            (policy.get('name') or f'policy-{position}', compile_policy(policy))
+            for position, policy in enumerate(self.policies, start=1)
+        ]
+
+    def __len__(self):
+        return len(self._compiled)
+
+    def match(self, offer):
+        """Name of the first policy the offer satisfies, or None"""
+        if not self.enabled or not offer:
+            return None
+        for name, predicate in self._compiled:
+            if predicate(offer):
+                return name
+        return None
+
+    def evaluate(self, booking):
+        """(offer, policy) for a booking's recommended offer, or (None, None)"""
+        offer = booking.get('recommended')
+        policy = self.match(offer)
+        return (offer, policy) if policy else (None, None)
+
+    def evaluate_many(self, bookings):
+        """[(booking, offer, policy)] for the bookings that qualify"""
+        if not self.enabled or not self._compiled:
+            return []
+        matches = []
+        for booking in bookings:
+            offer, policy = self.evaluate(booking)
+            if policy:
+                matches.append((booking, offer, policy))
+        return matches
+
+    def threshold(self):
+        """The nightly price limit of the first policy that sets one (for display)"""
+        for policy in self.policies:
+            limit = (policy.get('conditions') or {}).get('max_price_per_night')
+            if limit is not None:
+                return float(limit)
+        return None
+
+    def describe(self):
+        return {
+            'enabled': self.enabled,
+            'policies': [
+                {'name': name, 'conditions': policy.get('conditions', {})}
+                for (name, _), policy in zip(self._compiled, self.policies)
+            ],
+        }
+
+
+AUTO_APPROVAL_RULES = RuleSet(
+    AUTO_APPROVAL_SETTINGS.get('POLICIES', []),
+    enabled=AUTO_APPROVAL_SETTINGS.get('ENABLED', False)
+)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class BuildertrendConfig(AppConfig):
     name = 'buildertrend'
+
+    def ready(self):
+        # Connects the HousingUnit signals that keep the housing index current
+        from . import housing  # noqa: F401
@@ -0,0 +1,43 @@
+"""
+On-disk archive for cold bookings.
+
+Each archived booking is one gzipped JSON file, sharded by the first two
+characters of its id:  <ARCHIVE_DIR>/ab/ab12cd34.json.gz
+"""
+import gzip
+import json
+import os
+import tempfile
+
+
+class BookingArchive:
+    """Reads and writes archived bookings under a root directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, booking_id):
+        return os.path.join(self.root, booking_id[:2], f'{booking_id}.json.gz')
+
+    def write(self, booking):
+        """Write a booking atomically (temp file + rename)"""
+        path = self.path(booking['id'])
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                f.write(json.dumps(booking, default=str).encode())
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def read(self, booking_id):
+        try:
+            with gzip.open(self.path(booking_id), 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,256 @@
+"""
+Internal Housing Inventory
+
+Company housing units are kept in an in-process grid index (fixed-size
+lat/lng cells) so the units nearest a job site are found by scanning a few
+cells instead of every unit. The index loads lazily from the HousingUnit
+table and is updated incrementally by model signals; other processes pick up
+changes on their next REFRESH_INTERVAL check.
+
+    HOUSING_INVENTORY.nearest(28.54, -81.30, k=3, min_capacity=2)
+    -> [(unit_dict, distance_miles), ...]
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+import heapq
+import math
+import threading
+import time
+
+from .models import HousingUnit
+
+
+HOUSING_SETTINGS = getattr(settings, 'INTERNAL_HOUSING', {})
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.09
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def location_coordinates(location):
+    """(lat, lng) from a job address dict, or None if it has no coordinates"""
+    if not isinstance(location, dict):
+        return None
+    lat = location.get('lat', location.get('latitude'))
+    lng = location.get('lng', location.get('longitude'))
+    try:
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+
+class GridIndex:
+    """
+    Points bucketed into cell_degrees x cell_degrees cells.
+
+    nearest() scans rings of cells outward from the query cell and stops once
+    the closest unscanned ring is farther away than the k-th best match, so a
+    lookup touches only the cells around the query however many points exist.
+    """
+
+    def __init__(self, cell_degrees=0.1):
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._points = {}
+        self._bounds = None  # (min_x, min_y, max_x, max_y) of cells ever occupied
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def add(self, key, lat, lng):
+        self.discard(key)
+        cell = self._cell(lat, lng)
+        self._cells.setdefault(cell, {})[key] = (lat, lng)
+        self._points[key] = cell
+        x, y = cell
+        if self._bounds is None:
+            self._bounds = (x, y, x, y)
+        else:
+            min_x, min_y, max_x, max_y = self._bounds
+            self._bounds = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+
+    def discard(self, key):
+        cell = self._points.pop(key, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._points.clear()
+        self._bounds = None
+
+    def _ring(self, cx, cy, ring):
+        """Occupied cells at Chebyshev distance ring from (cx, cy)"""
+        if ring == 0:
+            cells = [(cx, cy)]
+        else:
+            cells = [(cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(-ring, ring + 1)]
+            cells += [(cx + dx, cy + dy) for dy in (-ring, ring) for dx in range(-ring + 1, ring)]
+        return [self._cells[c] for c in cells if c in self._cells]
+
+    def _beyond(self, cx, cy, ring):
+        """Occupied cells at Chebyshev distance >= ring from (cx, cy)"""
+        return [
+            bucket for c, bucket in self._cells.items()
+            if max(abs(c[0] - cx), abs(c[1] - cy)) >= ring
+        ]
+
+    def nearest(self, lat, lng, k=1, max_miles=None, predicate=None):
+        """Up to k (distance_miles, key) pairs closest to (lat, lng), nearest first"""
+        if not self._cells or k <= 0:
+            return []
+        cx, cy = self._cell(lat, lng)
+        # Rings closer than the occupied bounding box are empty
+        min_x, min_y, max_x, max_y = self._bounds
+        ring = max(min_x - cx, cx - max_x, min_y - cy, cy - max_y, 0)
+        best = []  # max-heap of (-distance, key), size <= k
+        visited = 0
+        while True:
+            # Once walking rings would cost more than visiting every occupied
+            # cell, finish with one pass over everything not scanned yet
+            ring_size = 8 * ring or 1
+            sparse = visited + ring_size > len(self._cells)
+            buckets = self._beyond(cx, cy, ring) if sparse else self._ring(cx, cy, ring)
+            visited += ring_size
+            for bucket in buckets:
+                for key, (plat, plng) in bucket.items():
+                    if predicate is not None and not predicate(key):
+                        continue
+                    distance = haversine_miles(lat, lng, plat, plng)
+                    if max_miles is not None and distance > max_miles:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, key))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, key))
+
+            if sparse:
+                break
+            # Anything in a later ring is at least `ring` whole cells away
+            cos_lat = math.cos(math.radians(min(abs(lat) + (ring + 1) * self.cell_degrees, 89.0)))
+            bound = ring * self.cell_degrees * MILES_PER_DEGREE * cos_lat
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            if max_miles is not None and bound > max_miles:
+                break
+            ring += 1
+
+        return sorted((-d, key) for d, key in best)
+
+
+class HousingInventory:
+    """Active housing units plus their GridIndex"""
+
+    def __init__(self, cell_degrees=0.1, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self.index = GridIndex(cell_degrees)
+        self._units = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+
+    def __len__(self):
+        self.maybe_refresh()
+        return len(self._units)
+
+    def _db_version(self):
+        # Deletes change the count, saves bump updated_at
+        return tuple(HousingUnit.objects.aggregate(count=Count('id'), updated=Max('updated_at')).values())
+
+    def reload(self):
+        """Rebuild the index from the database"""
+        with self._lock:
+            self.index.clear()
+            self._units = {}
+            for unit in HousingUnit.objects.filter(active=True).iterator():
+                self._apply(unit)
+            self._version = self._db_version()
+            self._checked_at = time.monotonic()
+            self._loaded = True
+
+    def maybe_refresh(self):
+        """Load on first use, then reload if another process changed the table"""
+        if not self._loaded:
+            self.reload()
+            return
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if self._db_version() != self._version:
+                self.reload()
+
+    def _apply(self, unit):
+        if unit.active:
+            self._units[unit.id] = unit.to_dict()
+            self.index.add(unit.id, unit.latitude, unit.longitude)
+        else:
+            self._units.pop(unit.id, None)
+            self.index.discard(unit.id)
+
+    def upsert(self, unit):
+        """Apply a saved unit to the index"""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._apply(unit)
+            self._version = self._db_version()
+
+    def remove(self, unit_id):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._units.pop(unit_id, None)
+            self.index.discard(unit_id)
+            self._version = self._db_version()
+
+    def get(self, unit_id):
+        self.maybe_refresh()
+        return self._units.get(unit_id)
+
+    def nearest(self, lat, lng, k=3, max_miles=None, min_capacity=None):
+        """Up to k (unit_dict, distance_miles) pairs, nearest first"""
+        self.maybe_refresh()
+        predicate = None
+        if min_capacity:
+            predicate = lambda unit_id: self._units[unit_id]['capacity'] >= min_capacity
+        with self._lock:
+            matches = self.index.nearest(lat, lng, k=k, max_miles=max_miles, predicate=predicate)
+            return [(self._units[unit_id], distance) for distance, unit_id in matches]
+
+
+HOUSING_INVENTORY = HousingInventory(
+    cell_degrees=HOUSING_SETTINGS.get('CELL_DEGREES', 0.1),
+    refresh_interval=HOUSING_SETTINGS.get('REFRESH_INTERVAL', 60)
+)
+
+
+@receiver(post_save, sender=HousingUnit)
+def _housing_unit_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: HOUSING_INVENTORY.upsert(instance))
+
+
+@receiver(post_delete, sender=HousingUnit)
+def _housing_unit_deleted(sender, instance, **kwargs):
+    unit_id = instance.id
+    transaction.on_commit(lambda: HOUSING_INVENTORY.remove(unit_id))
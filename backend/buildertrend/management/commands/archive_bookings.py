@@ -0,0 +1,23 @@
+"""
+Move cold bookings to the on-disk archive and drop unreferenced offers.
+
+    python manage.py archive_bookings
+"""
+from django.core.management.base import BaseCommand
+
+from buildertrend.views import BOOKING_JOBS
+
+
+class Command(BaseCommand):
+    help = 'Archive finished/expired bookings and prune interned documents no booking references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-prune', action='store_true', help='Skip pruning interned offers')
+
+    def handle(self, *args, **options):
+        archived = BOOKING_JOBS.sweep()
+        self.stdout.write(f"Archived bookings: {archived}")
+        if not options['no_prune']:
+            offers, snapshots = BOOKING_JOBS.prune_documents()
+            self.stdout.write(f"Pruned offers: {offers}, job snapshots: {snapshots}")
+        self.stdout.write(str(BOOKING_JOBS.stats()))
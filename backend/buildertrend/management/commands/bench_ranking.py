@@ -0,0 +1,78 @@
+"""
+Micro-benchmark the vectorized offer ranking against the dict sort and the
+pure Python ranking path, to place VECTORIZED_MIN_OFFERS.
+
+    python manage.py bench_ranking --sizes 30,300,1000,3000,10000,100000 --repeat 5
+"""
+from django.core.management.base import BaseCommand
+import random
+import statistics
+import time
+
+from buildertrend.ranking import AMENITY_BITS, OfferMatrix, pareto_mask, rank_offers, score, top_k
+
+
+def make_offers(count, seed=0):
+    rng = random.Random(seed)
+    amenities = list(AMENITY_BITS)
+    sources = ['Airbnb', 'Expedia', 'Kayak', 'Booking.com', 'Hotels.com']
+    offers = []
+    for i in range(count):
+        price = rng.randint(60, 400)
+        offers.append({
+            'id': f'offer-{i}',
+            'source': rng.choice(sources),
+            'price_per_night': price,
+            'total_price': price * 7,
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'distance_miles': round(rng.uniform(0.1, 25.0), 1),
+            'amenities': rng.sample(amenities, rng.randint(0, 6)),
+            'savings': rng.choice([0, 0, 0, 25, 50, 100]),
+        })
+    return offers
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+class Command(BaseCommand):
+    help = 'Compare the NumPy and pure Python offer ranking with sorting dicts by total_price'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='30,300,1000,3000,10000,100000')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('-k', type=int, default=10)
+
+    def handle(self, *args, **options):
+        k = options['k']
+        repeat = options['repeat']
+        for size in [int(s) for s in options['sizes'].split(',')]:
+            offers = make_offers(size)
+            matrix = OfferMatrix.from_offers(offers)
+            scores = score(matrix)
+            axes = matrix.axes()
+
+            results = {
+                'dict sort (total_price)': timed(
+                    lambda: sorted(offers, key=lambda x: x['total_price'])[:k], repeat),
+                'load arrays': timed(lambda: OfferMatrix.from_offers(offers), repeat),
+                'score + top_k': timed(lambda: top_k(score(matrix), k), repeat),
+                'pareto filter': timed(lambda: pareto_mask(axes), repeat),
+                'rank_offers numpy': timed(lambda: rank_offers(offers, k=k, vectorized=True), repeat),
+                'rank_offers python': timed(lambda: rank_offers(offers, k=k, vectorized=False), repeat),
+                'numpy (no pareto)': timed(
+                    lambda: rank_offers(offers, k=k, dominance_filter=False, vectorized=True), repeat),
+                'python (no pareto)': timed(
+                    lambda: rank_offers(offers, k=k, dominance_filter=False, vectorized=False), repeat),
+            }
+
+            front = int(pareto_mask(axes).sum())
+            self.stdout.write(f"{size} offers (pareto front: {front}, best score: {scores.max():.3f})")
+            for name, ms in results.items():
+                self.stdout.write(f"  {name:<26} {ms:9.2f} ms")
@@ -0,0 +1,68 @@
+"""
+Load-test the OTA fan-out search against the local stub adapters.
+
+    python manage.py ota_loadtest --requests 200 --concurrency 20 --latency 0.05,0.4
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+import statistics
+import time
+
+from buildertrend import ota
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent hotel searches against the stub OTA sources and report latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--latency', default=None,
+                            help='Stub latency in seconds, or "min,max" for a random range')
+        parser.add_argument('--timeout', type=float, default=None,
+                            help='Per-source deadline in seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.0)
+        parser.add_argument('--source-concurrency', type=int, default=None,
+                            help='Threads per source')
+
+    def handle(self, *args, **options):
+        latency = options['latency']
+        if latency is not None:
+            parts = [float(p) for p in latency.split(',')]
+            latency = tuple(parts) if len(parts) > 1 else parts[0]
+
+        adapters = [
+            ota.StubSourceAdapter(
+                a.name,
+                icon=a.icon,
+                latency=a.latency if latency is None else latency,
+                failure_rate=options['failure_rate'],
+                timeout=options['timeout'] if options['timeout'] is not None else a.timeout,
+                max_concurrency=options['source_concurrency'] or a.max_concurrency
+            )
+            for a in ota.SOURCE_ADAPTERS
+        ]
+        location = {'city': 'Orlando', 'state': 'FL'}
+
+        def one_search(_):
+            return ota.search_all_sources(location, adapters=adapters)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(one_search, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(r['elapsed_ms'] for r in results)
+        partial = sum(1 for r in results if r['partial'])
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+        self.stdout.write(f"Searches:      {len(results)} in {wall:.2f}s ({len(results) / wall:.1f}/s)")
+        self.stdout.write(f"Latency (ms):  p50={statistics.median(latencies):.1f} p95={p95:.1f} max={latencies[-1]:.1f}")
+        self.stdout.write(f"Partial:       {partial}")
+
+        for adapter in adapters:
+            timings = [t for r in results for t in r['source_timings'] if t['source'] == adapter.name]
+            counts = {}
+            for t in timings:
+                counts[t['status']] = counts.get(t['status'], 0) + 1
+            self.stdout.write(f"  {adapter.name:<18} {counts}")
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('job_id', models.CharField(max_length=64)),
+                ('job_data', models.JSONField(default=dict)),
+                ('hotels', models.JSONField(default=list)),
+                ('recommended', models.JSONField(blank=True, null=True)),
+                ('status', models.CharField(default='pending_approval', max_length=32)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('approved_at', models.DateTimeField(blank=True, null=True)),
+                ('selected_hotel_id', models.CharField(blank=True, max_length=64, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_id', 'created_at'], name='booking_job_idx'), models.Index(fields=['status', 'created_at', 'id'], name='booking_status_idx'), models.Index(fields=['created_at', 'id'], name='booking_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncedJob',
+            fields=[
+                ('job_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.JSONField(default=dict)),
+                ('source', models.CharField(default='api', max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'job_id'], name='syncedjob_created_idx')],
+            },
+        ),
+    ]
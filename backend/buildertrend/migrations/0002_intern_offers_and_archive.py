@@ -0,0 +1,106 @@
+import hashlib
+import json
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def _fingerprint(data):
+    raw = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def intern_booking_documents(apps, schema_editor):
+    Booking = apps.get_model('buildertrend', 'Booking')
+    HotelOffer = apps.get_model('buildertrend', 'HotelOffer')
+    JobSnapshot = apps.get_model('buildertrend', 'JobSnapshot')
+
+    offers = {}
+    snapshots = {}
+    for booking in Booking.objects.all().iterator():
+        booking.offer_ids = []
+        for hotel in booking.hotels or []:
+            fingerprint = _fingerprint(hotel)
+            offers[fingerprint] = hotel
+            booking.offer_ids.append(fingerprint)
+        if booking.recommended:
+            fingerprint = _fingerprint(booking.recommended)
+            offers[fingerprint] = booking.recommended
+            booking.recommended_id = fingerprint
+        booking.job_snapshot = _fingerprint(booking.job_data or {})
+        snapshots[booking.job_snapshot] = booking.job_data or {}
+        booking.save(update_fields=['offer_ids', 'recommended_id', 'job_snapshot'])
+
+    HotelOffer.objects.bulk_create(
+        [HotelOffer(fingerprint=f, data=d) for f, d in offers.items()], ignore_conflicts=True
+    )
+    JobSnapshot.objects.bulk_create(
+        [JobSnapshot(fingerprint=f, data=d) for f, d in snapshots.items()], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildertrend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelOffer',
+            fields=[
+                ('fingerprint', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSnapshot',
+            fields=[
+                ('fingerprint', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('job_id', models.CharField(max_length=64)),
+                ('status', models.CharField(max_length=32)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_id', 'created_at'], name='archivedbooking_job_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='job_snapshot',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='offer_ids',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='recommended_id',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.RunPython(intern_booking_documents, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='booking',
+            name='hotels',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='job_data',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='recommended',
+        ),
+    ]
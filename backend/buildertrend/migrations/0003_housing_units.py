@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildertrend', '0002_intern_offers_and_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HousingUnit',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('address', models.CharField(blank=True, default='', max_length=300)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('capacity', models.PositiveIntegerField(default=1)),
+                ('amenities', models.JSONField(blank=True, default=list)),
+                ('image_url', models.CharField(blank=True, default='', max_length=500)),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='housingunit_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildertrend', '0003_housing_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncedjob',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildertrend', '0004_syncedjob_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='approved_by',
+            field=models.CharField(blank=True, default='', max_length=80),
+        ),
+    ]
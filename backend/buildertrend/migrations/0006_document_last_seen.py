@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildertrend', '0005_booking_approved_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hoteloffer',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='jobsnapshot',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
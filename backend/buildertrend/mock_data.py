@@ -0,0 +1,108 @@
+"""
+Mock OTA hotel data for development and offline load testing
+"""
+
+
+def generate_mock_hotels(location):
+    """
+    Generate mock hotel results from different OTA sources.
+    """
+    # normalize_address() gives '' for a missing city or state
+    city = location.get('city') or 'Unknown City'
+    state = location.get('state') or ''
+    
+    base_hotels = [
+        {
+            'id': 'hotel-001',
+            'name': 'SurfaceFlow Internal Housing',
+            'source': 'Internal Housing',
+            'source_icon': '🏠',
+            'address': f'123 Company Blvd, {city}, {state}',
+            'price_per_night': 0,
+            'total_price': 0,
+            'rating': 5.0,
+            'amenities': ['Free WiFi', 'Kitchen', 'Washer/Dryer', 'Free Parking'],
+            'availability': True,
+            'is_internal': True,
+            'savings': 175.00,
+            'image_url': 'https://images.unsplash.com/photo-1502672260266-1c1ef2d93688?w=400'
+        },
+        {
+            'id': 'hotel-002',
+            'name': f'Comfort Suites {city}',
+            'source': 'Airbnb',
+            'source_icon': '🏡',
+            'address': f'456 Main St, {city}, {state}',
+            'price_per_night': 89.00,
+            'total_price': 267.00,
+            'rating': 4.5,
+            'amenities': ['Free WiFi', 'Pool', 'Breakfast Included'],
+            'availability': True,
+            'is_internal': False,
+            'savings': 45.00,
+            'image_url': 'https://images.unsplash.com/photo-1566073771259-6a8506099945?w=400'
+        },
+        {
+            'id': 'hotel-003',
+            'name': f'Hampton Inn {city} Downtown',
+            'source': 'Expedia',
+            'source_icon': '✈️',
+            'address': f'789 Commerce Way, {city}, {state}',
+            'price_per_night': 125.00,
+            'total_price': 375.00,
+            'rating': 4.3,
+            'amenities': ['Free WiFi', 'Gym', 'Business Center', 'Breakfast'],
+            'availability': True,
+            'is_internal': False,
+            'savings': 28.00,
+            'image_url': 'https://images.unsplash.com/photo-1551882547-ff40c63fe5fa?w=400'
+        },
+        {
+            'id': 'hotel-004',
+            'name': f'Holiday Inn Express {city}',
+            'source': 'Kayak',
+            'source_icon': '🛶',
+            'address': f'321 Airport Rd, {city}, {state}',
+            'price_per_night': 109.00,
+            'total_price': 327.00,
+            'rating': 4.1,
+            'amenities': ['Free WiFi', 'Pool', 'Breakfast', 'Shuttle'],
+            'availability': True,
+            'is_internal': False,
+            'savings': 35.00,
+            'image_url': 'https://images.unsplash.com/photo-1564501049412-61c2a3083791?w=400'
+        },
+        {
+            'id': 'hotel-005',
+            'name': f'Marriott {city} Waterfront',
+            'source': 'Booking.com',
+            'source_icon': '🅱️',
+            'address': f'555 Harbor Dr, {city}, {state}',
+            'price_per_night': 189.00,
+            'total_price': 567.00,
+            'rating': 4.7,
+            'amenities': ['Free WiFi', 'Pool', 'Spa', 'Restaurant', 'Bar'],
+            'availability': True,
+            'is_internal': False,
+            'savings': 0,
+            'image_url': 'https://images.unsplash.com/photo-1542314831-068cd1dbfeeb?w=400'
+        },
+        {
+            'id': 'hotel-006',
+            'name': f'Best Western Plus {city}',
+            'source': 'Hotels.com',
+            'source_icon': '🏨',
+            'address': f'888 Industrial Pkwy, {city}, {state}',
+            'price_per_night': 95.00,
+            'total_price': 285.00,
+            'rating': 4.0,
+            'amenities': ['Free WiFi', 'Pool', 'Pet Friendly', 'Breakfast'],
+            'availability': True,
+            'is_internal': False,
+            'savings': 40.00,
+            'image_url': 'https://images.unsplash.com/photo-1520250497591-112f2f40a3f4?w=400'
+        }
+    ]
+    
+    # Sort by price (internal housing first as it's free)
+    return sorted(base_hotels, key=lambda x: x['total_price'])
@@ -1,3 +1,140 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class SyncedJob(models.Model):
+    """BuilderTrend job data synced from the Chrome extension or API"""
+    job_id = models.CharField(max_length=64, primary_key=True)
+    data = models.JSONField(default=dict)
+    source = models.CharField(max_length=64, default='api')
+    # Fingerprint of data; unchanged re-syncs are skipped and it doubles as the ETag
+    content_hash = models.CharField(max_length=40, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    synced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'job_id'], name='syncedjob_created_idx'),
+        ]
+
+    def to_dict(self):
+        return {
+            **self.data,
+            'jobId': self.data.get('jobId', self.job_id),
+            'source': self.source,
+            'created_at': self.created_at.isoformat(),
+            'synced_at': self.synced_at.isoformat(),
+        }
+
+
+class HotelOffer(models.Model):
+    """
+    A hotel offer stored once, keyed by a fingerprint of its content.
+    Bookings reference offers by fingerprint instead of keeping their own copy.
+    """
+    fingerprint = models.CharField(max_length=40, primary_key=True)
+    data = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # Bumped whenever a booking interns it; prune_documents only drops long-unseen rows
+    last_seen = models.DateTimeField(default=timezone.now)
+
+
+class JobSnapshot(models.Model):
+    """The job_data a booking was searched with, stored once per distinct payload"""
+    fingerprint = models.CharField(max_length=40, primary_key=True)
+    data = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # Bumped whenever a booking interns it; prune_documents only drops long-unseen rows
+    last_seen = models.DateTimeField(default=timezone.now)
+
+
+class Booking(models.Model):
+    """Hotel booking job created by a hotel search"""
+    id = models.CharField(max_length=32, primary_key=True)
+    job_id = models.CharField(max_length=64)
+    job_snapshot = models.CharField(max_length=40, blank=True, default='')
+    offer_ids = models.JSONField(default=list)
+    recommended_id = models.CharField(max_length=40, null=True, blank=True)
+    status = models.CharField(max_length=32, default='pending_approval')
+    created_at = models.DateTimeField(default=timezone.now)
+    approved_at = models.DateTimeField(null=True, blank=True)
+    selected_hotel_id = models.CharField(max_length=64, null=True, blank=True)
+    # 'manual', or 'auto:<policy name>' for bookings approved by HOTEL_AUTO_APPROVAL
+    approved_by = models.CharField(max_length=80, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job_id', 'created_at'], name='booking_job_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='booking_status_idx'),
+            models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+        ]
+
+    def to_dict(self, documents):
+        """Build the API shape, resolving fingerprints through documents (fingerprint -> data)"""
+        booking = {
+            'id': self.id,
+            'job_id': self.job_id,
+            'job_data': documents.get(self.job_snapshot, {}),
+            'hotels': [documents[f] for f in self.offer_ids if f in documents],
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'recommended': documents.get(self.recommended_id) if self.recommended_id else None,
+        }
+        if self.approved_at:
+            booking['approved_at'] = self.approved_at.isoformat()
+        if self.selected_hotel_id is not None:
+            booking['selected_hotel_id'] = self.selected_hotel_id
+        if self.approved_by:
+            booking['approved_by'] = self.approved_by
+        return booking
+
+
+class ArchivedBooking(models.Model):
+    """
+    Locator for a booking moved to the on-disk archive.
+    The full booking lives in the archive file; this row keeps job_id lookups indexed.
+    """
+    id = models.CharField(max_length=32, primary_key=True)
+    job_id = models.CharField(max_length=64)
+    status = models.CharField(max_length=32)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job_id', 'created_at'], name='archivedbooking_job_idx'),
+        ]
+
+
+class HousingUnit(models.Model):
+    """A company-owned housing unit that crews can stay in for free"""
+    id = models.CharField(max_length=32, primary_key=True)
+    name = models.CharField(max_length=200)
+    address = models.CharField(max_length=300, blank=True, default='')
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    capacity = models.PositiveIntegerField(default=1)
+    amenities = models.JSONField(default=list, blank=True)
+    image_url = models.CharField(max_length=500, blank=True, default='')
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='housingunit_created_idx'),
+        ]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'address': self.address,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'capacity': self.capacity,
+            'amenities': self.amenities,
+            'image_url': self.image_url,
+            'active': self.active,
+            'created_at': self.created_at.isoformat(),
+        }
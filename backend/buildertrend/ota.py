@@ -0,0 +1,340 @@
+"""
+OTA Source Adapters and Concurrent Fan-out Search
+
+Each hotel source (Internal Housing, Airbnb, Expedia, ...) is a SourceAdapter.
+search_all_sources() queries every registered adapter at once, gives each
+source its own deadline and returns whatever came back in time along with
+per-source timing. Each source runs on its own small thread pool, so a slow
+source can only tie up its own threads: while a call that missed its deadline
+is still running, or all of its threads are busy, the source is skipped and
+reported as 'busy' instead of queueing more work behind it.
+
+cached_search() puts a TTL/LRU cache with single-flight coalescing in front of
+the fan-out so identical searches within the TTL share one upstream call.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from django.conf import settings
+from django.db import close_old_connections
+import random
+import threading
+import time
+
+from api.cache import CoalescingCache
+from .housing import HOUSING_INVENTORY, HOUSING_SETTINGS, location_coordinates
+from .mock_data import generate_mock_hotels
+
+
+OTA_SETTINGS = getattr(settings, 'OTA_SEARCH', {})
+
+DEFAULT_SOURCE_TIMEOUT = OTA_SETTINGS.get('SOURCE_TIMEOUT', 5.0)
+DEFAULT_SOURCE_CONCURRENCY = OTA_SETTINGS.get('SOURCE_CONCURRENCY', 16)
+
+CACHE_SETTINGS = getattr(settings, 'HOTEL_SEARCH_CACHE', {})
+
+HOTEL_SEARCH_CACHE = CoalescingCache(
+    ttl=CACHE_SETTINGS.get('TTL', 600),
+    max_entries=CACHE_SETTINGS.get('MAX_ENTRIES', 1000),
+    max_bytes=CACHE_SETTINGS.get('MAX_BYTES', 32 * 1024 * 1024)
+)
+
+
+class SourceAdapter:
+    """
+    Base class for a hotel source.
+    Subclasses implement fetch() and return a list of offer dicts.
+    """
+    name = None
+    icon = ''
+
+    def __init__(self, timeout=None, max_concurrency=None):
+        self.timeout = timeout if timeout is not None else DEFAULT_SOURCE_TIMEOUT
+        self.max_concurrency = max(1, max_concurrency or DEFAULT_SOURCE_CONCURRENCY)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stalled = set()   # futures that missed their deadline and are still running
+
+    def fetch(self, location, check_in=None, check_out=None, guests=None):
+        raise NotImplementedError
+
+    def search(self, location, check_in=None, check_out=None, guests=None):
+        """Run fetch() and return (offers, elapsed_ms)"""
+        started = time.perf_counter()
+        offers = self.fetch(location, check_in=check_in, check_out=check_out, guests=guests)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return offers, elapsed_ms
+
+    def submit(self, location, check_in=None, check_out=None, guests=None):
+        """
+        Start search() on this source's own pool and return its future, or None
+        when every thread is busy or an earlier call that timed out is still running.
+        """
+        with self._lock:
+            if self._stalled or self._in_flight >= self.max_concurrency:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix=f'ota-{self.name}'
+                )
+            self._in_flight += 1
+        future = self._executor.submit(self.search, location, check_in, check_out, guests)
+        future.add_done_callback(self._finished)
+        return future
+
+    def mark_stalled(self, future):
+        """Record that future missed its deadline; the source takes no new calls until it returns"""
+        with self._lock:
+            if not future.done():
+                self._stalled.add(future)
+
+    def _finished(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self._stalled.discard(future)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'source': self.name,
+                'in_flight': self._in_flight,
+                'stalled': len(self._stalled),
+                'max_concurrency': self.max_concurrency,
+            }
+
+
+class StubSourceAdapter(SourceAdapter):
+    """
+    Local stand-in for a real OTA API.
+    Serves the mock offers for its source after a configurable latency
+    (seconds, or a (min, max) range) so the fan-out can be load-tested offline.
+    Its offers are marked stub=True so they are never auto-approved.
+    """
+
+    def __init__(self, name, icon='', latency=0.0, failure_rate=0.0, timeout=None, max_concurrency=None):
+        super().__init__(timeout=timeout, max_concurrency=max_concurrency)
+        self.name = name
+        self.icon = icon
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def _sleep(self):
+        latency = self.latency
+        if isinstance(latency, (list, tuple)):
+            latency = random.uniform(latency[0], latency[1])
+        if latency:
+            time.sleep(latency)
+
+    def fetch(self, location, check_in=None, check_out=None, guests=None):
+        self._sleep()
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError(f'{self.name} stub failure')
+        return [{**h, 'stub': True} for h in generate_mock_hotels(location) if h['source'] == self.name]
+
+
+class InternalHousingAdapter(SourceAdapter):
+    """
+    Company housing units near the job site, from HOUSING_INVENTORY.
+    Until any units are stored it defers to a fallback adapter (the stub),
+    so development setups keep showing the sample internal offer.
+    """
+    name = 'Internal Housing'
+    icon = '🏠'
+
+    def __init__(self, fallback=None, timeout=None, max_concurrency=None):
+        super().__init__(timeout=timeout, max_concurrency=max_concurrency)
+        self.fallback = fallback
+
+    def fetch(self, location, check_in=None, check_out=None, guests=None):
+        try:
+            if not len(HOUSING_INVENTORY):
+                if self.fallback is None:
+                    return []
+                return self.fallback.fetch(location, check_in=check_in, check_out=check_out, guests=guests)
+
+            coordinates = location_coordinates(location)
+            if coordinates is None:
+                return []
+            try:
+                min_capacity = int(guests) if guests else None
+            except (TypeError, ValueError):
+                min_capacity = None
+            matches = HOUSING_INVENTORY.nearest(
+                *coordinates,
+                k=HOUSING_SETTINGS.get('MAX_RESULTS', 3),
+                max_miles=HOUSING_SETTINGS.get('MAX_DISTANCE_MILES', 50),
+                min_capacity=min_capacity
+            )
+            nights = _nights(check_in, check_out)
+            return [self._offer(unit, distance, nights) for unit, distance in matches]
+        finally:
+            # Runs on a pool thread; don't keep its connection open between searches
+            close_old_connections()
+
+    def _offer(self, unit, distance, nights):
+        return {
+            'id': f"housing-{unit['id']}",
+            'name': unit['name'],
+            'source': self.name,
+            'source_icon': self.icon,
+            'address': unit['address'],
+            'price_per_night': 0,
+            'total_price': 0,
+            'rating': 5.0,
+            'amenities': unit['amenities'],
+            'availability': True,
+            'is_internal': True,
+            'savings': round(HOUSING_SETTINGS.get('NIGHTLY_SAVINGS', 175.0) * nights, 2),
+            'distance_miles': round(distance, 1),
+            'capacity': unit['capacity'],
+            'image_url': unit['image_url']
+        }
+
+
+def _nights(check_in, check_out):
+    try:
+        nights = (datetime.fromisoformat(str(check_out)) - datetime.fromisoformat(str(check_in))).days
+    except (TypeError, ValueError):
+        return 1
+    return max(nights, 1)
+
+
+# Registry of active adapters, in display order
+SOURCE_ADAPTERS = []
+
+
+def register_source(adapter):
+    """Register a source adapter, replacing any existing adapter with the same name"""
+    SOURCE_ADAPTERS[:] = [a for a in SOURCE_ADAPTERS if a.name != adapter.name]
+    SOURCE_ADAPTERS.append(adapter)
+    return adapter
+
+
+def get_source_names():
+    return [a.name for a in SOURCE_ADAPTERS]
+
+
+def source_stats():
+    return [adapter.stats() for adapter in SOURCE_ADAPTERS]
+
+
+def search_all_sources(location, check_in=None, check_out=None, guests=None, adapters=None):
+    """
+    Query all sources concurrently.
+
+    Every source gets its own deadline measured from the same start time. A source
+    that misses its deadline, raises or is skipped as busy is reported as
+    'timeout' / 'error' / 'busy' and the search returns the offers from the
+    others (partial=True).
+    """
+    if not isinstance(location, dict):
+        location = {}
+    adapters = SOURCE_ADAPTERS if adapters is None else adapters
+
+    started = time.perf_counter()
+    futures = [(adapter, adapter.submit(location, check_in, check_out, guests)) for adapter in adapters]
+
+    hotels = []
+    timings = []
+    for adapter, future in futures:
+        remaining = adapter.timeout - (time.perf_counter() - started)
+        timing = {'source': adapter.name, 'timeout_ms': round(adapter.timeout * 1000)}
+        if future is None:
+            timing.update({'status': 'busy', 'elapsed_ms': 0.0, 'count': 0})
+            timings.append(timing)
+            continue
+        try:
+            offers, elapsed_ms = future.result(timeout=max(remaining, 0))
+            hotels.extend(offers)
+            timing.update({'status': 'ok', 'elapsed_ms': round(elapsed_ms, 1), 'count': len(offers)})
+        except FutureTimeoutError:
+            # Leave the call running on the source's pool; its result is discarded
+            adapter.mark_stalled(future)
+            timing.update({
+                'status': 'timeout',
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+                'count': 0
+            })
+        except Exception as e:
+            timing.update({
+                'status': 'error',
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+                'count': 0,
+                'error': str(e)
+            })
+        timings.append(timing)
+
+    return {
+        'hotels': sorted(hotels, key=lambda x: x['total_price']),
+        'source_timings': timings,
+        'partial': any(t['status'] != 'ok' for t in timings),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    return ' '.join(str(value).lower().replace(',', ' ').split())
+
+
+def search_key(location, check_in=None, check_out=None, guests=None):
+    """Cache key for a search: normalized location, stay dates and guest count"""
+    if not isinstance(location, dict):
+        location = {'formatted': location}
+    place = (
+        _normalize(location.get('city')),
+        _normalize(location.get('state')),
+        _normalize(location.get('zip'))
+    )
+    if not any(place):
+        place = (_normalize(location.get('formatted')), '', '')
+    # Internal housing results depend on the exact site, not just the city
+    coordinates = location_coordinates(location)
+    if coordinates is not None:
+        place += tuple(round(c, 3) for c in coordinates)
+    return place + (_normalize(check_in), _normalize(check_out), _normalize(guests))
+
+
+def cached_search(location, check_in=None, check_out=None, guests=None):
+    """
+    search_all_sources() behind HOTEL_SEARCH_CACHE.
+    Returns the search result with a 'cache' field of 'hit', 'miss' or 'coalesced'.
+    Partial results are returned but not cached.
+    """
+    key = search_key(location, check_in, check_out, guests)
+    result, outcome = HOTEL_SEARCH_CACHE.get_or_compute(
+        key,
+        lambda: search_all_sources(location, check_in=check_in, check_out=check_out, guests=guests),
+        should_cache=lambda r: not r['partial']
+    )
+    return {**result, 'cache': outcome}
+
+
+def _register_sources():
+    latency = OTA_SETTINGS.get('STUB_LATENCY', {})
+    timeouts = OTA_SETTINGS.get('SOURCE_TIMEOUTS', {})
+    concurrency = OTA_SETTINGS.get('SOURCE_CONCURRENCIES', {})
+    for name, icon in [
+        ('Internal Housing', '🏠'),
+        ('Airbnb', '🏡'),
+        ('Expedia', '✈️'),
+        ('Kayak', '🛶'),
+        ('Booking.com', '🅱️'),
+        ('Hotels.com', '🏨'),
+    ]:
+        adapter = StubSourceAdapter(
+            name,
+            icon=icon,
+            latency=latency.get(name, 0.0),
+            timeout=timeouts.get(name),
+            max_concurrency=concurrency.get(name)
+        )
+        if name == InternalHousingAdapter.name:
+            adapter = InternalHousingAdapter(
+                fallback=adapter, timeout=timeouts.get(name), max_concurrency=concurrency.get(name)
+            )
+        register_source(adapter)
+
+
+_register_sources()
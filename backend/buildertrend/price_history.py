@@ -0,0 +1,333 @@
+"""
+OTA Price History
+
+Every fresh search appends the nightly price of each offer to an append-only
+binary file per (city, source) series:
+
+    data/price_history/orlando-fl/expedia.bin    <- fixed 16-byte records
+        observed  int64    unix seconds the price was seen
+        stay      int32    check-in date, days since 1970-01-01
+        price     float32  price per night
+
+Reads go through read-only memory maps, so range filters and rollups are a
+few NumPy passes over the mapped columns instead of a log scan:
+
+    PRICE_HISTORY.rollup('Orlando', 'FL', by='observed')
+    -> [{'date': '2026-10-01', 'min': 89.0, 'median': 125.0, 'max': 189.0, 'count': 12}, ...]
+
+    PRICE_HISTORY.advice('Orlando', 'FL', date(2026, 11, 2))
+    -> {'recommendation': 'wait', 'expected_change_pct': -8.4, ...}
+"""
+from collections import OrderedDict
+from datetime import date, datetime, timezone as dt_timezone
+from django.conf import settings
+import numpy as np
+import os
+import re
+import threading
+import time
+
+
+PRICE_HISTORY_SETTINGS = getattr(settings, 'PRICE_HISTORY', {})
+
+RECORD = np.dtype([('observed', '<i8'), ('stay', '<i4'), ('price', '<f4')])
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+
+
+def to_day(value):
+    """Days since 1970-01-01 for a date, datetime or ISO string; None if unparseable"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        return None
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day):
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def _and(mask, condition):
+    return condition if mask is None else mask & condition
+
+
+def _price_keys(days, prices):
+    return (days << 32) | prices.view(np.uint32).astype(np.int64)
+
+
+def _group_min(group, prices, size):
+    """Minimum price per group id in range(size); inf where a group has no prices"""
+    result = np.full(size, np.inf)
+    if not len(group):
+        return result
+    # One sort of (group, price bits) puts each group's cheapest price first
+    keys = np.sort(_price_keys(group, prices))
+    groups = keys >> 32
+    first = np.empty(len(keys), dtype=bool)
+    first[0] = True
+    np.not_equal(groups[1:], groups[:-1], out=first[1:])
+    result[groups[first]] = (keys[first] & 0xFFFFFFFF).astype(np.uint32).view(np.float32)
+    return result
+
+
+class PriceHistory:
+    """Append-only price series per (city, source), read through memory maps"""
+
+    def __init__(self, directory, max_open_maps=256):
+        self.directory = str(directory)
+        self.max_open_maps = max_open_maps
+        self._lock = threading.Lock()
+        self._maps = OrderedDict()  # path -> (size, array)
+
+    # ---- writing -------------------------------------------------------
+
+    def _city_dir(self, city, state):
+        return os.path.join(self.directory, slug(f'{city} {state}'))
+
+    def append(self, city, state, source, stay, prices, observed=None):
+        """Append nightly prices for one source and stay date. Returns records written."""
+        stay_day = to_day(stay)
+        prices = [float(p) for p in prices if p and p > 0]
+        if stay_day is None or not prices or not city:
+            return 0
+        records = np.empty(len(prices), dtype=RECORD)
+        records['observed'] = int(observed if observed is not None else time.time())
+        records['stay'] = stay_day
+        records['price'] = prices
+
+        city_dir = self._city_dir(city, state)
+        path = os.path.join(city_dir, f'{slug(source)}.bin')
+        with self._lock:
+            os.makedirs(city_dir, exist_ok=True)
+            with open(path, 'ab') as f:
+                f.write(records.tobytes())
+        return len(records)
+
+    def record_search(self, location, check_in, hotels, observed=None):
+        """Append every priced offer of one search result, grouped by source"""
+        by_source = {}
+        for hotel in hotels:
+            by_source.setdefault(hotel.get('source', 'unknown'), []).append(hotel.get('price_per_night'))
+        return sum(
+            self.append(location.get('city'), location.get('state'), source, check_in, prices, observed)
+            for source, prices in by_source.items()
+        )
+
+    # ---- reading -------------------------------------------------------
+
+    def _series(self, path):
+        """Records of one series file as a read-only memory map (reopened when the file grows)"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=RECORD)
+        count = size // RECORD.itemsize  # ignore a torn trailing record
+        if count == 0:
+            return np.empty(0, dtype=RECORD)
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached and cached[0] == count:
+                self._maps.move_to_end(path)
+                return cached[1]
+            array = np.memmap(path, dtype=RECORD, mode='r', shape=(count,))
+            self._maps[path] = (count, array)
+            while len(self._maps) > self.max_open_maps:
+                self._maps.popitem(last=False)
+            return array
+
+    def sources(self, city, state):
+        city_dir = self._city_dir(city, state)
+        try:
+            return sorted(name[:-4] for name in os.listdir(city_dir) if name.endswith('.bin'))
+        except OSError:
+            return []
+
+    def _parts(self, city, state, source=None, stay_from=None, stay_to=None,
+               observed_from=None, observed_to=None):
+        """Matching records of each series (memory maps where nothing is filtered)"""
+        city_dir = self._city_dir(city, state)
+        names = [slug(source)] if source else self.sources(city, state)
+        stay_from, stay_to = to_day(stay_from), to_day(stay_to)
+        observed_from = to_day(observed_from)
+        observed_to = to_day(observed_to)
+
+        parts = []
+        for name in names:
+            records = self._series(os.path.join(city_dir, f'{name}.bin'))
+            if not len(records):
+                continue
+            mask = None
+            if stay_from is not None:
+                mask = _and(mask, records['stay'] >= stay_from)
+            if stay_to is not None:
+                mask = _and(mask, records['stay'] <= stay_to)
+            if observed_from is not None:
+                mask = _and(mask, records['observed'] >= observed_from * SECONDS_PER_DAY)
+            if observed_to is not None:
+                mask = _and(mask, records['observed'] < (observed_to + 1) * SECONDS_PER_DAY)
+            parts.append(records if mask is None else records[mask])
+        return parts
+
+    def query(self, city, state, **filters):
+        """
+        Records for a city as one structured array.
+        Filters: source, stay_from/stay_to (check-in date) and
+        observed_from/observed_to (day the price was seen), all inclusive.
+        """
+        parts = self._parts(city, state, **filters)
+        if not parts:
+            return np.empty(0, dtype=RECORD)
+        return np.concatenate(parts)
+
+    def rollup(self, city, state, by='observed', **filters):
+        """
+        Daily min/median/max/count of nightly prices.
+        by='observed' buckets by the day prices were seen (trend over time),
+        by='stay' by check-in date (price calendar).
+        """
+        parts = self._parts(city, state, **filters)
+        if not sum(len(part) for part in parts):
+            return []
+        # Sort (day, price) as one int64 key: non-negative float32 prices order
+        # the same as their bit patterns, so one sort groups days with prices ascending
+        keys = np.sort(np.concatenate([
+            _price_keys(part['observed'] // SECONDS_PER_DAY if by == 'observed' else part['stay'].astype(np.int64),
+                        part['price'])
+            for part in parts
+        ]))
+        days = keys >> 32
+        prices = (keys & 0xFFFFFFFF).astype(np.uint32).view(np.float32).astype(np.float64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+        counts = np.diff(np.append(starts, len(days)))
+        unique_days = days[starts]
+        # Prices are sorted within each day, so min/max/median are positional
+        ends = starts + counts - 1
+        lower = prices[starts + (counts - 1) // 2]
+        upper = prices[starts + counts // 2]
+        return [
+            {
+                'date': from_day(day).isoformat(),
+                'min': round(float(low), 2),
+                'median': round(float(mid), 2),
+                'max': round(float(high), 2),
+                'count': int(count),
+            }
+            for day, low, mid, high, count in zip(
+                unique_days, prices[starts], (lower + upper) / 2, prices[ends], counts
+            )
+        ]
+
+    def advice(self, city, state, stay, today=None, source=None):
+        """
+        Book now or wait for a check-in date, from how the cheapest price of
+        past stays moved after the same lead time.
+
+        For every stay date with history, the cheapest price seen around the
+        current lead time (+/- ADVICE_WINDOW_DAYS) is compared with the cheapest
+        seen closer to check-in; the median ratio across stays is the expected
+        change from waiting.
+        """
+        stay_day = to_day(stay)
+        today_day = to_day(today or datetime.now(dt_timezone.utc).date())
+        window = PRICE_HISTORY_SETTINGS.get('ADVICE_WINDOW_DAYS', 3)
+        min_stays = PRICE_HISTORY_SETTINGS.get('ADVICE_MIN_STAYS', 5)
+        threshold = PRICE_HISTORY_SETTINGS.get('WAIT_THRESHOLD', 0.05)
+        lead = stay_day - today_day
+
+        parts = self._parts(city, state, source=source)
+        observations = sum(len(part) for part in parts)
+        # Stay dates are small ints, so they index the per-stay minimums directly
+        first_stay = min((int(part['stay'].min()) for part in parts if len(part)), default=0)
+        last_stay = max((int(part['stay'].max()) for part in parts if len(part)), default=-1)
+        stays = np.arange(first_stay, last_stay + 1)
+        now_min = np.full(len(stays), np.inf)
+        later_min = np.full(len(stays), np.inf)
+        current = None
+        current_day = None
+
+        for part in parts:
+            stay_days = part['stay'].astype(np.int64)
+            observed_day = part['observed'] // SECONDS_PER_DAY
+            prices = np.ascontiguousarray(part['price'])
+            lead_days = stay_days - observed_day
+
+            # Latest cheapest price for the requested stay itself
+            this_stay = stay_days == stay_day
+            if this_stay.any():
+                latest = int(observed_day[this_stay].max())
+                cheapest = float(prices[this_stay & (observed_day == latest)].min())
+                if current_day is None or latest > current_day:
+                    current, current_day = cheapest, latest
+                elif latest == current_day:
+                    current = min(current, cheapest)
+
+            group = stay_days - first_stay
+            in_window = np.abs(lead_days - lead) <= window
+            later = (lead_days >= 0) & (lead_days < lead - window)
+            np.minimum(now_min, _group_min(group[in_window], prices[in_window], len(stays)), out=now_min)
+            np.minimum(later_min, _group_min(group[later], prices[later], len(stays)), out=later_min)
+        both = np.isfinite(now_min) & np.isfinite(later_min) & (stays != stay_day)
+        samples = int(both.sum())
+
+        result = {
+            'stay_date': from_day(stay_day).isoformat(),
+            'lead_days': int(lead),
+            'current_min_price': round(current, 2) if current is not None else None,
+            'stays_compared': samples,
+            'observations': int(observations),
+        }
+        if lead <= window or samples < min_stays:
+            return {
+                **result,
+                'recommendation': 'book_now',
+                'expected_change_pct': None,
+                'confidence': 'low',
+                'reason': 'Check-in is close' if lead <= window else 'Not enough price history yet',
+            }
+
+        ratios = later_min[both] / now_min[both]
+        change = float(np.median(ratios)) - 1
+        share_lower = float((ratios < 1 - threshold).mean())
+        return {
+            **result,
+            'recommendation': 'wait' if change < -threshold else 'book_now',
+            'expected_change_pct': round(change * 100, 1),
+            'share_of_stays_cheaper_later': round(share_lower, 2),
+            'confidence': 'high' if samples >= 4 * min_stays else 'medium',
+            'reason': (
+                f'Cheapest prices for past stays were {abs(change) * 100:.1f}% '
+                f'{"lower" if change < 0 else "higher"} closer to check-in'
+            ),
+        }
+
+    def stats(self):
+        series = 0
+        total_bytes = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.bin'):
+                    series += 1
+                    total_bytes += os.path.getsize(os.path.join(root, name))
+        return {
+            'series': series,
+            'records': total_bytes // RECORD.itemsize,
+            'bytes': total_bytes,
+            'open_maps': len(self._maps),
+        }
+
+
+PRICE_HISTORY = PriceHistory(
+    PRICE_HISTORY_SETTINGS.get('DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'price_history')),
+    max_open_maps=PRICE_HISTORY_SETTINGS.get('MAX_OPEN_MAPS', 256)
+)
@@ -0,0 +1,509 @@
+"""
+Booking and synced job stores backed by the database.
+
+Every gunicorn worker sees the same bookings and jobs. The hot lookups are
+served by the model indexes:
+    booking id              -> primary key
+    job_id                  -> booking_job_idx (job_id, created_at)
+    status, created order   -> booking_status_idx (status, created_at, id)
+    created order           -> booking_created_idx (created_at, id)
+
+Bookings stay compact: hotel offers and job_data are interned (stored once per
+distinct content and referenced by fingerprint), and the in-process copy of
+interned documents lives in a memory-bounded LRU. Finished bookings older than
+FINISHED_TTL_DAYS, anything older than PENDING_TTL_DAYS, and the oldest bookings
+beyond MAX_HOT_BOOKINGS are moved to the on-disk BookingArchive by sweep().
+Reads cover the archive transparently: get() and latest_for_job() fall back to
+it, and count(), list() and page() merge the ArchivedBooking locators into the
+same (created_at, id) order. update() restores an archived booking to the hot
+table before changing it.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+import hashlib
+import json
+import os
+import threading
+import time
+
+from api.cache import TTLCache
+from api.events import EVENT_HUB
+from api.pagination import encode_cursor, keyset_queryset_page
+from .archive import BookingArchive
+from .models import ArchivedBooking, Booking, HotelOffer, JobSnapshot, SyncedJob
+
+
+STORE_SETTINGS = getattr(settings, 'BOOKING_STORE', {})
+
+FINISHED_STATUSES = ('approved', 'cancelled', 'expired')
+
+
+def booking_event(booking):
+    """Compact booking state pushed to SSE subscribers (no offer list)"""
+    if not booking:
+        return None
+    recommended = booking.get('recommended') or {}
+    return {
+        'booking_job_id': booking['id'],
+        'job_id': booking.get('job_id'),
+        'status': booking.get('status'),
+        'created_at': booking.get('created_at'),
+        'approved_at': booking.get('approved_at'),
+        'selected_hotel_id': booking.get('selected_hotel_id'),
+        'approved_by': booking.get('approved_by'),
+        'recommended': {k: recommended.get(k) for k in ('id', 'name', 'total_price')} if recommended else None,
+    }
+
+
+def publish_booking(booking):
+    transaction.on_commit(lambda: EVENT_HUB.publish('booking', booking.get('job_id'), booking_event(booking)))
+
+
+class PreconditionFailed(Exception):
+    """A conditional write's If-Match didn't match the stored content hash"""
+
+
+def fingerprint(data):
+    """Content hash used as the interned document key"""
+    raw = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class DocumentInterner:
+    """
+    Stores JSON documents once per distinct content.
+
+    intern() returns fingerprints and writes unseen documents in one bulk insert;
+    resolve() maps fingerprints back to documents from a shared, memory-bounded
+    cache so every booking that references an offer shares one dict.
+
+    A document interned within the last `ttl` seconds skips the database; any
+    other is inserted (or re-inserted, if pruned) and has last_seen bumped, so
+    a row is always at most `ttl` stale while bookings still reference it.
+    """
+
+    def __init__(self, model, max_bytes, ttl):
+        self.model = model
+        self.ttl = ttl
+        self.cache = TTLCache(ttl=ttl, max_entries=1_000_000, max_bytes=max_bytes)
+        self.seen = TTLCache(ttl=ttl, max_entries=1_000_000)
+
+    def intern(self, documents):
+        fingerprints = []
+        new = {}
+        for document in documents:
+            key = fingerprint(document)
+            fingerprints.append(key)
+            if key not in new and self.seen.get(key) is None:
+                new[key] = document
+        if new:
+            now = timezone.now()
+            self.model.objects.bulk_create(
+                [self.model(fingerprint=k, data=d, created_at=now, last_seen=now) for k, d in new.items()],
+                ignore_conflicts=True
+            )
+            self.model.objects.filter(pk__in=list(new), last_seen__lt=now).update(last_seen=now)
+            for key, document in new.items():
+                self.cache.set(key, document)
+                self.seen.set(key, True)
+        return fingerprints
+
+    def resolve(self, fingerprints):
+        found = {}
+        missing = []
+        for key in set(fingerprints):
+            if not key:
+                continue
+            document = self.cache.get(key)
+            if document is None:
+                missing.append(key)
+            else:
+                found[key] = document
+        if missing:
+            for key, row in self.model.objects.in_bulk(missing).items():
+                found[key] = row.data
+                self.cache.set(key, row.data)
+        return found
+
+
+class BookingStore:
+    """
+    Booking access used by the hotel booking views.
+    Bookings go in and come out as dicts in the API response shape.
+    """
+
+    def __init__(self):
+        cache_bytes = STORE_SETTINGS.get('CACHE_MAX_BYTES', 16 * 1024 * 1024)
+        cache_ttl = STORE_SETTINGS.get('CACHE_TTL', 3600)
+        self.offers = DocumentInterner(HotelOffer, max_bytes=cache_bytes, ttl=cache_ttl)
+        self.snapshots = DocumentInterner(JobSnapshot, max_bytes=cache_bytes // 4, ttl=cache_ttl)
+        self.archive = BookingArchive(STORE_SETTINGS.get(
+            'ARCHIVE_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'archive', 'bookings')
+        ))
+        self.finished_ttl = timedelta(days=STORE_SETTINGS.get('FINISHED_TTL_DAYS', 7))
+        self.pending_ttl = timedelta(days=STORE_SETTINGS.get('PENDING_TTL_DAYS', 30))
+        self.max_hot = STORE_SETTINGS.get('MAX_HOT_BOOKINGS', 50000)
+        self.sweep_interval = STORE_SETTINGS.get('SWEEP_INTERVAL', 300)
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+    def __contains__(self, booking_id):
+        return (
+            Booking.objects.filter(pk=booking_id).exists()
+            or ArchivedBooking.objects.filter(pk=booking_id).exists()
+        )
+
+    def __len__(self):
+        return Booking.objects.count()
+
+    def get(self, booking_id, default=None):
+        booking = Booking.objects.filter(pk=booking_id).first()
+        if booking:
+            return self._serialize([booking])[0]
+        if ArchivedBooking.objects.filter(pk=booking_id).exists():
+            return self.archive.read(booking_id) or default
+        return default
+
+    def _serialize(self, bookings):
+        offer_ids = [f for b in bookings for f in b.offer_ids]
+        offer_ids += [b.recommended_id for b in bookings if b.recommended_id]
+        documents = self.offers.resolve(offer_ids)
+        documents.update(self.snapshots.resolve([b.job_snapshot for b in bookings]))
+        return [b.to_dict(documents) for b in bookings]
+
+    def _to_model(self, booking):
+        hotels = booking.get('hotels', [])
+        recommended = booking.get('recommended')
+        fingerprints = self.offers.intern(hotels + ([recommended] if recommended else []))
+        return Booking(
+            id=booking['id'],
+            job_id=booking.get('job_id', 'unknown'),
+            job_snapshot=self.snapshots.intern([booking.get('job_data', {})])[0],
+            offer_ids=fingerprints[:len(hotels)],
+            recommended_id=fingerprints[-1] if recommended else None,
+            status=booking.get('status', 'pending_approval'),
+            created_at=booking.get('created_at') or timezone.now(),
+            approved_at=booking.get('approved_at'),
+            selected_hotel_id=booking.get('selected_hotel_id'),
+            approved_by=booking.get('approved_by', '')
+        )
+
+    def add(self, booking):
+        model = self._to_model(booking)
+        model.save(force_insert=True)
+        self.maybe_sweep()
+        booking = self._serialize([model])[0]
+        publish_booking(booking)
+        return booking
+
+    def update(self, booking_id, expected_status=None, **fields):
+        """
+        Update fields of a booking; returns the updated booking or None.
+        With expected_status, only a booking still in that status is updated.
+        """
+        with transaction.atomic():
+            self._restore(booking_id)
+            queryset = Booking.objects.filter(pk=booking_id)
+            if expected_status is not None:
+                queryset = queryset.filter(status=expected_status)
+            updated = queryset.update(**fields)
+            if not updated:
+                return None
+            booking = self._serialize([Booking.objects.get(pk=booking_id)])[0]
+            publish_booking(booking)
+            return booking
+
+    def latest_for_job(self, job_id):
+        booking = Booking.objects.filter(job_id=job_id).order_by('-created_at', '-id').first()
+        archived = ArchivedBooking.objects.filter(job_id=job_id).order_by('-created_at', '-id').first()
+        if archived and (not booking or (archived.created_at, archived.id) > (booking.created_at, booking.id)):
+            return self.archive.read(archived.id)
+        return self._serialize([booking])[0] if booking else None
+
+    def _restore(self, booking_id):
+        """Move an archived booking back to the hot table (inside a transaction); True if restored"""
+        if Booking.objects.filter(pk=booking_id).exists():
+            return False
+        locator = ArchivedBooking.objects.select_for_update().filter(pk=booking_id).first()
+        if locator is None:
+            return False
+        booking = self.archive.read(booking_id)
+        if booking is None:
+            return False
+        self._to_model(booking).save(force_insert=True)
+        locator.delete()
+        return True
+
+    def _filtered(self, status=None, model=Booking):
+        queryset = model.objects.all()
+        if status is not None:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+    def _resolve(self, rows):
+        """Bookings for a mix of hot Booking rows and ArchivedBooking locators, in the given order"""
+        hot = {b['id']: b for b in self._serialize([r for r in rows if isinstance(r, Booking)])}
+        bookings = []
+        for row in rows:
+            booking = hot.get(row.pk) if isinstance(row, Booking) else self.archive.read(row.pk)
+            if booking is not None:
+                bookings.append(booking)
+        return bookings
+
+    def count(self, status=None, archived=True):
+        total = self._filtered(status).count()
+        if archived:
+            total += self._filtered(status, ArchivedBooking).count()
+        return total
+
+    def list(self, status=None, start=0, count=None, archived=True):
+        """
+        Bookings in (created_at, id) order, optionally filtered by status and sliced.
+        With archived, archived bookings are merged in.
+        """
+        end = None if count is None else start + count
+        hot = self._filtered(status).order_by('created_at', 'id')
+        if not archived:
+            return self._serialize(list(hot[start:end]))
+        # The slice can only come from the first `end` rows of each table
+        cold = self._filtered(status, ArchivedBooking).order_by('created_at', 'id')
+        rows = list(hot[:end]) + list(cold[:end])
+        rows.sort(key=lambda row: (row.created_at, row.pk))
+        return self._resolve(rows[start:end])
+
+    def page(self, status=None, cursor=None, limit=50, archived=True):
+        """
+        Keyset page of bookings in (created_at, id) order starting after cursor.
+        With archived, archived bookings are merged in. Returns (bookings, next_cursor).
+        """
+        rows, next_cursor = keyset_queryset_page(self._filtered(status), cursor, limit)
+        if not archived:
+            return self._serialize(rows), next_cursor
+        cold, cold_cursor = keyset_queryset_page(self._filtered(status, ArchivedBooking), cursor, limit)
+        if cold:
+            rows = sorted(rows + cold, key=lambda row: (row.created_at, row.pk))
+            more = next_cursor or cold_cursor or len(rows) > limit
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last.created_at.isoformat(), last.pk]) if more else None
+        return self._resolve(rows), next_cursor
+
+    def maybe_sweep(self):
+        """Run sweep() in the background if SWEEP_INTERVAL has passed since the last one"""
+        if not self.sweep_interval or time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        self._last_sweep = time.monotonic()
+
+        def run():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"❌ Booking archive sweep failed: {e}")
+            finally:
+                close_old_connections()
+                self._sweep_lock.release()
+
+        threading.Thread(target=run, name='booking-archive-sweep', daemon=True).start()
+
+    def sweep(self, now=None, batch_size=500):
+        """
+        Move cold bookings to the on-disk archive.
+        Returns the number of bookings archived.
+        """
+        now = now or timezone.now()
+        expired = (
+            Booking.objects.filter(status__in=FINISHED_STATUSES, created_at__lt=now - self.finished_ttl)
+            | Booking.objects.filter(created_at__lt=now - self.pending_ttl)
+        )
+        archived = self._archive_queryset(expired, batch_size)
+
+        overflow = Booking.objects.count() - self.max_hot
+        if overflow > 0:
+            # Over the ceiling: finished bookings go first, then the oldest pending ones
+            finished = Booking.objects.filter(status__in=FINISHED_STATUSES).order_by('created_at', 'id')
+            archived += self._archive_queryset(finished, batch_size, limit=overflow)
+            overflow = Booking.objects.count() - self.max_hot
+            if overflow > 0:
+                oldest = Booking.objects.order_by('created_at', 'id')
+                archived += self._archive_queryset(oldest, batch_size, limit=overflow)
+
+        if archived:
+            print(f"🗄️  Archived {archived} bookings to {self.archive.root}")
+        return archived
+
+    def _archive_queryset(self, queryset, batch_size, limit=None):
+        archived = 0
+        while limit is None or archived < limit:
+            size = batch_size if limit is None else min(batch_size, limit - archived)
+            with transaction.atomic():
+                rows = list(queryset.select_for_update().order_by('created_at', 'id')[:size])
+                if not rows:
+                    break
+                ids = [b.id for b in rows]
+                # Same filter as the selection: a booking approved or restored meanwhile stays hot
+                queryset.filter(pk__in=ids).delete()
+                remaining = set(Booking.objects.filter(pk__in=ids).values_list('pk', flat=True))
+                rows = [b for b in rows if b.id not in remaining]
+                if not rows:
+                    break
+                for booking in self._serialize(rows):
+                    self.archive.write(booking)
+                ArchivedBooking.objects.bulk_create([
+                    ArchivedBooking(id=b.id, job_id=b.job_id, status=b.status, created_at=b.created_at)
+                    for b in rows
+                ], ignore_conflicts=True)
+            archived += len(rows)
+        return archived
+
+    def prune_documents(self, now=None):
+        """
+        Delete interned offers and job snapshots no hot booking references.
+        Archived bookings are self-contained, so they do not need them.
+        Only rows unseen for longer than the interners' TTL go: intern() may
+        hand out a fingerprint without touching the row for that long.
+        """
+        now = now or timezone.now()
+        cutoff = now - max(self.pending_ttl, timedelta(seconds=2 * max(self.offers.ttl, self.snapshots.ttl)))
+        offer_ids = set()
+        snapshot_ids = set()
+        for offers, recommended, snapshot in Booking.objects.values_list(
+            'offer_ids', 'recommended_id', 'job_snapshot'
+        ).iterator():
+            offer_ids.update(offers)
+            offer_ids.add(recommended)
+            snapshot_ids.add(snapshot)
+        deleted_offers, _ = HotelOffer.objects.filter(last_seen__lt=cutoff).exclude(pk__in=offer_ids).delete()
+        deleted_snapshots, _ = JobSnapshot.objects.filter(last_seen__lt=cutoff).exclude(pk__in=snapshot_ids).delete()
+        return deleted_offers, deleted_snapshots
+
+    def stats(self):
+        return {
+            'hot_bookings': Booking.objects.count(),
+            'archived_bookings': ArchivedBooking.objects.count(),
+            'offers': HotelOffer.objects.count(),
+            'job_snapshots': JobSnapshot.objects.count(),
+            'offer_cache': self.offers.cache.stats(),
+            'snapshot_cache': self.snapshots.cache.stats(),
+        }
+
+
+def merge_patch(target, patch):
+    """Apply an RFC 7396 JSON merge patch: null deletes a key, objects merge recursively"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+class SyncedJobStore:
+    """
+    Synced BuilderTrend jobs.
+    A job keeps its first-seen created_at across re-syncs so its position in
+    keyset pagination never moves. Each row stores a fingerprint of its data,
+    so re-syncing an unchanged job is a read instead of a write.
+    """
+
+    def __contains__(self, job_id):
+        return SyncedJob.objects.filter(pk=job_id).exists()
+
+    def __len__(self):
+        return SyncedJob.objects.count()
+
+    def get(self, job_id, default=None):
+        job = SyncedJob.objects.filter(pk=job_id).first()
+        return job.to_dict() if job else default
+
+    def get_with_hash(self, job_id):
+        """(job_dict, content_hash), or (None, None) if the job isn't synced"""
+        job = SyncedJob.objects.filter(pk=job_id).first()
+        return (job.to_dict(), job.content_hash or fingerprint(job.data)) if job else (None, None)
+
+    def upsert(self, job_id, job_data, source='api', if_match=None):
+        """
+        Store job_data unless it is unchanged.
+        Returns (job_dict, content_hash, changed); with if_match, raises
+        PreconditionFailed when the stored hash differs.
+        """
+        content_hash = fingerprint(job_data)
+        with transaction.atomic():
+            job = SyncedJob.objects.select_for_update().filter(pk=job_id).first()
+            stored_hash = (job.content_hash or fingerprint(job.data)) if job else None
+            if if_match is not None and stored_hash != if_match:
+                raise PreconditionFailed(job_id)
+            if stored_hash == content_hash:
+                return job.to_dict(), content_hash, False
+            if job is None:
+                job = SyncedJob(job_id=job_id)
+            job.data = job_data
+            job.source = source
+            job.content_hash = content_hash
+            job.synced_at = timezone.now()
+            job.save()
+        return job.to_dict(), content_hash, True
+
+    def patch(self, job_id, patch, source='api', if_match=None):
+        """
+        Apply a JSON merge patch to a synced job.
+        Returns (job_dict, content_hash, changed), or None if the job doesn't exist.
+        """
+        with transaction.atomic():
+            job = SyncedJob.objects.select_for_update().filter(pk=job_id).first()
+            if job is None:
+                return None
+            if if_match is not None and (job.content_hash or fingerprint(job.data)) != if_match:
+                raise PreconditionFailed(job_id)
+            data = merge_patch(job.data, patch)
+            data['jobId'] = job_id
+            content_hash = fingerprint(data)
+            if content_hash == job.content_hash:
+                return job.to_dict(), content_hash, False
+            job.data = data
+            job.source = source
+            job.content_hash = content_hash
+            job.synced_at = timezone.now()
+            job.save()
+        return job.to_dict(), content_hash, True
+
+    def upsert_many(self, jobs, source='api'):
+        """
+        Insert or update many (job_id, job_data) pairs in one bulk write,
+        skipping jobs whose stored fingerprint already matches.
+        Returns {'created': n, 'updated': n, 'unchanged': n}.
+        """
+        hashed = {job_id: (job_data, fingerprint(job_data)) for job_id, job_data in jobs}
+        existing = dict(
+            SyncedJob.objects.filter(pk__in=list(hashed)).values_list('job_id', 'content_hash')
+        )
+        now = timezone.now()
+        models = [
+            SyncedJob(job_id=job_id, data=job_data, source=source, content_hash=content_hash,
+                      created_at=now, synced_at=now)
+            for job_id, (job_data, content_hash) in hashed.items()
+            if existing.get(job_id) != content_hash
+        ]
+        if models:
+            SyncedJob.objects.bulk_create(
+                models,
+                update_conflicts=True,
+                unique_fields=['job_id'],
+                update_fields=['data', 'source', 'content_hash', 'synced_at']
+            )
+        created = sum(1 for m in models if m.job_id not in existing)
+        return {
+            'created': created,
+            'updated': len(models) - created,
+            'unchanged': len(hashed) - len(models),
+        }
+
+    def page(self, cursor=None, limit=50):
+        return keyset_queryset_page(SyncedJob.objects.all(), cursor, limit, serialize=SyncedJob.to_dict)
@@ -1,3 +1,774 @@
-from django.test import TestCase
+from unittest import mock
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import housing, views
+from .approval_rules import RuleSet
+from .housing import GridIndex, HousingInventory, haversine_miles
+from .models import ArchivedBooking, Booking, HotelOffer, HousingUnit, JobSnapshot, SyncedJob
+from .addresses import normalize_address
+from .management.commands.bench_ranking import make_offers
+from .mock_data import generate_mock_hotels
+from .price_history import PriceHistory
+from .ota import HOTEL_SEARCH_CACHE, SourceAdapter, cached_search, search_all_sources
+from .ranking import OfferMatrix, best_offer, pareto_mask, rank_offers
+from .store import BookingStore
+
+
+JOB_DATA = {
+    'jobId': 'job-100',
+    'jobName': 'Lakeside Remodel',
+    'address': {'street': '100 Main St', 'city': 'Orlando', 'state': 'FL', 'zip': '32801'},
+    'startDate': '2026-11-02',
+    'endDate': '2026-11-05',
+    'numberOfGuests': 2,
+}
+
+
+class IsolatedDataMixin:
+    """Point the CSV journals, their indexes, price history and the booking archive at a temp dir"""
+
+    def setUp(self):
+        super().setUp()
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        HOTEL_SEARCH_CACHE.clear()
+        searches = os.path.join(self.data_dir, 'hotel_searches.csv')
+        approvals = os.path.join(self.data_dir, 'booking_approvals.csv')
+        patches = [
+            mock.patch.object(views.HOTEL_SEARCHES_JOURNAL, 'path', searches),
+            mock.patch.object(views.BOOKING_APPROVALS_JOURNAL, 'path', approvals),
+            mock.patch.object(views, 'HOTEL_SEARCHES_INDEX', views.CSVOffsetIndex(searches)),
+            mock.patch.object(views, 'BOOKING_APPROVALS_INDEX', views.CSVOffsetIndex(approvals)),
+            mock.patch.object(views.PRICE_HISTORY, 'directory', os.path.join(self.data_dir, 'prices')),
+            mock.patch.object(views.BOOKING_JOBS.archive, 'root', os.path.join(self.data_dir, 'archive')),
+            mock.patch.object(views.BOOKING_JOBS, 'sweep_interval', 0),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # Journals write from a background thread; finish before the paths are restored
+        self.addCleanup(views.BOOKING_APPROVALS_JOURNAL.flush, 5)
+        self.addCleanup(views.HOTEL_SEARCHES_JOURNAL.flush, 5)
+
+    def search(self, job_data=None):
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/search/', {
+            'job_data': job_data or JOB_DATA
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class HousingUnitApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_and_patch_unit(self):
+        response = self.client.post('/api/v1/buildertrend/housing/units/', {
+            'id': 'unit-test', 'name': 'Orlando Lodge', 'latitude': 28.54, 'longitude': -81.38, 'capacity': 4
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['unit']['name'], 'Orlando Lodge')
+
+        response = self.client.patch('/api/v1/buildertrend/housing/units/unit-test/', {
+            'capacity': 6, 'active': False
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        unit = response.json()['unit']
+        self.assertEqual(unit['capacity'], 6)
+        self.assertFalse(unit['active'])
+
+    def test_create_rejects_missing_coordinates(self):
+        response = self.client.post('/api/v1/buildertrend/housing/units/', {'name': 'No Location'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('latitude is required', response.json()['errors'])
+
+
+class GridIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.points = {f'p{n}': (rng.uniform(25, 35), rng.uniform(-90, -80)) for n in range(300)}
+        self.index = GridIndex(cell_degrees=0.1)
+        for key, (lat, lng) in self.points.items():
+            self.index.add(key, lat, lng)
+
+    def brute_force(self, lat, lng, k, max_miles=None):
+        distances = sorted((haversine_miles(lat, lng, *point), key) for key, point in self.points.items())
+        return [(d, key) for d, key in distances if max_miles is None or d <= max_miles][:k]
+
+    def test_matches_brute_force(self):
+        # Inside the cloud, at its edge and far outside it
+        for lat, lng in [(30.0, -85.0), (25.0, -90.0), (40.7, -74.0), (28.54, -81.38)]:
+            for k in (1, 5, 20):
+                found = self.index.nearest(lat, lng, k=k)
+                expected = self.brute_force(lat, lng, k)
+                self.assertEqual([key for _, key in found], [key for _, key in expected])
+                self.assertAlmostEqual(found[-1][0], expected[-1][0])
+
+    def test_max_miles_and_predicate(self):
+        found = self.index.nearest(30.0, -85.0, k=50, max_miles=40)
+        self.assertEqual(found, self.brute_force(30.0, -85.0, 50, max_miles=40))
+        even = self.index.nearest(30.0, -85.0, k=3, predicate=lambda key: int(key[1:]) % 2 == 0)
+        self.assertTrue(all(int(key[1:]) % 2 == 0 for _, key in even))
+        self.assertEqual(len(even), 3)
+
+    def test_moved_and_removed_points(self):
+        self.index.add('p0', 45.0, -70.0)
+        self.assertEqual(self.index.nearest(45.0, -70.0)[0][1], 'p0')
+        self.index.discard('p0')
+        self.assertNotIn('p0', self.index)
+        self.assertEqual(len(self.index), 299)
+        self.assertEqual(GridIndex().nearest(30.0, -85.0), [])
+
+
+class HousingNearestApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        inventory = HousingInventory(refresh_interval=3600)
+        for target in (housing, views):
+            patch = mock.patch.object(target, 'HOUSING_INVENTORY', inventory)
+            patch.start()
+            self.addCleanup(patch.stop)
+        for unit_id, lat, lng, capacity in [
+            ('near', 28.55, -81.38, 2), ('roomy', 28.60, -81.30, 8), ('far', 30.33, -81.66, 8),
+        ]:
+            HousingUnit.objects.create(id=unit_id, name=unit_id, latitude=lat, longitude=lng, capacity=capacity)
+
+    def nearest(self, **params):
+        return self.client.get('/api/v1/buildertrend/housing/nearest/', params)
+
+    def test_nearest_units_by_distance_and_capacity(self):
+        body = self.nearest(lat=28.54, lng=-81.38, k=2).json()
+        self.assertEqual([unit['id'] for unit in body['units']], ['near', 'roomy'])
+        self.assertEqual(body['total_units'], 3)
+        self.assertLess(body['units'][0]['distance_miles'], 1)
+
+        body = self.nearest(lat=28.54, lng=-81.38, k=2, guests=4).json()
+        self.assertEqual([unit['id'] for unit in body['units']], ['roomy', 'far'])
+        body = self.nearest(lat=28.54, lng=-81.38, k=3, max_miles=20).json()
+        self.assertEqual([unit['id'] for unit in body['units']], ['near', 'roomy'])
+
+    def test_saved_units_update_the_index(self):
+        self.assertEqual(len(housing.HOUSING_INVENTORY), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            HousingUnit.objects.filter(id='near').update(active=False)
+            unit = HousingUnit.objects.get(id='near')
+            unit.save()
+        body = self.nearest(lat=28.54, lng=-81.38, k=1).json()
+        self.assertEqual(body['units'][0]['id'], 'roomy')
+
+    def test_units_posted_with_string_numbers_are_indexed(self):
+        self.assertEqual(len(housing.HOUSING_INVENTORY), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/buildertrend/housing/units/', {
+                'id': 'string', 'name': 'Downtown Lofts', 'latitude': '28.541', 'longitude': '-81.381', 'capacity': '5'
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        unit = response.json()['unit']
+        self.assertEqual((unit['latitude'], unit['capacity']), (28.541, 5))
+        body = self.nearest(lat=28.54, lng=-81.38, k=1, guests=4).json()
+        self.assertEqual(body['units'][0]['id'], 'string')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/v1/buildertrend/housing/units/string/', {
+                'latitude': '30.0', 'capacity': '2', 'active': 'false'
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(housing.HOUSING_INVENTORY), 3)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.nearest(lng=-81.38).status_code, 400)
+        self.assertEqual(self.nearest(lat='north', lng=-81.38).status_code, 400)
+
+
+class AutoApprovalTests(IsolatedDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(views.AUTO_APPROVAL_RULES.enabled)
+        result = self.search()
+        self.assertEqual(result['status'], 'pending_approval')
+        self.assertIsNone(result['auto_approval'])
+
+    def test_stub_offers_never_match(self):
+        rules = RuleSet([{'name': 'internal-housing', 'conditions': {'is_internal': True}}])
+        offer = {'id': 'housing-1', 'is_internal': True, 'price_per_night': 0}
+        self.assertEqual(rules.match(offer), 'internal-housing')
+        self.assertIsNone(rules.match({**offer, 'stub': True}))
+
+    def test_search_does_not_approve_stub_fallback(self):
+        rules = RuleSet([{'name': 'internal-housing', 'conditions': {'is_internal': True}}])
+        with mock.patch.object(views, 'AUTO_APPROVAL_RULES', rules):
+            result = self.search()
+        self.assertTrue(all(hotel.get('stub') for hotel in result['hotels']))
+        self.assertEqual(result['status'], 'pending_approval')
+        self.assertIsNone(result['auto_approval'])
+
+    def test_auto_approved_search_is_journaled_as_approved(self):
+        rules = mock.Mock(evaluate=lambda booking: (booking['recommended'], 'always'))
+        with mock.patch.object(views, 'AUTO_APPROVAL_RULES', rules):
+            result = self.search()
+        self.assertEqual(result['status'], 'approved')
+        views.HOTEL_SEARCHES_JOURNAL.flush(5)
+        with open(views.HOTEL_SEARCHES_JOURNAL.path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(row['booking_job_id'], row['status']) for row in rows],
+                         [(result['booking_job_id'], 'approved')])
+
+    def test_approving_another_hotel_is_refused(self):
+        booking_job_id = self.search()['booking_job_id']
+        first, second = [hotel['id'] for hotel in views.BOOKING_JOBS.get(booking_job_id)['hotels'][:2]]
+
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/approve/', {
+            'booking_job_id': booking_job_id, 'hotel_id': first
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], 'Booking approved successfully')
+
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/approve/', {
+            'booking_job_id': booking_job_id, 'hotel_id': first
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], 'Booking already approved')
+
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/approve/', {
+            'booking_job_id': booking_job_id, 'hotel_id': second
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['selected_hotel_id'], first)
+        self.assertEqual(views.BOOKING_JOBS.get(booking_job_id)['selected_hotel_id'], first)
+
+        views.BOOKING_APPROVALS_JOURNAL.flush(5)
+        self.assertEqual(len(views.BOOKING_APPROVALS_INDEX), 1)
+
+    def test_approve_unknown_booking(self):
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/approve/', {
+            'booking_job_id': 'missing', 'hotel_id': 'hotel-001'
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class HotelSearchCacheTests(IsolatedDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_repeat_search_is_served_from_cache(self):
+        hits = HOTEL_SEARCH_CACHE.stats()['hits']
+        first = self.search()
+        second = self.search()
+        self.assertEqual((first['cache'], second['cache']), ('miss', 'hit'))
+        self.assertEqual([h['id'] for h in first['hotels']], [h['id'] for h in second['hotels']])
+        stats = self.client.get('/api/v1/buildertrend/hotel-booking/search/cache/').json()
+        self.assertEqual(stats['cache']['hits'], hits + 1)
+
+    def test_fresh_search_records_price_history(self):
+        hotels = self.search()['hotels']
+        self.search()
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/prices/history/', {'city': 'Orlando', 'state': 'FL'})
+        body = response.json()
+        # The cached repeat adds nothing
+        self.assertEqual(body['observations'], len([h for h in hotels if h.get('price_per_night')]))
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/prices/history/', {'city': 'Orlando', 'by': 'week'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_partial_results_are_not_cached(self):
+        location = {'city': 'Austin', 'state': 'TX'}
+        with mock.patch('buildertrend.ota.search_all_sources', return_value={
+            'offers': [], 'source_timings': {}, 'partial': True, 'elapsed_ms': 1
+        }):
+            self.assertEqual(cached_search(location)['cache'], 'miss')
+            self.assertEqual(cached_search(location)['cache'], 'miss')
+        self.assertEqual(HOTEL_SEARCH_CACHE.stats()['entries'], 0)
+
+
+    def test_search_stores_job_with_its_source(self):
+        self.client.post('/api/v1/buildertrend/hotel-booking/search/', {
+            'job_data': JOB_DATA, 'source': 'portal'
+        }, format='json')
+        self.assertEqual(SyncedJob.objects.get(pk='job-100').source, 'portal')
+
+    def test_portal_search_with_other_dates_keeps_stored_job(self):
+        self.search()
+        task = mock.Mock(is_cancelled=lambda: False)
+        result = views._hotel_search_task(task, 'job-100', check_in='2026-12-01', check_out='2026-12-03')
+        job = views.SYNCED_JOBS.get('job-100')
+        self.assertEqual((job['startDate'], job['endDate'], job['source']), ('2026-11-02', '2026-11-05', 'chrome_extension'))
+        booking = views.BOOKING_JOBS.get(result['booking_job_id'])
+        self.assertEqual(booking['job_data']['startDate'], '2026-12-01')
+
+class HotelSearchRowsTests(IsolatedDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        for n in range(3):
+            self.search({**JOB_DATA, 'jobId': f'job-{n}'})
+
+    def get(self, **params):
+        return self.client.get('/api/v1/buildertrend/hotel-booking/searches/', params)
+
+    def test_cursor_pages(self):
+        body = self.get(per_page=2).json()
+        self.assertEqual([row['job_id'] for row in body['searches']], ['job-0', 'job-1'])
+        body = self.get(per_page=2, cursor=body['next_cursor']).json()
+        self.assertEqual(([row['job_id'] for row in body['searches']], body['next_cursor']), (['job-2'], None))
+
+    def test_negative_cursor_is_rejected(self):
+        response = self.get(per_page=2, cursor=views.encode_cursor({'row': -2}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid page or cursor')
+
+
+class BatchSearchTests(IsolatedDataMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def batch(self, body):
+        return self.client.post('/api/v1/buildertrend/hotel-booking/search/batch/', body, format='json')
+
+    def test_streams_one_line_per_job_then_summary(self):
+        jobs = [JOB_DATA, {**JOB_DATA, 'jobId': 'job-101'}, 'not a job']
+        # One at a time: the shared in-memory test database locks whole tables
+        response = self.batch({'jobs': jobs, 'concurrency': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        summary = lines.pop()
+        self.assertEqual(summary['done'], True)
+        self.assertEqual((summary['total'], summary['succeeded'], summary['failed']), (3, 2, 1))
+        results = {line['index']: line for line in lines}
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[1]['job_id'], 'job-101')
+        self.assertFalse(results[2]['success'])
+        for index in (0, 1):
+            self.assertIn(results[index]['booking_job_id'], views.BOOKING_JOBS)
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.batch({'jobs': []}).status_code, 400)
+        with mock.patch.dict(views.OTA_SETTINGS, {'BATCH_MAX_JOBS': 2}):
+            self.assertEqual(self.batch({'jobs': [JOB_DATA] * 3}).status_code, 400)
+
+
+class BookingStoreTests(IsolatedDataMixin, TestCase):
+    def test_offers_are_stored_once(self):
+        offers = [{'id': 'hotel-001', 'name': 'Harbor Inn'}, {'id': 'hotel-002', 'name': 'Bay Suites'}]
+        for booking_id in ('s1', 's2'):
+            views.BOOKING_JOBS.add({
+                'id': booking_id, 'job_id': 'job-1', 'hotels': offers, 'recommended': offers[0],
+                'job_data': {'jobId': 'job-1'},
+            })
+        self.assertEqual(HotelOffer.objects.count(), 2)
+        booking = views.BOOKING_JOBS.get('s2')
+        self.assertEqual(booking['hotels'], offers)
+        self.assertEqual(booking['recommended'], offers[0])
+        self.assertEqual(booking['status'], 'pending_approval')
+        self.assertEqual(views.BOOKING_JOBS.latest_for_job('job-1')['id'], 's2')
+
+    def test_conditional_update(self):
+        views.BOOKING_JOBS.add({'id': 's3', 'job_id': 'job-1', 'hotels': []})
+        self.assertIsNone(views.BOOKING_JOBS.update('s3', expected_status='approved', status='cancelled'))
+        updated = views.BOOKING_JOBS.update('s3', expected_status='pending_approval', status='cancelled')
+        self.assertEqual(updated['status'], 'cancelled')
+
+    def test_synced_job_resync_is_unchanged(self):
+        job, content_hash, changed = views.SYNCED_JOBS.upsert('job-9', {'jobId': 'job-9', 'jobName': 'Dock'})
+        self.assertTrue(changed)
+        _, same_hash, changed = views.SYNCED_JOBS.upsert('job-9', {'jobId': 'job-9', 'jobName': 'Dock'})
+        self.assertFalse(changed)
+        self.assertEqual(same_hash, content_hash)
+
+
+class PriceHistoryTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.history = PriceHistory(directory)
+
+    def observed(self, day):
+        return datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc).timestamp()
+
+    def test_query_filters_and_rollup(self):
+        stay = date(2026, 11, 2)
+        self.history.append('Orlando', 'FL', 'Expedia', stay, [100, 140, 120, 0], observed=self.observed(date(2026, 10, 1)))
+        self.history.append('Orlando', 'FL', 'Kayak', stay, [90, 110], observed=self.observed(date(2026, 10, 2)))
+        self.history.append('Orlando', 'FL', 'Kayak', date(2026, 12, 1), [300], observed=self.observed(date(2026, 10, 2)))
+
+        self.assertEqual(self.history.sources('Orlando', 'FL'), ['expedia', 'kayak'])
+        self.assertEqual(len(self.history.query('Orlando', 'FL')), 6)
+        self.assertEqual(len(self.history.query('Orlando', 'FL', source='Kayak', stay_to='2026-11-30')), 2)
+        self.assertEqual(len(self.history.query('Orlando', 'FL', observed_from='2026-10-02')), 3)
+
+        self.assertEqual(self.history.rollup('Orlando', 'FL', by='observed'), [
+            {'date': '2026-10-01', 'min': 100.0, 'median': 120.0, 'max': 140.0, 'count': 3},
+            {'date': '2026-10-02', 'min': 90.0, 'median': 110.0, 'max': 300.0, 'count': 3},
+        ])
+        by_stay = self.history.rollup('Orlando', 'FL', by='stay', source='kayak')
+        self.assertEqual([(day['date'], day['median']) for day in by_stay], [('2026-11-02', 100.0), ('2026-12-01', 300.0)])
+        self.assertEqual(self.history.rollup('Tampa', 'FL'), [])
+
+    def test_appends_after_a_read_are_seen(self):
+        stay = date(2026, 11, 2)
+        self.history.append('Orlando', 'FL', 'Expedia', stay, [100])
+        self.assertEqual(len(self.history.query('Orlando', 'FL')), 1)
+        self.history.append('Orlando', 'FL', 'Expedia', stay, [110])
+        # A torn trailing record is ignored
+        with open(os.path.join(self.history.directory, 'orlando-fl', 'expedia.bin'), 'ab') as f:
+            f.write(b'\x00' * 5)
+        self.assertEqual(sorted(self.history.query('Orlando', 'FL')['price']), [100.0, 110.0])
+
+    def test_advice_from_past_stays(self):
+        first = date(2026, 9, 1)
+        for n in range(10):
+            stay = first + timedelta(days=n)
+            self.history.append('Orlando', 'FL', 'Expedia', stay, [200], observed=self.observed(stay - timedelta(days=20)))
+            self.history.append('Orlando', 'FL', 'Expedia', stay, [150], observed=self.observed(stay - timedelta(days=5)))
+        stay = date(2026, 11, 2)
+        advice = self.history.advice('Orlando', 'FL', stay, today=stay - timedelta(days=20))
+        self.assertEqual(advice['recommendation'], 'wait')
+        self.assertEqual(advice['expected_change_pct'], -25.0)
+        self.assertEqual(advice['stays_compared'], 10)
+
+        advice = self.history.advice('Orlando', 'FL', stay, today=stay - timedelta(days=2))
+        self.assertEqual((advice['recommendation'], advice['reason']), ('book_now', 'Check-in is close'))
+        advice = self.history.advice('Tampa', 'FL', stay, today=stay - timedelta(days=20))
+        self.assertEqual(advice['reason'], 'Not enough price history yet')
+
+
+class BookingLookupTests(IsolatedDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        now = timezone.now()
+        for n, (job_id, booking_status) in enumerate([
+            ('job-a', 'approved'), ('job-b', 'pending_approval'), ('job-a', 'pending_approval'),
+            ('job-b', 'approved'), ('job-c', 'cancelled'),
+        ]):
+            views.BOOKING_JOBS.add({
+                'id': f'k{n}', 'job_id': job_id, 'hotels': [], 'status': booking_status,
+                'created_at': now - timedelta(hours=10 - n),
+            })
+
+    def test_status_returns_latest_booking_for_job(self):
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/status/job-a/')
+        self.assertEqual(response.json()['booking']['id'], 'k2')
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/status/job-b/')
+        self.assertEqual(response.json()['booking']['id'], 'k3')
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/status/job-z/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_latest_for_job_finds_archived_booking(self):
+        self.assertEqual(views.BOOKING_JOBS.sweep(now=timezone.now() + timedelta(days=60)), 5)
+        self.assertEqual(views.BOOKING_JOBS.latest_for_job('job-c')['status'], 'cancelled')
+        self.assertEqual(views.BOOKING_JOBS.latest_for_job('job-a')['id'], 'k2')
+
+    def test_history_filters_by_status(self):
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/history/', {'status': 'approved'})
+        body = response.json()
+        self.assertEqual(body['total'], 2)
+        self.assertEqual([b['id'] for b in body['bookings']], ['k0', 'k3'])
+        self.assertEqual(views.BOOKING_JOBS.count(status='pending_approval'), 2)
+
+
+class BookingArchiveTests(IsolatedDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        now = timezone.now()
+        offer = {'id': 'hotel-001', 'name': 'Harbor Inn', 'total_price': 300}
+        # b0..b3 are old enough to archive once finished; b4, b5 stay hot
+        for n in range(6):
+            views.BOOKING_JOBS.add({
+                'id': f'b{n}',
+                'job_id': f'job-{n % 2}',
+                'hotels': [offer],
+                'recommended': offer,
+                'status': 'approved' if n in (0, 2) else 'pending_approval',
+                'created_at': now - timedelta(days=20 - n),
+            })
+        patch = mock.patch.object(views.BOOKING_JOBS, 'pending_ttl', timedelta(days=18))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.assertEqual(views.BOOKING_JOBS.sweep(now=now), 3)
+
+    def test_sweep_moves_cold_bookings(self):
+        self.assertEqual(sorted(ArchivedBooking.objects.values_list('id', flat=True)), ['b0', 'b1', 'b2'])
+        self.assertEqual(sorted(Booking.objects.values_list('id', flat=True)), ['b3', 'b4', 'b5'])
+        self.assertEqual(views.BOOKING_JOBS.get('b1')['hotels'][0]['name'], 'Harbor Inn')
+
+    def test_failed_archive_write_keeps_bookings_hot(self):
+        store = views.BOOKING_JOBS
+        with mock.patch.object(store.archive, 'write', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                store.sweep(now=timezone.now() + timedelta(days=60))
+        self.assertEqual(sorted(Booking.objects.values_list('id', flat=True)), ['b3', 'b4', 'b5'])
+        self.assertEqual(ArchivedBooking.objects.count(), 3)
+
+    def test_history_reads_include_archive(self):
+        store = views.BOOKING_JOBS
+        self.assertEqual(store.count(), 6)
+        self.assertEqual(store.count(status='approved'), 2)
+        self.assertEqual(store.count(archived=False), 3)
+        self.assertEqual([b['id'] for b in store.list(start=1, count=3)], ['b1', 'b2', 'b3'])
+
+        ids, cursor = [], None
+        while True:
+            bookings, cursor = store.page(cursor=cursor, limit=4)
+            ids += [b['id'] for b in bookings]
+            if not cursor:
+                break
+        self.assertEqual(ids, ['b0', 'b1', 'b2', 'b3', 'b4', 'b5'])
+
+        bookings, _ = store.page(status='pending_approval', archived=False)
+        self.assertEqual([b['id'] for b in bookings], ['b3', 'b4', 'b5'])
+
+    def test_history_endpoint_pages_through_archive(self):
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/history/', {'per_page': 2})
+        body = response.json()
+        self.assertEqual(body['total'], 6)
+        self.assertEqual([b['id'] for b in body['bookings']], ['b0', 'b1'])
+
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/history/', {
+            'per_page': 2, 'cursor': body['next_cursor']
+        })
+        self.assertEqual([b['id'] for b in response.json()['bookings']], ['b2', 'b3'])
+
+    def test_history_offset_pages(self):
+        response = self.client.get('/api/v1/buildertrend/hotel-booking/history/', {'page': 2, 'page_size': 4})
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([b['id'] for b in body['bookings']], ['b4', 'b5'])
+        self.assertIsNone(body['next_cursor'])
+
+    def test_history_rejects_bad_paging_parameters(self):
+        for params in ({'page': 'abc'}, {'page': 0}, {'page_size': 'x'}, {'per_page': '-1'}, {'cursor': 'nope'}):
+            response = self.client.get('/api/v1/buildertrend/hotel-booking/history/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_approving_archived_booking_restores_it(self):
+        response = self.client.post('/api/v1/buildertrend/hotel-booking/approve/', {
+            'booking_job_id': 'b1', 'hotel_id': 'hotel-001'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ArchivedBooking.objects.filter(pk='b1').exists())
+        booking = views.BOOKING_JOBS.get('b1')
+        self.assertEqual(booking['status'], 'approved')
+        self.assertEqual(booking['approved_by'], 'manual')
+        self.assertEqual(views.BOOKING_JOBS.count(), 6)
+
+
+class DocumentPruneTests(TestCase):
+    def setUp(self):
+        self.store = BookingStore()
+        self.offer = {'id': 'hotel-001', 'name': 'Harbor Inn', 'total_price': 300}
+
+    def add(self, booking_id):
+        return self.store.add({'id': booking_id, 'job_id': 'job-1', 'hotels': [self.offer]})
+
+    def test_recently_interned_documents_survive_prune(self):
+        self.add('p0')
+        Booking.objects.all().delete()
+        # Unreferenced, but intern() may still hand out its fingerprint without touching the row
+        self.assertEqual(self.store.prune_documents(), (0, 0))
+        self.assertEqual(HotelOffer.objects.count(), 1)
+
+    def test_stale_documents_are_pruned_and_reinterned(self):
+        self.add('p0')
+        Booking.objects.all().delete()
+        self.store.offers.seen.clear()
+        self.store.snapshots.seen.clear()
+        long_ago = timezone.now() - timedelta(days=90)
+        HotelOffer.objects.update(last_seen=long_ago)
+        self.assertEqual(self.store.prune_documents(now=timezone.now()), (1, 0))
+        JobSnapshot.objects.update(last_seen=long_ago)
+        self.assertEqual(self.store.prune_documents(), (0, 1))
+
+        # The offer is still in the resolve cache; interning it again restores the row
+        self.assertEqual(self.add('p1')['hotels'], [self.offer])
+        self.assertEqual(HotelOffer.objects.count(), 1)
+        self.assertEqual(self.store.prune_documents(), (0, 0))
+
+
+class JobSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def sync(self, job_id, job_data, method='post', **headers):
+        return getattr(self.client, method)(
+            f'/api/v1/buildertrend/jobs/{job_id}/sync/', {'job_data': job_data}, format='json', headers=headers
+        )
+
+    def test_unchanged_resync_and_etags(self):
+        job = {'jobName': 'Lakeside Remodel', 'address': {'city': 'Orlando'}}
+        first = self.sync('job-1', job)
+        self.assertTrue(first.json()['changed'])
+        again = self.sync('job-1', job)
+        self.assertFalse(again.json()['changed'])
+        self.assertEqual(again['ETag'], first['ETag'])
+
+        response = self.client.get('/api/v1/buildertrend/jobs/job-1/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/v1/buildertrend/jobs/job-1/', headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.json()['job']['jobName'], 'Lakeside Remodel')
+
+    def test_merge_patch_with_if_match(self):
+        etag = self.sync('job-1', {'jobName': 'Dock', 'notes': 'gate code 1234', 'address': {'city': 'Tampa'}})['ETag']
+        response = self.sync('job-1', {'notes': None, 'address': {'zip': '33602'}}, method='patch', **{'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        job = response.json()['job']
+        self.assertNotIn('notes', job)
+        self.assertEqual(job['address'], {'city': 'Tampa', 'zip': '33602'})
+
+        # The old ETag no longer matches
+        response = self.sync('job-1', {'jobName': 'Pier'}, method='patch', **{'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.sync('job-404', {'jobName': 'x'}, method='patch').status_code, 404)
+
+    def test_bulk_sync_counts(self):
+        self.sync('job-1', {'jobName': 'Dock'})
+        response = self.client.post('/api/v1/buildertrend/jobs/sync/bulk/', {'jobs': [
+            {'jobId': 'job-1', 'jobName': 'Dock'},
+            {'jobId': 'job-2', 'jobName': 'Pier'},
+            {'jobId': 'job-3', 'jobName': 'Old name'},
+            {'jobId': 'job-3', 'jobName': 'New name'},
+            {'jobName': 'No id'},
+        ]}, format='json')
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['unchanged'], body['rejected']), (2, 0, 1, 1))
+        self.assertEqual(body['errors'], [{'index': 4, 'error': 'jobId is required'}])
+        self.assertEqual(views.SYNCED_JOBS.get('job-3')['jobName'], 'New name')
+
+        response = self.client.get('/api/v1/buildertrend/jobs/', {'per_page': 2})
+        self.assertEqual(response.json()['total'], 3)
+        self.assertEqual(len(response.json()['jobs']), 2)
+
+
+class SlowAdapter(SourceAdapter):
+    def __init__(self, name, delay, release=None, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.delay = delay
+        self.release = release
+
+    def fetch(self, location, check_in=None, check_out=None, guests=None):
+        if self.release is not None:
+            self.release.wait(5)
+        else:
+            time.sleep(self.delay)
+        return [{'id': f'{self.name}-1', 'name': self.name, 'total_price': 100, 'source': self.name}]
+
+
+class FanOutSearchTests(SimpleTestCase):
+    def test_collects_offers_and_timings(self):
+        adapters = [SlowAdapter('Fast', 0, timeout=1), SlowAdapter('Also Fast', 0.01, timeout=1)]
+        result = search_all_sources({'city': 'Orlando'}, adapters=adapters)
+        self.assertFalse(result['partial'])
+        self.assertEqual([t['status'] for t in result['source_timings']], ['ok', 'ok'])
+        self.assertEqual(len(result['hotels']), 2)
+
+    def test_stalled_source_is_skipped_until_it_returns(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        stuck = SlowAdapter('Stuck', 0, release=release, timeout=0.05)
+        fast = SlowAdapter('Fast', 0, timeout=1)
+
+        result = search_all_sources({}, adapters=[stuck, fast])
+        self.assertEqual([t['status'] for t in result['source_timings']], ['timeout', 'ok'])
+        self.assertTrue(result['partial'])
+
+        # The timed-out call is still running: no new calls pile up behind it
+        result = search_all_sources({}, adapters=[stuck, fast])
+        self.assertEqual([t['status'] for t in result['source_timings']], ['busy', 'ok'])
+        self.assertEqual(stuck.stats()['in_flight'], 1)
+
+        release.set()
+        for _ in range(100):
+            if not stuck.stats()['in_flight']:
+                break
+            time.sleep(0.01)
+        result = search_all_sources({}, adapters=[stuck, fast])
+        self.assertEqual([t['status'] for t in result['source_timings']], ['ok', 'ok'])
+
+    def test_saturated_source_is_busy(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        adapter = SlowAdapter('Narrow', 0, release=release, timeout=5, max_concurrency=1)
+        self.assertIsNotNone(adapter.submit({}))
+        self.assertIsNone(adapter.submit({}))
+        release.set()
+
+
+class RankingTests(SimpleTestCase):
+    offers = [
+        {'id': 'cheap', 'total_price': 300, 'rating': 4.0, 'distance_miles': 5.0, 'amenities': ['Free WiFi']},
+        {'id': 'dominated', 'total_price': 350, 'rating': 3.5, 'distance_miles': 6.0, 'amenities': []},
+        {'id': 'close', 'total_price': 600, 'rating': 4.5, 'distance_miles': 0.5, 'amenities': ['Pool']},
+        {'id': 'no-distance', 'total_price': 500, 'rating': 5.0, 'amenities': ['Gym', 'Spa']},
+    ]
+
+    def test_pareto_front_drops_dominated_offers(self):
+        for vectorized in (True, False):
+            ranked = [o['id'] for o in rank_offers(self.offers, k=10, vectorized=vectorized)]
+            self.assertNotIn('dominated', ranked)
+            self.assertEqual(sorted(ranked), ['cheap', 'close', 'no-distance'])
+            ranked = [o['id'] for o in rank_offers(self.offers, k=10, dominance_filter=False, vectorized=vectorized)]
+            self.assertEqual(len(ranked), 4)
+
+        axes = OfferMatrix.from_offers(self.offers).axes()
+        self.assertEqual(list(pareto_mask(axes)), [True, False, True, True])
+
+    def test_python_and_numpy_paths_agree(self):
+        for seed in range(3):
+            offers = make_offers(400, seed=seed)
+            for dominance_filter in (True, False):
+                numpy_ranked = rank_offers(offers, k=10, dominance_filter=dominance_filter, vectorized=True)
+                python_ranked = rank_offers(offers, k=10, dominance_filter=dominance_filter, vectorized=False)
+                self.assertEqual([o['id'] for o in numpy_ranked], [o['id'] for o in python_ranked])
+                self.assertEqual([o['score'] for o in numpy_ranked], [o['score'] for o in python_ranked])
+
+    def test_best_offer(self):
+        self.assertIs(best_offer(self.offers), self.offers[0])
+        self.assertIsNone(best_offer([]))
+        self.assertEqual(rank_offers(self.offers, k=0), [])
+
+
+class AddressNormalizationTests(SimpleTestCase):
+    def test_extension_address_shapes(self):
+        address = normalize_address({
+            'city': 'Orlando FL 32825', 'state': 'FL', 'zip': '32825',
+            'formatted': '3374 Erskine Drive, Orlando FL 32825, FL 32825'
+        })
+        self.assertEqual(
+            (address['street'], address['city'], address['state'], address['zip']),
+            ('3374 Erskine Dr', 'Orlando', 'FL', '32825')
+        )
+        self.assertEqual(address['formatted'], '3374 Erskine Dr, Orlando, FL 32825')
+        self.assertEqual(address['geocode_source'], 'zip')
+
+        address = normalize_address({'city': 'Fairfax', 'state': '', 'zip': '22031'})
+        self.assertEqual(address['state'], 'VA')
+        self.assertIn('lat', address)
+
+        self.assertEqual(normalize_address({'city': 'Lake In The Hills', 'state': 'IL'})['city'], 'Lake In The Hills')
+        self.assertEqual(normalize_address('100 Main Street, Boston MA 02108')['city'], 'Boston')
+
+    def test_missing_city_falls_back_in_mock_offers(self):
+        location = normalize_address({})
+        self.assertEqual(location['city'], '')
+        names = [hotel['name'] for hotel in generate_mock_hotels(location)]
+        self.assertIn('Comfort Suites Unknown City', names)
+        self.assertFalse(any(name != name.strip() for name in names))
@@ -7,8 +7,13 @@ from . import views
 urlpatterns = [
     # Hotel booking endpoints
     path('hotel-booking/search/', views.search_hotels, name='search_hotels'),
+    path('hotel-booking/search/cache/', views.search_cache_stats, name='search_cache_stats'),
+    path('hotel-booking/search/batch/', views.search_hotels_batch, name='search_hotels_batch'),
     path('hotel-booking/run/', views.run_hotel_search, name='run_hotel_search'),
+    path('hotel-booking/prices/history/', views.price_history, name='price_history'),
+    path('hotel-booking/prices/advice/', views.price_advice, name='price_advice'),
     path('hotel-booking/approve/', views.approve_booking, name='approve_booking'),
+    path('hotel-booking/auto-approve/', views.auto_approve_bookings, name='auto_approve_bookings'),
     path('hotel-booking/status/<str:job_id>/', views.booking_status, name='booking_status'),
     path('hotel-booking/history/', views.booking_history, name='booking_history'),
     
@@ -16,8 +21,14 @@ urlpatterns = [
     path('hotel-booking/searches/', views.get_hotel_searches, name='get_hotel_searches'),
     path('hotel-booking/approvals/', views.get_booking_approvals, name='get_booking_approvals'),
     
+    # Internal housing inventory
+    path('housing/units/', views.housing_units, name='housing_units'),
+    path('housing/units/<str:unit_id>/', views.housing_unit_detail, name='housing_unit_detail'),
+    path('housing/nearest/', views.housing_nearest, name='housing_nearest'),
+    
     # Job data endpoints
     path('jobs/', views.list_jobs, name='list_jobs'),
+    path('jobs/sync/bulk/', views.sync_jobs_bulk, name='sync_jobs_bulk'),
     path('jobs/<str:job_id>/', views.job_detail, name='job_detail'),
     path('jobs/<str:job_id>/sync/', views.sync_job, name='sync_job'),
 ]
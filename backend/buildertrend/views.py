@@ -5,56 +5,101 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import time
 import uuid
-import random
-import csv
+import json
 import os
 
+from api.csv_index import CSVOffsetIndex
+from api.events import EVENT_HUB
+from api.idempotency import idempotent, idempotency_stats
+from api.journal import CSVJournal
+from api.pagination import encode_cursor, decode_cursor, get_page_size, InvalidCursor, keyset_queryset_page
+from api.workers import WORKER_POOL, QueueFull
+from .approval_rules import AUTO_APPROVAL_RULES
+from .addresses import normalize_address, cache_info as address_cache_info
+from .housing import HOUSING_INVENTORY
+from .models import HousingUnit
+from .price_history import PRICE_HISTORY, to_day
+from .ota import cached_search, get_source_names, source_stats, HOTEL_SEARCH_CACHE, OTA_SETTINGS
+from .ranking import best_offer
+from .store import BookingStore, PreconditionFailed, SyncedJobStore, booking_event
 
-# In-memory storage for demo (replace with database in production)
-BOOKING_JOBS = {}
-SYNCED_JOBS = {}
+
+# Database-backed stores, shared by every worker process
+BOOKING_JOBS = BookingStore()
+SYNCED_JOBS = SyncedJobStore()
+
+# SSE clients subscribing to a job get its latest booking first
+EVENT_HUB.register_snapshot('booking', lambda job_id: booking_event(BOOKING_JOBS.latest_for_job(job_id)))
+
+JOB_SYNC_SETTINGS = getattr(settings, 'JOB_SYNC', {})
+PRICE_HISTORY_SETTINGS = getattr(settings, 'PRICE_HISTORY', {})
 
 # CSV file paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 HOTEL_SEARCHES_CSV = os.path.join(DATA_DIR, 'hotel_searches.csv')
 BOOKING_APPROVALS_CSV = os.path.join(DATA_DIR, 'booking_approvals.csv')
 
+HOTEL_SEARCH_FIELDS = [
+    'id', 'job_id', 'job_name', 'job_code', 'street', 'city', 'state', 'zip',
+    'formatted_address', 'start_date', 'end_date', 'guests', 'special_requirements',
+    'source', 'booking_job_id', 'status', 'created_at'
+]
+BOOKING_APPROVAL_FIELDS = [
+    'id', 'booking_job_id', 'hotel_id', 'hotel_name', 'price', 'status',
+    'approved_at', 'confirmation_number'
+]
+
+# Row offset indexes so the portal can page through the CSVs without reading them whole
+HOTEL_SEARCHES_INDEX = CSVOffsetIndex(HOTEL_SEARCHES_CSV)
+BOOKING_APPROVALS_INDEX = CSVOffsetIndex(BOOKING_APPROVALS_CSV)
+
+# Write-behind journals so request threads never block on CSV I/O
+HOTEL_SEARCHES_JOURNAL = CSVJournal(
+    HOTEL_SEARCHES_CSV, HOTEL_SEARCH_FIELDS,
+    on_flush=lambda journal: HOTEL_SEARCHES_INDEX.refresh()
+)
+BOOKING_APPROVALS_JOURNAL = CSVJournal(
+    BOOKING_APPROVALS_CSV, BOOKING_APPROVAL_FIELDS,
+    on_flush=lambda journal: BOOKING_APPROVALS_INDEX.refresh()
+)
 
-def save_hotel_search_to_csv(job_data, booking_job_id, source):
-    """Save hotel search request to CSV file"""
+
+def save_hotel_search_to_csv(job_data, booking_job_id, source, booking_status='pending_approval'):
+    """Queue hotel search request for the CSV journal"""
     try:
-        address = job_data.get('address', {})
+        address = normalize_address(job_data.get('address', {}))
         row = {
             'id': str(uuid.uuid4())[:8],
             'job_id': job_data.get('jobId', 'N/A'),
             'job_name': job_data.get('jobName', 'N/A'),
             'job_code': job_data.get('jobCode', 'N/A'),
-            'street': address.get('street', 'N/A') if isinstance(address, dict) else 'N/A',
-            'city': address.get('city', 'N/A') if isinstance(address, dict) else 'N/A',
-            'state': address.get('state', 'N/A') if isinstance(address, dict) else 'N/A',
-            'zip': address.get('zip', 'N/A') if isinstance(address, dict) else 'N/A',
-            'formatted_address': address.get('formatted', str(address)) if isinstance(address, dict) else str(address),
+            'street': address['street'] or 'N/A',
+            'city': address['city'] or 'N/A',
+            'state': address['state'] or 'N/A',
+            'zip': address['zip'] or 'N/A',
+            'formatted_address': address['formatted'] or 'N/A',
             'start_date': job_data.get('startDate', 'N/A'),
             'end_date': job_data.get('endDate', 'N/A'),
             'guests': job_data.get('numberOfGuests', 'N/A'),
             'special_requirements': job_data.get('specialRequirements', 'None'),
             'source': source,
             'booking_job_id': booking_job_id,
-            'status': 'pending_approval',
+            'status': booking_status,
             'created_at': datetime.utcnow().isoformat()
         }
         
-        # Append to CSV
-        file_exists = os.path.exists(HOTEL_SEARCHES_CSV)
-        with open(HOTEL_SEARCHES_CSV, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=row.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
+        # Written to disk in the background by the journal
+        HOTEL_SEARCHES_JOURNAL.append(row)
         
-        print(f"💾 Saved to CSV: {HOTEL_SEARCHES_CSV}")
+        print(f"💾 Queued for CSV: {HOTEL_SEARCHES_CSV}")
         return True
     except Exception as e:
         print(f"❌ Error saving to CSV: {e}")
@@ -62,7 +107,7 @@ def save_hotel_search_to_csv(job_data, booking_job_id, source):
 
 
 def save_booking_approval_to_csv(booking_job_id, hotel_id, hotel_name, price):
-    """Save booking approval to CSV file"""
+    """Queue booking approval for the CSV journal"""
     try:
         row = {
             'id': str(uuid.uuid4())[:8],
@@ -72,30 +117,40 @@ def save_booking_approval_to_csv(booking_job_id, hotel_id, hotel_name, price):
             'price': price,
             'status': 'approved',
             'approved_at': datetime.utcnow().isoformat(),
-            'confirmation_number': f'SF-{booking_job_id.upper()}'
+            'confirmation_number': _confirmation_number(booking_job_id)
         }
         
-        # Append to CSV
-        file_exists = os.path.exists(BOOKING_APPROVALS_CSV)
-        with open(BOOKING_APPROVALS_CSV, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=row.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
+        # Written to disk in the background by the journal
+        BOOKING_APPROVALS_JOURNAL.append(row)
         
-        print(f"💾 Saved approval to CSV: {BOOKING_APPROVALS_CSV}")
+        print(f"💾 Queued approval for CSV: {BOOKING_APPROVALS_CSV}")
         return True
     except Exception as e:
         print(f"❌ Error saving approval to CSV: {e}")
         return False
 
 
+def _confirmation_number(booking_job_id):
+    return f'SF-{booking_job_id.upper()}'
+
+
+def _record_approval(booking, hotel_id):
+    """Queue the approval CSV row for an approved booking (manual or automatic)"""
+    offers = booking.get('hotels', []) + [booking.get('recommended') or {}]
+    selected_hotel = next((h for h in offers if h.get('id') == hotel_id), {})
+    hotel_name = selected_hotel.get('name', 'Unknown Hotel')
+    price = selected_hotel.get('total_price', selected_hotel.get('price_per_night', 0))
+    return save_booking_approval_to_csv(booking['id'], hotel_id, hotel_name, price)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@idempotent('hotel_search')
 def search_hotels(request):
     """
     Search for hotels based on job location.
     Called from Chrome extension when user clicks "Book Hotel with AI"
+    Send an Idempotency-Key header to make retries return the first response.
     """
     # ========== PRINT STATEMENTS FOR TERMINAL VISIBILITY ==========
     print("\n" + "=" * 60)
@@ -122,44 +177,267 @@ def search_hotels(request):
             'error': 'Job data is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    return Response(_perform_search(job_data, request.data.get('source', 'chrome_extension')))
+
+
+def _perform_search(job_data, source='chrome_extension', sync_job=True):
+    """
+    Run one hotel search for a job: store the job, query all sources, create the
+    booking job and queue the CSV record. Returns the search response body.
+    Shared by search_hotels, search_hotels_batch and run_hotel_search; the
+    latter searches an already synced job with overridden dates, so it passes
+    sync_job=False to leave the stored job untouched.
+    """
     job_id = job_data.get('jobId', 'unknown')
-    location = job_data.get('address', {})
+    # Clean up the extension's address and locate it from the offline gazetteer
+    location = normalize_address(job_data.get('address', {}))
     
     # Store synced job data
-    SYNCED_JOBS[job_id] = {
-        **job_data,
-        'synced_at': datetime.utcnow().isoformat(),
-        'source': 'chrome_extension'
-    }
+    if sync_job:
+        SYNCED_JOBS.upsert(job_id, job_data, source=source)
+    
+    # Query all OTA sources concurrently (served from cache for repeat searches)
+    search_result = cached_search(
+        location,
+        check_in=job_data.get('startDate'),
+        check_out=job_data.get('endDate'),
+        guests=job_data.get('numberOfGuests')
+    )
+    hotels = search_result['hotels']
+    recommended = best_offer(hotels)
     
-    # Generate mock hotel results from different OTA sources
-    hotels = generate_mock_hotels(location)
+    # Keep the prices of fresh (non-cached) results for trend analytics
+    if search_result['cache'] == 'miss' and PRICE_HISTORY_SETTINGS.get('ENABLED', True):
+        try:
+            PRICE_HISTORY.record_search(location, job_data.get('startDate'), hotels)
+        except OSError as e:
+            print(f"⚠️ Price history not recorded: {e}")
     
-    # Create booking job
+    # Create booking job, already approved if the recommendation meets an auto-approval policy
     booking_job_id = str(uuid.uuid4())[:8]
-    BOOKING_JOBS[booking_job_id] = {
+    booking = {
         'id': booking_job_id,
         'job_id': job_id,
         'job_data': job_data,
         'hotels': hotels,
         'status': 'pending_approval',
-        'created_at': datetime.utcnow().isoformat(),
-        'recommended': hotels[0] if hotels else None  # Best deal
+        'created_at': timezone.now(),
+        'recommended': recommended  # Best weighted score
     }
+    offer, policy = AUTO_APPROVAL_RULES.evaluate(booking)
+    if policy:
+        booking.update(
+            status='approved',
+            approved_at=timezone.now(),
+            selected_hotel_id=offer.get('id'),
+            approved_by=f'auto:{policy}'
+        )
+    BOOKING_JOBS.add(booking)
     
     # ========== SAVE TO CSV ==========
-    source = request.data.get('source', 'chrome_extension')
-    save_hotel_search_to_csv(job_data, booking_job_id, source)
+    save_hotel_search_to_csv(job_data, booking_job_id, source, booking['status'])
+    approval = None
+    if policy:
+        print(f"🤖 Auto-approved booking {booking_job_id} ({offer.get('name')}) by policy '{policy}'")
+        _record_approval(booking, offer.get('id'))
+        approval = {
+            'policy': policy,
+            'hotel_id': offer.get('id'),
+            'confirmation_number': _confirmation_number(booking_job_id)
+        }
     
-    return Response({
+    return {
         'success': True,
         'booking_job_id': booking_job_id,
         'job_id': job_id,
+        'status': booking['status'],
+        'auto_approval': approval,
         'location': location,
         'hotels': hotels,
-        'recommended': hotels[0] if hotels else None,
-        'total_sources_searched': 6,
-        'sources': ['Internal Housing', 'Airbnb', 'Expedia', 'Kayak', 'Booking.com', 'Hotels.com']
+        'recommended': recommended,
+        'total_sources_searched': len(search_result['source_timings']),
+        'sources': get_source_names(),
+        'source_timings': search_result['source_timings'],
+        'partial': search_result['partial'],
+        'search_time_ms': search_result['elapsed_ms'],
+        'cache': search_result['cache']
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def search_hotels_batch(request):
+    """
+    Search hotels for many jobs at once.
+    Body: {"jobs": [job_data, ...], "source": "...", "concurrency": 8}
+    
+    Jobs run concurrently (at most BATCH_CONCURRENCY at a time) and each result
+    is streamed as one NDJSON line as soon as it is ready, in completion order;
+    the "index" field points back into the request's jobs list. Every job gets
+    the same booking job and CSV record as a single search. The last line is a
+    summary with "done": true.
+    """
+    jobs = request.data.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        return Response({
+            'success': False,
+            'error': 'jobs must be a non-empty list of job_data objects'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_jobs = OTA_SETTINGS.get('BATCH_MAX_JOBS', 500)
+    if len(jobs) > max_jobs:
+        return Response({
+            'success': False,
+            'error': f'At most {max_jobs} jobs per batch'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_concurrency = OTA_SETTINGS.get('BATCH_CONCURRENCY', 8)
+    try:
+        concurrency = int(request.data.get('concurrency', max_concurrency))
+    except (TypeError, ValueError):
+        concurrency = max_concurrency
+    concurrency = max(1, min(concurrency, max_concurrency, len(jobs)))
+    source = request.data.get('source', 'batch')
+    
+    print(f"🏨 Batch hotel search: {len(jobs)} jobs, {concurrency} at a time")
+    
+    def run(job_data):
+        try:
+            if not isinstance(job_data, dict) or not job_data:
+                return {'success': False, 'error': 'Job data is required'}
+            return _perform_search(job_data, source)
+        except Exception as e:
+            print(f"❌ Batch search failed for job {job_data.get('jobId') if isinstance(job_data, dict) else '?'}: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            close_old_connections()
+    
+    def lines():
+        started = time.perf_counter()
+        succeeded = 0
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='hotel-batch')
+        try:
+            futures = {pool.submit(run, job_data): i for i, job_data in enumerate(jobs)}
+            for future in as_completed(futures):
+                result = future.result()
+                succeeded += bool(result.get('success'))
+                yield json.dumps({'index': futures[future], **result}, default=str) + '\n'
+            yield json.dumps({
+                'done': True,
+                'total': len(jobs),
+                'succeeded': succeeded,
+                'failed': len(jobs) - succeeded,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+            }) + '\n'
+        finally:
+            # Client went away: drop jobs that have not started
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_cache_stats(request):
+    """
+    Get hotel search cache hit/miss/coalesce counters, per-source call
+    counters, the address memo counters and the stored Idempotency-Key counters.
+    """
+    return Response({
+        'success': True,
+        'cache': HOTEL_SEARCH_CACHE.stats(),
+        'sources': source_stats(),
+        'address_cache': address_cache_info(),
+        'idempotency': idempotency_stats()
+    })
+
+
+def _price_query_location(request):
+    """(city, state) from ?city=&state= or ?job_id=, normalized like search addresses"""
+    job_id = request.query_params.get('job_id')
+    if job_id:
+        job = SYNCED_JOBS.get(job_id)
+        address = job.get('address', {}) if job else {}
+    else:
+        address = {'city': request.query_params.get('city', ''), 'state': request.query_params.get('state', '')}
+    location = normalize_address(address)
+    return location.get('city'), location.get('state')
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def price_history(request):
+    """
+    Daily min/median/max nightly prices for a city.
+    Query: city & state (or job_id), source, by=observed|stay,
+    stay_from/stay_to and observed_from/observed_to (YYYY-MM-DD).
+    """
+    started = time.perf_counter()
+    city, state = _price_query_location(request)
+    if not city:
+        return Response({
+            'success': False,
+            'error': 'city (or a synced job_id) is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    by = request.query_params.get('by', 'observed')
+    if by not in ('observed', 'stay'):
+        return Response({
+            'success': False,
+            'error': "by must be 'observed' or 'stay'"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    filters = {}
+    for name in ('stay_from', 'stay_to', 'observed_from', 'observed_to'):
+        value = request.query_params.get(name)
+        if value and to_day(value) is None:
+            return Response({
+                'success': False,
+                'error': f'{name} must be a YYYY-MM-DD date'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        filters[name] = value or None
+    
+    series = PRICE_HISTORY.rollup(city, state, by=by, source=request.query_params.get('source'), **filters)
+    return Response({
+        'success': True,
+        'city': city,
+        'state': state,
+        'by': by,
+        'sources': PRICE_HISTORY.sources(city, state),
+        'series': series,
+        'observations': sum(day['count'] for day in series),
+        'query_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def price_advice(request):
+    """
+    Book now or wait for a check-in date, based on price history.
+    Query: city & state (or job_id), check_in (defaults to the job's start date), source.
+    """
+    started = time.perf_counter()
+    city, state = _price_query_location(request)
+    check_in = request.query_params.get('check_in')
+    if not check_in and request.query_params.get('job_id'):
+        check_in = (SYNCED_JOBS.get(request.query_params['job_id']) or {}).get('startDate')
+    
+    if not city or to_day(check_in or '') is None:
+        return Response({
+            'success': False,
+            'error': 'city (or a synced job_id) and a YYYY-MM-DD check_in are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    advice = PRICE_HISTORY.advice(city, state, check_in, source=request.query_params.get('source'))
+    return Response({
+        'success': True,
+        'city': city,
+        'state': state,
+        **advice,
+        'query_ms': round((time.perf_counter() - started) * 1000, 2)
     })
 
 
@@ -169,6 +447,9 @@ def run_hotel_search(request):
     """
     Trigger a hotel search automation job.
     Alternative endpoint for portal-initiated searches.
+    
+    The search runs on the background worker pool; poll
+    GET /api/v1/automations/<automation_id>/ for progress and the result.
     """
     job_id = request.data.get('job_id')
     check_in = request.data.get('check_in')
@@ -180,24 +461,71 @@ def run_hotel_search(request):
             'error': 'job_id is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Create automation job
-    automation_id = str(uuid.uuid4())[:8]
+    if not SYNCED_JOBS.get(job_id):
+        return Response({
+            'success': False,
+            'error': 'Job not found. Sync the job before searching.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        automation = WORKER_POOL.enqueue(
+            'buildertrend', 'hotel_search', _hotel_search_task,
+            params={'job_id': job_id, 'check_in': check_in, 'check_out': check_out}
+        )
+    except QueueFull as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     
     return Response({
         'success': True,
-        'automation_id': automation_id,
+        'automation_id': automation.id,
         'job_id': job_id,
-        'status': 'running',
-        'message': 'Hotel search automation started',
-        'estimated_completion': '30 seconds'
-    })
+        'status': automation.status,
+        'message': 'Hotel search automation queued',
+        'poll_url': f'/api/v1/automations/{automation.id}/'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def _hotel_search_task(task, job_id, check_in=None, check_out=None):
+    """Worker-pool body of run_hotel_search"""
+    job = SYNCED_JOBS.get(job_id)
+    if not job:
+        raise ValueError(f'Job {job_id} not found')
+    job_data = {k: v for k, v in job.items() if k not in ('source', 'created_at', 'synced_at')}
+    if check_in:
+        job_data['startDate'] = check_in
+    if check_out:
+        job_data['endDate'] = check_out
+    task.log(f"Loaded job {job_id}", progress=10)
+    
+    if task.is_cancelled():
+        return None
+    task.log(f"Searching {len(get_source_names())} sources", progress=20)
+    result = _perform_search(job_data, source='portal', sync_job=False)
+    task.log(f"Found {len(result['hotels'])} offers in {result['search_time_ms']} ms", progress=90)
+    
+    return {
+        'booking_job_id': result['booking_job_id'],
+        'job_id': job_id,
+        'total_hotels': len(result['hotels']),
+        'recommended': result['recommended'],
+        'partial': result['partial'],
+        'search_time_ms': result['search_time_ms'],
+        'cache': result['cache']
+    }
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@idempotent('booking_approval')
 def approve_booking(request):
     """
     Approve and confirm a hotel booking.
+    Re-approving the same hotel is a no-op and approving a different hotel on
+    an approved booking is refused (409); an Idempotency-Key header also
+    replays the first response.
     """
     # ========== PRINT STATEMENTS FOR TERMINAL VISIBILITY ==========
     print("\n" + "=" * 60)
@@ -218,52 +546,182 @@ def approve_booking(request):
             'error': 'booking_job_id is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if booking_job_id in BOOKING_JOBS:
-        BOOKING_JOBS[booking_job_id]['status'] = 'approved'
-        BOOKING_JOBS[booking_job_id]['approved_at'] = datetime.utcnow().isoformat()
-        BOOKING_JOBS[booking_job_id]['selected_hotel_id'] = hotel_id
-        
-        # Get hotel details for CSV
-        hotels = BOOKING_JOBS[booking_job_id].get('hotels', [])
-        selected_hotel = next((h for h in hotels if h.get('id') == hotel_id), {})
-        hotel_name = selected_hotel.get('name', 'Unknown Hotel')
-        price = selected_hotel.get('price', 0)
-        
-        # ========== SAVE TO CSV ==========
-        save_booking_approval_to_csv(booking_job_id, hotel_id, hotel_name, price)
-        
+    previous = BOOKING_JOBS.get(booking_job_id)
+    if previous is None:
+        return Response({
+            'success': False,
+            'error': 'Booking job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if previous.get('status') == 'approved':
+        if previous.get('selected_hotel_id') == hotel_id:
+            # Already approved for this hotel: don't record a second approval
+            return Response({
+                'success': True,
+                'booking_job_id': booking_job_id,
+                'status': 'approved',
+                'confirmation_number': _confirmation_number(booking_job_id),
+                'message': 'Booking already approved'
+            })
+        return Response({
+            'success': False,
+            'error': f"Booking already approved for hotel {previous.get('selected_hotel_id')}",
+            'selected_hotel_id': previous.get('selected_hotel_id'),
+            'approved_by': previous.get('approved_by')
+        }, status=status.HTTP_409_CONFLICT)
+    
+    # Conditional on the status read above, so two concurrent approvals can't both win
+    booking = BOOKING_JOBS.update(
+        booking_job_id,
+        expected_status=previous.get('status'),
+        status='approved',
+        approved_at=timezone.now(),
+        selected_hotel_id=hotel_id,
+        approved_by='manual'
+    )
+    if booking is None:
+        return Response({
+            'success': False,
+            'error': 'Booking changed while it was being approved; reload it and try again'
+        }, status=status.HTTP_409_CONFLICT)
+    
+    # ========== SAVE TO CSV ==========
+    _record_approval(booking, hotel_id)
+    
+    return Response({
+        'success': True,
+        'booking_job_id': booking_job_id,
+        'status': 'approved',
+        'confirmation_number': _confirmation_number(booking_job_id),
+        'message': 'Booking approved successfully'
+    })
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def auto_approve_bookings(request):
+    """
+    GET: the compiled auto-approval policies.
+    POST: run them over pending bookings in bulk (e.g. after a policy change).
+    Body: {"limit": 500} caps how many pending bookings are evaluated.
+    """
+    if request.method == 'GET':
         return Response({
             'success': True,
-            'booking_job_id': booking_job_id,
-            'status': 'approved',
-            'confirmation_number': f'SF-{booking_job_id.upper()}',
-            'message': 'Booking approved successfully'
+            'rules': AUTO_APPROVAL_RULES.describe()
         })
     
+    try:
+        limit = max(1, min(int(request.data.get('limit', 500)), 5000))
+    except (TypeError, ValueError):
+        return Response({
+            'success': False,
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    evaluated = 0
+    approved = []
+    cursor = None
+    while evaluated < limit:
+        # Archived pending bookings have expired (PENDING_TTL_DAYS); leave them alone
+        bookings, cursor = BOOKING_JOBS.page(
+            status='pending_approval', cursor=cursor, limit=min(200, limit - evaluated), archived=False
+        )
+        evaluated += len(bookings)
+        for booking, offer, policy in AUTO_APPROVAL_RULES.evaluate_many(bookings):
+            # Skip bookings approved or cancelled since the page was read
+            updated = BOOKING_JOBS.update(
+                booking['id'],
+                expected_status='pending_approval',
+                status='approved',
+                approved_at=timezone.now(),
+                selected_hotel_id=offer.get('id'),
+                approved_by=f'auto:{policy}'
+            )
+            if updated:
+                _record_approval(updated, offer.get('id'))
+                approved.append({
+                    'booking_job_id': booking['id'],
+                    'hotel_id': offer.get('id'),
+                    'policy': policy,
+                    'confirmation_number': _confirmation_number(booking['id'])
+                })
+        if not cursor:
+            break
+    
+    print(f"🤖 Auto-approval run: {len(approved)} of {evaluated} pending bookings approved")
     return Response({
-        'success': False,
-        'error': 'Booking job not found'
-    }, status=status.HTTP_404_NOT_FOUND)
+        'success': True,
+        'evaluated': evaluated,
+        'approved': approved,
+        'total_approved': len(approved)
+    })
+
+
+def csv_rows_response(request, journal, index, key):
+    """
+    Serve rows of a journaled CSV file.
+
+    ?stream=ndjson          stream every row as NDJSON in constant memory
+    ?page=N&per_page=M      offset page, seeking straight to the first row
+    ?cursor=...&per_page=M  continue from the next_cursor of a previous page
+    (no parameters)         every row, as before
+    """
+    # Include rows still waiting in the journal queue
+    journal.flush(timeout=5)
+    total = index.refresh()
+    params = request.query_params
+
+    if params.get('stream') == 'ndjson':
+        lines = (json.dumps(row) + '\n' for row in index.iter_rows())
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    if not any(p in params for p in ('page', 'per_page', 'limit', 'cursor')):
+        rows = index.read_rows(0, total)
+        return Response({
+            'success': True,
+            'count': len(rows),
+            key: rows
+        })
+
+    per_page = get_page_size(request)
+    try:
+        if 'cursor' in params:
+            start = int(decode_cursor(params['cursor'])['row'])
+            if start < 0:
+                raise ValueError(start)
+            page = None
+        else:
+            page = max(1, int(params.get('page', 1)))
+            start = (page - 1) * per_page
+    except (InvalidCursor, KeyError, TypeError, ValueError):
+        return Response({
+            'success': False,
+            'error': 'Invalid page or cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = index.read_rows(start, per_page)
+    end = start + len(rows)
+    return Response({
+        'success': True,
+        'count': len(rows),
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'next_cursor': encode_cursor({'row': end}) if end < total else None,
+        key: rows
+    })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_hotel_searches(request):
     """
-    Get all hotel search records from CSV for portal display.
+    Get hotel search records from CSV for portal display.
+    Supports page/cursor pagination and ?stream=ndjson exports.
     """
     try:
-        searches = []
-        if os.path.exists(HOTEL_SEARCHES_CSV):
-            with open(HOTEL_SEARCHES_CSV, 'r') as f:
-                reader = csv.DictReader(f)
-                searches = list(reader)
-        
-        return Response({
-            'success': True,
-            'count': len(searches),
-            'searches': searches
-        })
+        return csv_rows_response(request, HOTEL_SEARCHES_JOURNAL, HOTEL_SEARCHES_INDEX, 'searches')
     except Exception as e:
         return Response({
             'success': False,
@@ -275,20 +733,11 @@ def get_hotel_searches(request):
 @permission_classes([AllowAny])
 def get_booking_approvals(request):
     """
-    Get all booking approval records from CSV for portal display.
+    Get booking approval records from CSV for portal display.
+    Supports page/cursor pagination and ?stream=ndjson exports.
     """
     try:
-        approvals = []
-        if os.path.exists(BOOKING_APPROVALS_CSV):
-            with open(BOOKING_APPROVALS_CSV, 'r') as f:
-                reader = csv.DictReader(f)
-                approvals = list(reader)
-        
-        return Response({
-            'success': True,
-            'count': len(approvals),
-            'approvals': approvals
-        })
+        return csv_rows_response(request, BOOKING_APPROVALS_JOURNAL, BOOKING_APPROVALS_INDEX, 'approvals')
     except Exception as e:
         return Response({
             'success': False,
@@ -300,14 +749,14 @@ def get_booking_approvals(request):
 @permission_classes([AllowAny])
 def booking_status(request, job_id):
     """
-    Get the status of a booking for a specific job.
+    Get the status of the latest booking for a specific job.
     """
-    for booking_job_id, booking in BOOKING_JOBS.items():
-        if booking.get('job_id') == job_id:
-            return Response({
-                'success': True,
-                'booking': booking
-            })
+    booking = BOOKING_JOBS.latest_for_job(job_id)
+    if booking:
+        return Response({
+            'success': True,
+            'booking': booking
+        })
     
     return Response({
         'success': False,
@@ -320,28 +769,47 @@ def booking_status(request, job_id):
 def booking_history(request):
     """
     Get booking history with optional filters.
+    Keyset-paginated on (created_at, id): pass next_cursor back as ?cursor=.
+    ?page= is still accepted for offset paging; ?per_page= (or ?page_size=)
+    sets the page size. Non-numeric values are rejected with 400.
     """
     # Get query parameters
-    page = int(request.query_params.get('page', 1))
-    per_page = int(request.query_params.get('per_page', 10))
+    for name in ('page', 'per_page', 'page_size', 'limit'):
+        value = request.query_params.get(name)
+        if value is not None and not (value.isdigit() and int(value) > 0):
+            return Response({
+                'success': False,
+                'error': f'{name} must be a positive integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    per_page = get_page_size(request, default=int(request.query_params.get('page_size', 10)))
     status_filter = request.query_params.get('status')
+    cursor = request.query_params.get('cursor')
     
-    bookings = list(BOOKING_JOBS.values())
-    
-    if status_filter:
-        bookings = [b for b in bookings if b.get('status') == status_filter]
-    
-    # Pagination
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated = bookings[start:end]
+    if 'page' in request.query_params and not cursor:
+        page = int(request.query_params['page'])
+        start = (page - 1) * per_page
+        paginated = BOOKING_JOBS.list(status=status_filter, start=start, count=per_page)
+        next_cursor = None
+        if paginated and start + per_page < BOOKING_JOBS.count(status=status_filter):
+            last = paginated[-1]
+            next_cursor = encode_cursor([last.get('created_at') or '', last['id']])
+    else:
+        page = None
+        try:
+            paginated, next_cursor = BOOKING_JOBS.page(status=status_filter, cursor=cursor, limit=per_page)
+        except InvalidCursor as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'success': True,
         'bookings': paginated,
-        'total': len(bookings),
+        'total': BOOKING_JOBS.count(status=status_filter),
         'page': page,
-        'per_page': per_page
+        'per_page': per_page,
+        'next_cursor': next_cursor
     })
 
 
@@ -349,28 +817,66 @@ def booking_history(request):
 @permission_classes([AllowAny])
 def list_jobs(request):
     """
-    List all synced BuilderTrend jobs.
+    List synced BuilderTrend jobs.
+    Keyset-paginated on (created_at, jobId): pass next_cursor back as ?cursor=.
     """
-    jobs = list(SYNCED_JOBS.values())
+    per_page = get_page_size(request)
+    
+    try:
+        jobs, next_cursor = SYNCED_JOBS.page(cursor=request.query_params.get('cursor'), limit=per_page)
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'success': True,
         'jobs': jobs,
-        'total': len(jobs)
+        'total': len(SYNCED_JOBS),
+        'per_page': per_page,
+        'next_cursor': next_cursor
     })
 
 
+def _etag(content_hash):
+    return f'"{content_hash}"'
+
+
+def _etag_values(header):
+    """Content hashes named by an If-Match / If-None-Match header ('*' stays '*')"""
+    return {value.strip().removeprefix('W/').strip('"') for value in header.split(',') if value.strip()}
+
+
+def _if_match(request):
+    """The single content hash a conditional write must match, or None"""
+    header = request.headers.get('If-Match')
+    if not header or header.strip() == '*':
+        return None
+    values = _etag_values(header)
+    return values.pop() if len(values) == 1 else ''
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def job_detail(request, job_id):
     """
     Get details of a specific synced job.
+    The response carries an ETag; send it back as If-None-Match to get 304
+    when the job hasn't changed.
     """
-    if job_id in SYNCED_JOBS:
-        return Response({
-            'success': True,
-            'job': SYNCED_JOBS[job_id]
-        })
+    job, content_hash = SYNCED_JOBS.get_with_hash(job_id)
+    if job:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and _etag_values(if_none_match) & {content_hash, '*'}:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'success': True,
+                'job': job
+            })
+        response['ETag'] = _etag(content_hash)
+        return response
     
     return Response({
         'success': False,
@@ -378,127 +884,256 @@ def job_detail(request, job_id):
     }, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['POST'])
+@api_view(['POST', 'PATCH'])
 @permission_classes([AllowAny])
 def sync_job(request, job_id):
     """
     Sync/update job data from Chrome extension.
+    POST replaces the job; PATCH applies job_data as a JSON merge patch
+    (null removes a field). Unchanged data is not rewritten ('changed': false).
+    Send If-Match with the job's ETag to reject the write if someone else changed it.
     """
     job_data = request.data.get('job_data', {})
+    source = request.data.get('source', 'api')
+    if not isinstance(job_data, dict):
+        return Response({
+            'success': False,
+            'error': 'job_data must be an object'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    SYNCED_JOBS[job_id] = {
-        **job_data,
-        'jobId': job_id,
-        'synced_at': datetime.utcnow().isoformat(),
-        'source': request.data.get('source', 'api')
-    }
+    try:
+        if request.method == 'PATCH':
+            result = SYNCED_JOBS.patch(job_id, job_data, source=source, if_match=_if_match(request))
+            if result is None:
+                return Response({
+                    'success': False,
+                    'error': 'Job not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+        else:
+            result = SYNCED_JOBS.upsert(job_id, {**job_data, 'jobId': job_id}, source=source, if_match=_if_match(request))
+    except PreconditionFailed:
+        return Response({
+            'success': False,
+            'error': 'Job was changed since the given ETag'
+        }, status=status.HTTP_412_PRECONDITION_FAILED)
+    
+    job, content_hash, changed = result
+    response = Response({
+        'success': True,
+        'message': 'Job synced successfully' if changed else 'Job unchanged',
+        'changed': changed,
+        'job': job
+    })
+    response['ETag'] = _etag(content_hash)
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def sync_jobs_bulk(request):
+    """
+    Upsert many jobs in one request.
+    Body: {"jobs": [job_data, ...], "source": "..."}; each job needs a jobId.
+    Jobs whose data is unchanged are skipped; a later duplicate jobId wins.
+    """
+    jobs = request.data.get('jobs')
+    source = request.data.get('source', 'api')
+    max_jobs = JOB_SYNC_SETTINGS.get('BULK_MAX_JOBS', 1000)
+    
+    if not isinstance(jobs, list) or not jobs:
+        return Response({
+            'success': False,
+            'error': 'jobs must be a non-empty list'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(jobs) > max_jobs:
+        return Response({
+            'success': False,
+            'error': f'At most {max_jobs} jobs per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    valid = []
+    errors = []
+    for position, job_data in enumerate(jobs):
+        job_id = job_data.get('jobId') if isinstance(job_data, dict) else None
+        if not job_id:
+            errors.append({'index': position, 'error': 'jobId is required'})
+            continue
+        valid.append((str(job_id), {**job_data, 'jobId': str(job_id)}))
+    
+    counts = SYNCED_JOBS.upsert_many(valid, source=source) if valid else {'created': 0, 'updated': 0, 'unchanged': 0}
+    print(f"🔄 Bulk job sync: {counts['created']} created, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {len(errors)} rejected")
+    
+    return Response({
+        'success': not errors,
+        **counts,
+        'rejected': len(errors),
+        'errors': errors
+    })
+
+
+# ========== INTERNAL HOUSING ==========
+
+HOUSING_UNIT_FIELDS = ['name', 'address', 'latitude', 'longitude', 'capacity', 'amenities', 'image_url', 'active']
+
+
+def _housing_unit_errors(data, partial=False):
+    """Validate housing unit fields; returns a list of error messages"""
+    errors = []
+    if not partial and not data.get('name'):
+        errors.append('name is required')
+    for field, low, high in [('latitude', -90, 90), ('longitude', -180, 180)]:
+        if field not in data:
+            if not partial:
+                errors.append(f'{field} is required')
+            continue
+        try:
+            value = float(data[field])
+        except (TypeError, ValueError):
+            errors.append(f'{field} must be a number')
+            continue
+        if not low <= value <= high:
+            errors.append(f'{field} must be between {low} and {high}')
+    if 'capacity' in data:
+        try:
+            if int(data['capacity']) < 1:
+                errors.append('capacity must be at least 1')
+        except (TypeError, ValueError):
+            errors.append('capacity must be an integer')
+    if 'amenities' in data and not isinstance(data['amenities'], list):
+        errors.append('amenities must be a list')
+    return errors
+
+
+def _housing_unit_values(data):
+    """Validated housing unit fields from a request, coerced to the model's types"""
+    values = {field: data[field] for field in HOUSING_UNIT_FIELDS if field in data}
+    for field in ('latitude', 'longitude'):
+        if field in values:
+            values[field] = float(values[field])
+    if 'capacity' in values:
+        values['capacity'] = int(values['capacity'])
+    if isinstance(values.get('active'), str):
+        values['active'] = values['active'].lower() in ('1', 'true', 'yes')
+    return values
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def housing_units(request):
+    """
+    GET: list internal housing units (keyset-paginated, pass next_cursor as ?cursor=).
+    POST: add a unit. Required: name, latitude, longitude.
+    """
+    if request.method == 'POST':
+        errors = _housing_unit_errors(request.data)
+        if errors:
+            return Response({
+                'success': False,
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Numeric strings pass validation; the index needs real numbers when the save signal fires
+        unit = HousingUnit.objects.create(
+            id=request.data.get('id') or f'unit-{str(uuid.uuid4())[:8]}',
+            **_housing_unit_values(request.data)
+        )
+        return Response({
+            'success': True,
+            'unit': unit.to_dict()
+        }, status=status.HTTP_201_CREATED)
+    
+    per_page = get_page_size(request)
+    queryset = HousingUnit.objects.all()
+    if request.query_params.get('active') is not None:
+        queryset = queryset.filter(active=request.query_params['active'].lower() in ('1', 'true', 'yes'))
+    
+    try:
+        units, next_cursor = keyset_queryset_page(
+            queryset, request.query_params.get('cursor'), per_page, serialize=HousingUnit.to_dict
+        )
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'success': True,
-        'message': 'Job synced successfully',
-        'job': SYNCED_JOBS[job_id]
+        'units': units,
+        'total': queryset.count(),
+        'per_page': per_page,
+        'next_cursor': next_cursor
     })
 
 
-def generate_mock_hotels(location):
-    """
-    Generate mock hotel results from different OTA sources.
-    """
-    city = location.get('city', 'Unknown City')
-    state = location.get('state', '')
-    
-    base_hotels = [
-        {
-            'id': 'hotel-001',
-            'name': 'SurfaceFlow Internal Housing',
-            'source': 'Internal Housing',
-            'source_icon': '🏠',
-            'address': f'123 Company Blvd, {city}, {state}',
-            'price_per_night': 0,
-            'total_price': 0,
-            'rating': 5.0,
-            'amenities': ['Free WiFi', 'Kitchen', 'Washer/Dryer', 'Free Parking'],
-            'availability': True,
-            'is_internal': True,
-            'savings': 175.00,
-            'image_url': 'https://images.unsplash.com/photo-1502672260266-1c1ef2d93688?w=400'
-        },
-        {
-            'id': 'hotel-002',
-            'name': f'Comfort Suites {city}',
-            'source': 'Airbnb',
-            'source_icon': '🏡',
-            'address': f'456 Main St, {city}, {state}',
-            'price_per_night': 89.00,
-            'total_price': 267.00,
-            'rating': 4.5,
-            'amenities': ['Free WiFi', 'Pool', 'Breakfast Included'],
-            'availability': True,
-            'is_internal': False,
-            'savings': 45.00,
-            'image_url': 'https://images.unsplash.com/photo-1566073771259-6a8506099945?w=400'
-        },
-        {
-            'id': 'hotel-003',
-            'name': f'Hampton Inn {city} Downtown',
-            'source': 'Expedia',
-            'source_icon': '✈️',
-            'address': f'789 Commerce Way, {city}, {state}',
-            'price_per_night': 125.00,
-            'total_price': 375.00,
-            'rating': 4.3,
-            'amenities': ['Free WiFi', 'Gym', 'Business Center', 'Breakfast'],
-            'availability': True,
-            'is_internal': False,
-            'savings': 28.00,
-            'image_url': 'https://images.unsplash.com/photo-1551882547-ff40c63fe5fa?w=400'
-        },
-        {
-            'id': 'hotel-004',
-            'name': f'Holiday Inn Express {city}',
-            'source': 'Kayak',
-            'source_icon': '🛶',
-            'address': f'321 Airport Rd, {city}, {state}',
-            'price_per_night': 109.00,
-            'total_price': 327.00,
-            'rating': 4.1,
-            'amenities': ['Free WiFi', 'Pool', 'Breakfast', 'Shuttle'],
-            'availability': True,
-            'is_internal': False,
-            'savings': 35.00,
-            'image_url': 'https://images.unsplash.com/photo-1564501049412-61c2a3083791?w=400'
-        },
-        {
-            'id': 'hotel-005',
-            'name': f'Marriott {city} Waterfront',
-            'source': 'Booking.com',
-            'source_icon': '🅱️',
-            'address': f'555 Harbor Dr, {city}, {state}',
-            'price_per_night': 189.00,
-            'total_price': 567.00,
-            'rating': 4.7,
-            'amenities': ['Free WiFi', 'Pool', 'Spa', 'Restaurant', 'Bar'],
-            'availability': True,
-            'is_internal': False,
-            'savings': 0,
-            'image_url': 'https://images.unsplash.com/photo-1542314831-068cd1dbfeeb?w=400'
-        },
-        {
-            'id': 'hotel-006',
-            'name': f'Best Western Plus {city}',
-            'source': 'Hotels.com',
-            'source_icon': '🏨',
-            'address': f'888 Industrial Pkwy, {city}, {state}',
-            'price_per_night': 95.00,
-            'total_price': 285.00,
-            'rating': 4.0,
-            'amenities': ['Free WiFi', 'Pool', 'Pet Friendly', 'Breakfast'],
-            'availability': True,
-            'is_internal': False,
-            'savings': 40.00,
-            'image_url': 'https://images.unsplash.com/photo-1520250497591-112f2f40a3f4?w=400'
-        }
-    ]
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([AllowAny])
+def housing_unit_detail(request, unit_id):
+    """
+    Get, update or remove one internal housing unit.
+    """
+    unit = HousingUnit.objects.filter(id=unit_id).first()
+    if unit is None:
+        return Response({
+            'success': False,
+            'error': 'Housing unit not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'DELETE':
+        unit.delete()
+        return Response({
+            'success': True,
+            'message': f'Housing unit {unit_id} removed'
+        })
+    
+    if request.method == 'PATCH':
+        errors = _housing_unit_errors(request.data, partial=True)
+        if errors:
+            return Response({
+                'success': False,
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        for field, value in _housing_unit_values(request.data).items():
+            setattr(unit, field, value)
+        unit.save()
+        unit.refresh_from_db()
+    
+    return Response({
+        'success': True,
+        'unit': unit.to_dict()
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def housing_nearest(request):
+    """
+    Find the internal housing units nearest a point.
+    Query params: lat, lng, k (default 3), guests (minimum capacity), max_miles.
+    """
+    try:
+        lat = float(request.query_params['lat'])
+        lng = float(request.query_params['lng'])
+        k = max(1, min(int(request.query_params.get('k', 3)), 100))
+        guests = int(request.query_params.get('guests') or 0)
+        max_miles = request.query_params.get('max_miles')
+        max_miles = float(max_miles) if max_miles else None
+    except KeyError:
+        return Response({
+            'success': False,
+            'error': 'lat and lng are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'lat, lng, k, guests and max_miles must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Sort by price (internal housing first as it's free)
-    return sorted(base_hotels, key=lambda x: x['total_price'])
+    matches = HOUSING_INVENTORY.nearest(lat, lng, k=k, max_miles=max_miles, min_capacity=guests or None)
+    
+    return Response({
+        'success': True,
+        'units': [{**unit, 'distance_miles': round(distance, 2)} for unit, distance in matches],
+        'total_units': len(HOUSING_INVENTORY)
+    })
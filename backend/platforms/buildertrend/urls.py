@@ -10,15 +10,26 @@ from buildertrend import views as hotel_views
 urlpatterns = [
     # Hotel booking endpoints (using existing buildertrend views)
     path('hotel-booking/search/', hotel_views.search_hotels, name='search_hotels'),
+    path('hotel-booking/search/cache/', hotel_views.search_cache_stats, name='search_cache_stats'),
+    path('hotel-booking/search/batch/', hotel_views.search_hotels_batch, name='search_hotels_batch'),
     path('hotel-booking/run/', hotel_views.run_hotel_search, name='run_hotel_search'),
+    path('hotel-booking/prices/history/', hotel_views.price_history, name='price_history'),
+    path('hotel-booking/prices/advice/', hotel_views.price_advice, name='price_advice'),
     path('hotel-booking/approve/', hotel_views.approve_booking, name='approve_booking'),
+    path('hotel-booking/auto-approve/', hotel_views.auto_approve_bookings, name='auto_approve_bookings'),
     path('hotel-booking/status/<str:job_id>/', hotel_views.booking_status, name='booking_status'),
     path('hotel-booking/history/', hotel_views.booking_history, name='booking_history'),
     path('hotel-booking/searches/', hotel_views.get_hotel_searches, name='get_hotel_searches'),
     path('hotel-booking/approvals/', hotel_views.get_booking_approvals, name='get_booking_approvals'),
     
+    # Internal housing inventory
+    path('housing/units/', hotel_views.housing_units, name='housing_units'),
+    path('housing/units/<str:unit_id>/', hotel_views.housing_unit_detail, name='housing_unit_detail'),
+    path('housing/nearest/', hotel_views.housing_nearest, name='housing_nearest'),
+    
     # Job data endpoints
     path('jobs/', hotel_views.list_jobs, name='list_jobs'),
+    path('jobs/sync/bulk/', hotel_views.sync_jobs_bulk, name='sync_jobs_bulk'),
     path('jobs/<str:job_id>/', hotel_views.job_detail, name='job_detail'),
     path('jobs/<str:job_id>/sync/', hotel_views.sync_job, name='sync_job'),
 ]
@@ -0,0 +1,214 @@
+"""
+Company Entity Resolution
+
+Leads spell the same company many ways. CompanyIndex maps each spelling to
+one canonical company so its enrichment is fetched once and reused:
+
+    'Pinnacle Developers LLC'        -> pinnacle developers   (exact, suffix dropped)
+    'Pinnacle Developers'            -> pinnacle developers   (exact)
+    'metrocc'                        -> metro commercial construction   (acronym)
+    'Metro Comercial Construction'   -> metro commercial construction   (fuzzy)
+
+Resolution tries, in order:
+
+    exact    normalized name (lowercase, punctuation and legal/generic suffixes
+             such as LLC, Inc, Group dropped), or the same name without spaces
+    acronym  one-word names against each company's initials ('mcc') and
+             first word + initials ('metrocc'), when only one company has it
+    fuzzy    Jaccard similarity of character trigrams >= threshold. Candidates
+             come from an inverted trigram index with prefix filtering: only
+             the query's rarest trigrams are looked up, since any company
+             similar enough must share at least one of them.
+
+Names that differ in their numbers ('Phase 1 Builders' / 'Phase 2 Builders')
+or in their word count ('Summit Builders' / 'Alpine Summit Builders') never
+fuzzy-match. A name that resolves to nothing becomes a new canonical
+company. All of it is in memory and a lookup takes microseconds.
+"""
+from collections import OrderedDict, namedtuple
+import math
+import re
+import threading
+import time
+
+
+# Words that don't distinguish one company from another when they end the name
+COMPANY_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+    'lp', 'llp', 'pllc', 'group', 'holdings',
+}
+# Words dropped anywhere in the name
+FILLER_WORDS = {'the', 'and'}
+
+CompanyMatch = namedtuple('CompanyMatch', ['key', 'name', 'method', 'score'])
+
+
+def words(value):
+    return re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).split()
+
+
+def normalize_company(company):
+    """'The Coastal Construction Group, LLC' -> 'coastal construction'"""
+    parts = [word for word in words(company) if word not in FILLER_WORDS]
+    while len(parts) > 1 and parts[-1] in COMPANY_SUFFIXES:
+        parts.pop()
+    return ' '.join(parts)
+
+
+def trigrams(key):
+    padded = f' {key} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _bucket(key):
+    """Fuzzy matches stay within names of the same word count"""
+    return key.count(' ') + 1
+
+
+def acronyms(key):
+    """Short forms of a multi-word name: 'mcc' and 'metrocc' for 'metro commercial construction'"""
+    parts = key.split()
+    if len(parts) < 2:
+        return set()
+    initials = ''.join(part[0] for part in parts)
+    return {initials, parts[0] + initials[1:]}
+
+
+def _numbers(key):
+    return frozenset(re.findall(r'\d+', key))
+
+
+class CompanyIndex:
+    """In-memory canonical company index (least recently resolved evicted past max_companies)"""
+
+    def __init__(self, threshold=0.8, max_companies=50000):
+        self.threshold = threshold
+        self.max_companies = max_companies
+        self._lock = threading.Lock()
+        self._companies = OrderedDict()  # key -> {'name', 'grams', 'numbers'}
+        self._compact = {}               # key without spaces -> key
+        self._acronyms = {}              # acronym -> set of keys
+        self._postings = {}              # (word count, trigram) -> set of keys
+        self._counters = {'exact': 0, 'acronym': 0, 'fuzzy': 0, 'new': 0}
+        self._resolve_seconds = 0.0
+
+    def __len__(self):
+        return len(self._companies)
+
+    def add(self, company):
+        """Index a company as canonical; returns its key"""
+        key = normalize_company(company)
+        if not key:
+            return None
+        with self._lock:
+            self._add(key, company)
+        return key
+
+    def _add(self, key, name):
+        if key in self._companies:
+            return
+        grams = trigrams(key)
+        self._companies[key] = {'name': name, 'grams': grams, 'numbers': _numbers(key)}
+        self._compact.setdefault(key.replace(' ', ''), key)
+        for acronym in acronyms(key):
+            self._acronyms.setdefault(acronym, set()).add(key)
+        bucket = _bucket(key)
+        for gram in grams:
+            self._postings.setdefault((bucket, gram), set()).add(key)
+        while len(self._companies) > self.max_companies:
+            self._remove(next(iter(self._companies)))
+
+    def _remove(self, key):
+        entry = self._companies.pop(key)
+        compact = key.replace(' ', '')
+        if self._compact.get(compact) == key:
+            del self._compact[compact]
+        for acronym in acronyms(key):
+            keys = self._acronyms.get(acronym)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._acronyms[acronym]
+        bucket = _bucket(key)
+        for gram in entry['grams']:
+            keys = self._postings.get((bucket, gram))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[(bucket, gram)]
+
+    def _match(self, key):
+        """(canonical key, method, score) or None"""
+        if key in self._companies:
+            return key, 'exact', 1.0
+        compact = key.replace(' ', '')
+        if compact in self._compact:
+            return self._compact[compact], 'exact', 1.0
+        if ' ' not in key:
+            keys = self._acronyms.get(key)
+            if keys and len(keys) == 1:
+                return next(iter(keys)), 'acronym', 1.0
+        return self._fuzzy(key)
+
+    def _fuzzy(self, key):
+        grams = trigrams(key)
+        size = len(grams)
+        # A company with Jaccard >= t shares at least ceil(t * |q|) trigrams with
+        # the query, so it must contain one of the |q| - ceil(t * |q|) + 1 rarest ones
+        required = math.ceil(self.threshold * size)
+        postings = [self._postings.get((_bucket(key), gram), ()) for gram in grams]
+        postings.sort(key=len)
+        candidates = set()
+        for keys in postings[:size - required + 1]:
+            candidates.update(keys)
+
+        numbers = _numbers(key)
+        best = None
+        for candidate in candidates:
+            entry = self._companies[candidate]
+            other = entry['grams']
+            # Length filter: Jaccard can't reach t if the sizes are too far apart
+            if not (self.threshold * len(other) <= size <= len(other) / self.threshold):
+                continue
+            if entry['numbers'] != numbers:
+                continue
+            shared = len(grams & other)
+            score = shared / (size + len(other) - shared)
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (candidate, 'fuzzy', score)
+        return best
+
+    def resolve(self, company, add=True):
+        """
+        CompanyMatch for a company name, or None for an empty one.
+        Unmatched names are indexed as new canonical companies unless add=False.
+        """
+        started = time.perf_counter()
+        key = normalize_company(company)
+        if not key:
+            return None
+        with self._lock:
+            found = self._match(key)
+            if found:
+                canonical, method, score = found
+                self._companies.move_to_end(canonical)
+                match = CompanyMatch(canonical, self._companies[canonical]['name'], method, round(score, 3))
+            else:
+                if add:
+                    self._add(key, company)
+                match = CompanyMatch(key, company, 'new', 1.0)
+            self._counters[match.method] += 1
+            self._resolve_seconds += time.perf_counter() - started
+        return match
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self._counters.values())
+            return {
+                'companies': len(self._companies),
+                'max_companies': self.max_companies,
+                'threshold': self.threshold,
+                'lookups': lookups,
+                'matches': dict(self._counters),
+                'avg_resolve_us': round(self._resolve_seconds / lookups * 1e6, 1) if lookups else None,
+            }
@@ -0,0 +1,180 @@
+"""
+Lead Enrichment with a Two-Level Result Cache
+
+A lead is enriched from two lookups, each cached separately:
+
+    company facts   keyed by canonical company (company_index.py resolves
+                    'Pinnacle Developers LLC', 'pinnacle developers' and
+                    near-misspellings to one entry); website, size, industry.
+                    Shared by every lead at that company.
+    person details  keyed by normalized (name, canonical company); title,
+                    email, phones, LinkedIn.
+
+Both levels are TTL + LRU CoalescingCaches, so concurrent bulk workers asking
+for the same company make one provider call. Lookups that find nothing are
+cached too, for NEGATIVE_TTL, so a list full of unknown companies doesn't
+re-query them on every run.
+
+Misses go to the web-search provider through one shared ProviderClient
+(provider.py), which paces, retries and pools connections across every
+request and bulk worker in the process.
+
+    enriched_data, cache = enrich(lead_data)
+    cache -> {'company': 'hit', 'person': 'miss'}
+"""
+from datetime import datetime
+from django.conf import settings
+import threading
+
+from api.cache import CoalescingCache
+from .company_index import CompanyIndex, words
+from .provider import ProviderClient
+from .stub_provider import mock_company, mock_person
+
+
+ENRICHMENT_SETTINGS = getattr(settings, 'LEAD_ENRICHMENT', {})
+COMPANY_CACHE_SETTINGS = ENRICHMENT_SETTINGS.get('COMPANY_CACHE', {})
+PERSON_CACHE_SETTINGS = ENRICHMENT_SETTINGS.get('PERSON_CACHE', {})
+PROVIDER_SETTINGS = ENRICHMENT_SETTINGS.get('PROVIDER', {})
+
+COMPANY_CACHE = CoalescingCache(
+    ttl=COMPANY_CACHE_SETTINGS.get('TTL', 30 * 24 * 60 * 60),
+    max_entries=COMPANY_CACHE_SETTINGS.get('MAX_ENTRIES', 20000)
+)
+PERSON_CACHE = CoalescingCache(
+    ttl=PERSON_CACHE_SETTINGS.get('TTL', 7 * 24 * 60 * 60),
+    max_entries=PERSON_CACHE_SETTINGS.get('MAX_ENTRIES', 100000)
+)
+
+# Shared client for the web-search provider; None -> in-process mock data
+PROVIDER_CLIENT = ProviderClient(
+    PROVIDER_SETTINGS['URL'],
+    api_key=PROVIDER_SETTINGS.get('API_KEY', ''),
+    rate=PROVIDER_SETTINGS.get('RATE', 10),
+    burst=PROVIDER_SETTINGS.get('BURST'),
+    initial_concurrency=PROVIDER_SETTINGS.get('INITIAL_CONCURRENCY', 4),
+    min_concurrency=PROVIDER_SETTINGS.get('MIN_CONCURRENCY', 1),
+    max_concurrency=PROVIDER_SETTINGS.get('MAX_CONCURRENCY', 16),
+    latency_target=PROVIDER_SETTINGS.get('LATENCY_TARGET'),
+    max_retries=PROVIDER_SETTINGS.get('MAX_RETRIES', 4),
+    backoff_base=PROVIDER_SETTINGS.get('BACKOFF_BASE', 0.5),
+    backoff_max=PROVIDER_SETTINGS.get('BACKOFF_MAX', 30),
+    timeout=PROVIDER_SETTINGS.get('TIMEOUT', 30)
+) if PROVIDER_SETTINGS.get('URL') else None
+
+COMPANY_INDEX_SETTINGS = ENRICHMENT_SETTINGS.get('COMPANY_INDEX', {})
+
+# Every spelling of a company resolves to one canonical key for both caches
+COMPANY_INDEX = CompanyIndex(
+    threshold=COMPANY_INDEX_SETTINGS.get('THRESHOLD', 0.8),
+    max_companies=COMPANY_INDEX_SETTINGS.get('MAX_COMPANIES', 50000)
+)
+
+_provider_calls = {'company': 0, 'person': 0}
+_provider_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """'  Dr. JOHN  Martinez ' -> 'dr john martinez'"""
+    return ' '.join(words(name))
+
+
+def _count_call(level):
+    with _provider_lock:
+        _provider_calls[level] += 1
+
+
+def fetch_company_facts(company):
+    """
+    Company facts from the provider, or None if nothing was found.
+    Without a configured PROVIDER URL the in-process mock answers.
+    """
+    _count_call('company')
+    if not company:
+        return None
+    if PROVIDER_CLIENT is None:
+        return mock_company(company)
+    return PROVIDER_CLIENT.company_facts(company)
+
+
+def fetch_person(name, company, company_facts):
+    """
+    Person details from the provider, or None if nothing was found.
+    The company's website domain (when known) helps the provider guess the email.
+    """
+    _count_call('person')
+    if not name:
+        return None
+    website = (company_facts or {}).get('company_website') or ''
+    domain = website.split('://')[-1].removeprefix('www.').rstrip('/') or None
+    if PROVIDER_CLIENT is None:
+        return mock_person(name, domain)
+    return PROVIDER_CLIENT.person(name, company, domain)
+
+
+def _negative_ttl(settings_dict):
+    negative_ttl = settings_dict.get('NEGATIVE_TTL', 24 * 60 * 60)
+    return lambda result: negative_ttl if result is None else None
+
+
+def company_facts(match):
+    """(facts or None, cache outcome) for a resolved company (CompanyMatch or None)"""
+    if match is None:
+        return None, 'skipped'
+    return COMPANY_CACHE.get_or_compute(
+        match.key, lambda: fetch_company_facts(match.name), ttl_for=_negative_ttl(COMPANY_CACHE_SETTINGS)
+    )
+
+
+def person_details(name, company, match, facts):
+    """(details or None, cache outcome) for a person at a resolved company"""
+    key = (normalize_name(name), match.key if match else '')
+    if not key[0]:
+        return None, 'skipped'
+    return PERSON_CACHE.get_or_compute(
+        key, lambda: fetch_person(name, company, facts), ttl_for=_negative_ttl(PERSON_CACHE_SETTINGS)
+    )
+
+
+def enrich(lead_data):
+    """
+    Enriched data for one lead, plus the cache outcome of each level.
+    The company is resolved to its canonical entry first, so every spelling
+    shares one set of company facts. Company facts are merged in at read
+    time, so a refreshed company entry shows up on every cached person there.
+    """
+    name = lead_data.get('name', '')
+    company = lead_data.get('company', '')
+    match = COMPANY_INDEX.resolve(company)
+    facts, company_outcome = company_facts(match)
+    person, person_outcome = person_details(name, company, match, facts)
+
+    enriched = {'name': name}
+    enriched.update(facts or {})
+    enriched.update(person or {})
+    enriched['company'] = company
+    if match is not None:
+        enriched['matched_company'] = match.name
+        enriched['company_match'] = match.method
+    if person is None:
+        enriched['confidence_score'] = 50 if facts else 0
+    enriched['found'] = facts is not None or person is not None
+    enriched['last_updated'] = datetime.utcnow().isoformat()
+    return enriched, {'company': company_outcome, 'person': person_outcome}
+
+
+def resolve_company(company):
+    """CompanyMatch for a company name without indexing it when unknown"""
+    return COMPANY_INDEX.resolve(company, add=False)
+
+
+def cache_stats():
+    with _provider_lock:
+        calls = dict(_provider_calls)
+    return {
+        'company': COMPANY_CACHE.stats(),
+        'person': PERSON_CACHE.stats(),
+        'company_index': COMPANY_INDEX.stats(),
+        'provider_calls': calls,
+        'provider': PROVIDER_CLIENT.stats() if PROVIDER_CLIENT else {'mode': 'mock'},
+    }
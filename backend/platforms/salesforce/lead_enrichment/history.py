@@ -0,0 +1,340 @@
+"""
+Indexed Enrichment History
+
+Filters and pages lead_enrichments.csv without reading the whole file per
+request. The CSV stays the source of truth; this keeps a few compact
+in-memory columns and secondary indexes next to it:
+
+    per row     created_at (ms), confidence_score, status code, company id
+    created_at  every row's sort key, newest last
+    company     normalized company name -> sort keys of its rows
+    status      status -> sort keys of its rows
+
+A sort key is one int64, (created_at ms since 2020 << 23) | row number, kept
+in sorted array('q')s. A query picks the smallest index that covers its
+filters, bisects to the date range, walks it newest-first and checks the
+remaining filters against the per-row columns. Only the rows on the page
+are read back from the CSV, by byte offset (api/csv_index.py).
+
+refresh() is the tail reader: the offset index scans only bytes appended
+since the last call and only those new rows are parsed into the indexes.
+Parsed columns are snapshotted to <csv>.history.npz every SNAPSHOT_EVERY
+new rows, so a restart only parses what was appended after the snapshot.
+
+    history.query(company='Pinnacle Developers', since='2026-10-01',
+                  min_confidence=80, status='completed', limit=50)
+    -> (rows, next_cursor)
+"""
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time as dt_time, timedelta
+import numpy as np
+import os
+import threading
+import warnings
+
+from api.csv_index import CSVOffsetIndex
+from api.pagination import InvalidCursor, decode_cursor, encode_cursor
+from .company_index import normalize_company
+
+
+ROW_BITS = 23  # up to 8M rows per file
+ROW_MASK = (1 << ROW_BITS) - 1
+EPOCH = datetime(2020, 1, 1)
+EPOCH_MS = int(np.datetime64(EPOCH, 'ms').astype(np.int64))
+NO_CONFIDENCE = -1
+
+
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def to_millis(value):
+    """Milliseconds since 2020-01-01 for a naive UTC ISO timestamp (0 if unparseable)"""
+    try:
+        moment = datetime.fromisoformat(value) if isinstance(value, str) else value
+    except ValueError:
+        return 0
+    if not isinstance(moment, datetime):
+        return 0
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return max(0, (moment - EPOCH) // MILLISECOND)
+
+
+def parse_bound(value, end=False):
+    """
+    Millisecond bound for a date or datetime filter.
+    A bare date covers the whole day, so until='2026-10-17' includes that day.
+    Raises ValueError when unparseable.
+    """
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        moment = datetime.combine(day + timedelta(days=1) if end else day, dt_time())
+        return to_millis(moment) - (1 if end else 0)
+    moment = datetime.fromisoformat(value)
+    return to_millis(moment)
+
+
+class EnrichmentHistory:
+    """Secondary indexes over an append-only enrichment CSV, refreshed from its tail"""
+
+    def __init__(self, csv_path, chunk_size=20000, snapshot_path=None, snapshot_every=10000):
+        self.index = CSVOffsetIndex(csv_path)
+        self.chunk_size = chunk_size
+        self.snapshot_path = snapshot_path or f'{csv_path}.history.npz'
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._saved_rows = 0
+        self._reset()
+
+    def _reset(self):
+        self._rows = 0
+        self._created = array('q')      # per row
+        self._confidence = array('h')   # per row, NO_CONFIDENCE when blank
+        self._status = array('H')       # per row, index into _status_names
+        self._company = array('I')      # per row, index into _company_keys
+        self._status_names = []
+        self._status_ids = {}
+        self._company_keys = []
+        self._company_ids = {}
+        self._raw_companies = {}        # company as written -> company id
+        self._by_created = array('q')   # sort keys, ascending
+        self._by_company = {}           # company id -> array('q') of sort keys
+        self._by_status = {}            # status id -> array('q') of sort keys
+
+    def __len__(self):
+        return self._rows
+
+    def refresh(self):
+        """Parse rows appended since the last refresh into the indexes; returns the row count"""
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+            total = self.index.refresh()
+            if total < self._rows:
+                # File was truncated or replaced
+                self._reset()
+                self._saved_rows = 0
+            columns = [
+                self.index.fieldnames.index(name) if name in self.index.fieldnames else None
+                for name in ('created_at', 'confidence_score', 'status', 'company')
+            ]
+            while self._rows < total:
+                rows = self.index.read_values(self._rows, min(self.chunk_size, total - self._rows))
+                if not rows:
+                    break
+                self._ingest(rows, columns)
+            if self._rows - self._saved_rows >= self.snapshot_every:
+                self._save_snapshot()
+            return self._rows
+
+    def _intern(self, value, names, ids):
+        found = ids.get(value)
+        if found is None:
+            found = ids[value] = len(names)
+            names.append(value)
+        return found
+
+    def _company_id(self, raw):
+        found = self._raw_companies.get(raw)
+        if found is None:
+            found = self._raw_companies[raw] = self._intern(
+                normalize_company(raw), self._company_keys, self._company_ids
+            )
+        return found
+
+    def _ingest(self, rows, columns):
+        """Append one chunk of parsed rows (value lists) to the columns and indexes"""
+        count = len(rows)
+        created_at, confidence_score, status, company = (
+            [values[i] if i < len(values) else '' for values in rows] if i is not None else [''] * count
+            for i in columns
+        )
+        created = _parse_millis(created_at)
+        confidence = _parse_confidence(confidence_score)
+        statuses = np.fromiter(
+            (self._intern(value, self._status_names, self._status_ids) for value in status),
+            dtype=np.uint16, count=count
+        )
+        companies = np.fromiter((self._company_id(value) for value in company), dtype=np.uint32, count=count)
+        self._append(created, confidence, statuses, companies)
+
+    def _append(self, created, confidence, statuses, companies):
+        """Add rows from column arrays to the per-row columns and the sorted indexes"""
+        count = len(created)
+        keys = (created << ROW_BITS) | np.arange(self._rows, self._rows + count, dtype=np.int64)
+
+        self._created.frombytes(created.tobytes())
+        self._confidence.frombytes(confidence.tobytes())
+        self._status.frombytes(statuses.tobytes())
+        self._company.frombytes(companies.tobytes())
+        self._rows += count
+
+        _merge(self._by_created, np.sort(keys).tolist())
+        for ids, index in ((companies, self._by_company), (statuses, self._by_status)):
+            # Group the chunk's keys by id, each group sorted
+            order = np.lexsort((keys, ids))
+            grouped_ids = ids[order]
+            grouped_keys = keys[order].tolist()
+            bounds = (np.flatnonzero(np.diff(grouped_ids)) + 1).tolist()
+            for start, end in zip([0] + bounds, bounds + [count]):
+                _merge(index.setdefault(int(grouped_ids[start]), array('q')), grouped_keys[start:end])
+
+    # ---- snapshot ------------------------------------------------------
+    # Parsed columns are saved next to the CSV, so a restart re-reads only
+    # rows appended after the snapshot instead of the whole file.
+
+    def _load_snapshot(self):
+        self._loaded = True
+        try:
+            with np.load(self.snapshot_path, allow_pickle=False) as snapshot:
+                rows, last_offset = (int(value) for value in snapshot['meta'])
+                columns = [snapshot[name] for name in ('created', 'confidence', 'status', 'company')]
+                status_names = snapshot['status_names'].tolist()
+                company_keys = snapshot['company_keys'].tolist()
+        except (OSError, KeyError, ValueError):
+            return
+        # Only trust it if the CSV still has the same row where the snapshot ended
+        if rows == 0 or any(len(column) != rows for column in columns) or self.index.refresh() < rows \
+                or self.index.offset(rows - 1) != last_offset:
+            return
+        self._status_names = status_names
+        self._status_ids = {name: i for i, name in enumerate(status_names)}
+        self._company_keys = company_keys
+        self._company_ids = {key: i for i, key in enumerate(company_keys)}
+        self._append(*columns)
+        self._saved_rows = rows
+
+    def _save_snapshot(self):
+        rows = self._rows
+        temp_path = f'{self.snapshot_path}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    meta=np.array([rows, self.index.offset(rows - 1)], dtype=np.int64),
+                    created=np.frombuffer(self._created, dtype=np.int64),
+                    confidence=np.frombuffer(self._confidence, dtype=np.int16),
+                    status=np.frombuffer(self._status, dtype=np.uint16),
+                    company=np.frombuffer(self._company, dtype=np.uint32),
+                    status_names=np.array(self._status_names, dtype=str),
+                    company_keys=np.array(self._company_keys, dtype=str)
+                )
+            os.replace(temp_path, self.snapshot_path)
+            self._saved_rows = rows
+        except OSError as e:
+            print(f"❌ Error writing enrichment history snapshot {self.snapshot_path}: {e}")
+
+    # ---- querying ------------------------------------------------------
+
+    def query(self, company=None, status=None, since=None, until=None,
+              min_confidence=None, max_confidence=None, cursor=None, limit=50):
+        """
+        One page of rows matching every given filter, newest first.
+        since/until are millisecond bounds from parse_bound(); cursor is the
+        next_cursor of the previous page. Returns (rows, next_cursor).
+        """
+        last_key = None
+        if cursor:
+            last_key = decode_cursor(cursor)
+            if not isinstance(last_key, int) or last_key < 0:
+                raise InvalidCursor('Invalid cursor')
+
+        with self._lock:
+            candidates = [self._by_created]
+            company_id = status_id = None
+            if company is not None:
+                company_id = self._company_ids.get(normalize_company(company))
+                if company_id is None:
+                    return [], None
+                candidates.append(self._by_company[company_id])
+            if status is not None:
+                status_id = self._status_ids.get(status)
+                if status_id is None:
+                    return [], None
+                candidates.append(self._by_status[status_id])
+            keys = min(candidates, key=len)
+
+            low = bisect_left(keys, since << ROW_BITS) if since is not None else 0
+            high = bisect_right(keys, (until << ROW_BITS) | ROW_MASK) if until is not None else len(keys)
+            if last_key is not None:
+                high = min(high, bisect_left(keys, last_key))
+
+            matches = []
+            position = high - 1
+            while position >= low and len(matches) <= limit:
+                number = keys[position] & ROW_MASK
+                position -= 1
+                if company_id is not None and self._company[number] != company_id:
+                    continue
+                if status_id is not None and self._status[number] != status_id:
+                    continue
+                confidence = self._confidence[number]
+                if min_confidence is not None and confidence < min_confidence:
+                    continue
+                if max_confidence is not None and (confidence == NO_CONFIDENCE or confidence > max_confidence):
+                    continue
+                matches.append(number)
+
+            more = len(matches) > limit
+            matches = matches[:limit]
+            next_cursor = None
+            if more:
+                last = matches[-1]
+                next_cursor = encode_cursor((self._created[last] << ROW_BITS) | last)
+
+        return self.index.read_selected(matches), next_cursor
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': self._rows,
+                'companies': len(self._company_keys),
+                'statuses': {name: len(self._by_status[i]) for i, name in enumerate(self._status_names)},
+            }
+
+
+def _confidence(value):
+    try:
+        return max(NO_CONFIDENCE, min(int(float(value)), 32767)) if value else NO_CONFIDENCE
+    except ValueError:
+        return NO_CONFIDENCE
+
+
+def _parse_millis(values):
+    """int64 array of to_millis() for a column of ISO timestamps"""
+    try:
+        with warnings.catch_warnings():
+            # Timezone-aware strings warn in NumPy; those take the per-row path
+            warnings.simplefilter('error')
+            parsed = np.array(values, dtype='datetime64[ms]')
+    except (ValueError, Warning):
+        return np.array([to_millis(value) for value in values], dtype=np.int64)
+    millis = parsed.astype(np.int64) - EPOCH_MS
+    millis[np.isnat(parsed)] = 0
+    return np.maximum(millis, 0)
+
+
+def _parse_confidence(values):
+    """int16 array of confidence scores, NO_CONFIDENCE where blank or invalid"""
+    try:
+        scores = np.array([value or NO_CONFIDENCE for value in values], dtype=np.float64)
+    except ValueError:
+        return np.array([_confidence(value) for value in values], dtype=np.int16)
+    scores[~np.isfinite(scores)] = NO_CONFIDENCE
+    return np.clip(scores, NO_CONFIDENCE, 32767).astype(np.int16)
+
+
+def _merge(keys, new_keys):
+    """
+    Add a sorted list of keys to a sorted array('q'). Rows arrive in nearly
+    created_at order, so this is almost always one bulk append.
+    """
+    if not new_keys:
+        return
+    split = bisect_left(new_keys, keys[-1]) if keys else 0
+    # Keys that sort before the current tail go in one at a time
+    for key in new_keys[:split]:
+        insort(keys, key)
+    keys.extend(new_keys[split:])
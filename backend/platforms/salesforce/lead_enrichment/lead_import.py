@@ -0,0 +1,251 @@
+"""
+Streaming Salesforce Lead Import
+
+Loads Salesforce report exports and Bulk API query results (CSV) into the
+Lead table without holding the file in memory:
+
+    parse    csv.reader over the stream, CHUNK_SIZE rows at a time
+    dedupe   within a chunk by Id (the most recently modified copy wins);
+             rows without an Id are matched on the hash of their email,
+             first within the chunk, then against stored leads
+    skip     rows last modified before the watermark (`since`), rows older
+             than the stored copy, and rows whose content hash is unchanged
+    upsert   one INSERT ... ON CONFLICT DO UPDATE per chunk
+
+Memory is one chunk plus its lookups whatever the file size, and each chunk
+costs two indexed lookups and one upsert. The latest LastModifiedDate seen
+becomes the run's watermark, so the next incremental run only writes what
+changed since:
+
+    for chunk in read_chunks(stream):
+        counts, latest = import_chunk(chunk, since=previous_watermark, import_id=import_id)
+
+Rows modified exactly at the watermark are read again: two records can share
+a timestamp, and the content hash makes the re-read free.
+"""
+from datetime import datetime, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+import csv
+import hashlib
+import re
+
+from api.models import Lead
+
+
+# Salesforce report headers and Bulk API field names -> lead keys (matched case-insensitively)
+LEAD_COLUMNS = {
+    'id': 'id', 'lead id': 'id',
+    'name': 'name', 'full name': 'name',
+    'first name': 'first_name', 'firstname': 'first_name',
+    'last name': 'last_name', 'lastname': 'last_name',
+    'company': 'company', 'company / account': 'company', 'account name': 'company',
+    'email': 'email', 'phone': 'phone', 'title': 'title',
+    'lead status': 'status', 'status': 'status',
+    'lead source': 'lead_source', 'leadsource': 'lead_source',
+    'last modified date': 'last_modified', 'lastmodifieddate': 'last_modified',
+}
+
+# Lead fields an import writes; content_hash covers them
+LEAD_FIELDS = ('name', 'company', 'email', 'phone', 'title', 'status', 'lead_source')
+FIELD_LENGTHS = {field: Lead._meta.get_field(field).max_length for field in LEAD_FIELDS}
+UPSERT_FIELDS = LEAD_FIELDS + ('email_hash', 'last_modified', 'content_hash', 'import_id', 'updated_at')
+
+COUNTERS = ('rows', 'created', 'updated', 'unchanged', 'stale', 'duplicates', 'invalid', 'skipped')
+
+# Report exports use the running user's locale; these are the US formats
+REPORT_DATE_FORMATS = ('%m/%d/%Y, %I:%M %p', '%m/%d/%Y %I:%M %p', '%m/%d/%Y %H:%M', '%m/%d/%Y')
+
+# Anything else in the Id column (report footers such as "Grand Totals (120 records)") is not a lead
+LEAD_ID_PATTERN = re.compile(r'[\w-]{1,40}')
+ID_SUFFIX_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ012345'
+
+
+class ImportFormatError(Exception):
+    """The file is not a lead export the importer can read"""
+
+
+def salesforce_id(value):
+    """
+    Canonical record Id: 15-character (case-sensitive) Ids from reports get the
+    checksum suffix of the 18-character form the API returns, so both match.
+    None for a blank or malformed Id.
+    """
+    value = (value or '').strip()
+    if not LEAD_ID_PATTERN.fullmatch(value):
+        return None
+    if len(value) == 15 and value.isalnum():
+        suffix = ''
+        for start in range(0, 15, 5):
+            bits = sum(1 << i for i, char in enumerate(value[start:start + 5]) if 'A' <= char <= 'Z')
+            suffix += ID_SUFFIX_ALPHABET[bits]
+        return value + suffix
+    return value
+
+
+def email_hash(email):
+    email = (email or '').strip().lower()
+    return hashlib.sha256(email.encode('utf-8')).hexdigest() if email else ''
+
+
+def parse_modified(value):
+    """
+    LastModifiedDate as an aware UTC datetime, or None.
+    Accepts API timestamps ('2026-10-17T08:15:00.000Z', '...+0000') and
+    report dates ('10/17/2026, 8:15 AM', read as UTC).
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        for date_format in REPORT_DATE_FORMATS:
+            try:
+                moment = datetime.strptime(value, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment.astimezone(dt_timezone.utc)
+
+
+def read_chunks(stream, chunk_size=2000):
+    """
+    Lists of up to chunk_size lead dicts from CSV text (a file or any
+    iterable of lines), parsed lazily. Raises ImportFormatError when the
+    header has neither an Id nor an Email column.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = []
+    for index, column in enumerate(header):
+        key = LEAD_COLUMNS.get(column.strip().lstrip('\ufeff').lower())
+        if key:
+            columns.append((index, key))
+    if not any(key in ('id', 'email') for _, key in columns):
+        raise ImportFormatError('CSV needs an Id or Email column')
+
+    chunk = []
+    for row in reader:
+        if not row:
+            continue
+        lead = {}
+        for index, key in columns:
+            if index < len(row):
+                value = row[index].strip()
+                if value:
+                    lead[key] = value
+        first, last = lead.pop('first_name', ''), lead.pop('last_name', '')
+        if not lead.get('name') and (first or last):
+            lead['name'] = f'{first} {last}'.strip()
+        chunk.append(lead)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def content_hash(record):
+    joined = '\x1f'.join(record[field] for field in LEAD_FIELDS)
+    return hashlib.blake2b(joined.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _newer(record, other):
+    """Whether record should replace other (later modification, or later row on a tie)"""
+    if record['last_modified'] is None or other['last_modified'] is None:
+        return True
+    return record['last_modified'] >= other['last_modified']
+
+
+def import_chunk(leads, since=None, import_id=''):
+    """
+    Dedupe and upsert one chunk of lead dicts (from read_chunks).
+    Returns (counts, latest LastModifiedDate in the chunk or None).
+    """
+    counts = dict.fromkeys(COUNTERS, 0)
+    counts['rows'] = len(leads)
+    latest = None
+
+    by_id = {}         # lead id -> record
+    by_email = {}      # email hash -> record, for rows without an Id
+    for lead in leads:
+        lead_id = salesforce_id(lead.get('id'))
+        hashed = email_hash(lead.get('email'))
+        if not lead_id and not hashed:
+            counts['invalid'] += 1
+            continue
+        modified = parse_modified(lead.get('last_modified'))
+        if modified is not None and (latest is None or modified > latest):
+            latest = modified
+        if since is not None and modified is not None and modified < since:
+            counts['skipped'] += 1
+            continue
+        record = {field: lead.get(field, '')[:FIELD_LENGTHS[field]] for field in LEAD_FIELDS}
+        record.update(id=lead_id, email_hash=hashed, last_modified=modified)
+        seen = by_id if lead_id else by_email
+        key = lead_id or hashed
+        if key in seen:
+            counts['duplicates'] += 1
+            if not _newer(record, seen[key]):
+                continue
+        seen[key] = record
+
+    with transaction.atomic():
+        if by_email:
+            # Id-less rows belong to the lead with that email: in this chunk, else stored, else a new one
+            chunk_ids = {record['email_hash']: lead_id for lead_id, record in by_id.items() if record['email_hash']}
+            stored_ids = {}
+            for hashed, lead_id in (
+                Lead.objects.filter(email_hash__in=list(by_email)).order_by('id').values_list('email_hash', 'id')
+            ):
+                stored_ids.setdefault(hashed, lead_id)
+            for hashed, record in by_email.items():
+                lead_id = chunk_ids.get(hashed) or stored_ids.get(hashed) or f'email-{hashed[:32]}'
+                record['id'] = lead_id
+                if lead_id in by_id:
+                    counts['duplicates'] += 1
+                    if not _newer(record, by_id[lead_id]):
+                        continue
+                by_id[lead_id] = record
+
+        existing = {
+            row['id']: row
+            for row in Lead.objects.filter(id__in=list(by_id)).values('id', 'content_hash', 'last_modified')
+        }
+        now = timezone.now()
+        upserts = []
+        for lead_id, record in by_id.items():
+            record['content_hash'] = content_hash(record)
+            stored = existing.get(lead_id)
+            if stored is not None:
+                if stored['content_hash'] == record['content_hash']:
+                    counts['unchanged'] += 1
+                    continue
+                if (stored['last_modified'] and record['last_modified']
+                        and record['last_modified'] < stored['last_modified']):
+                    counts['stale'] += 1
+                    continue
+                counts['updated'] += 1
+            else:
+                counts['created'] += 1
+            upserts.append(Lead(**record, import_id=import_id, created_at=now, updated_at=now))
+
+        if upserts:
+            # created_at is left out of the update, so it keeps the first import's time
+            Lead.objects.bulk_create(
+                upserts, update_conflicts=True, unique_fields=['id'], update_fields=list(UPSERT_FIELDS)
+            )
+    return counts, latest
+
+
+def add_counts(total, counts):
+    for name, value in counts.items():
+        total[name] = total.get(name, 0) + value
+    return total
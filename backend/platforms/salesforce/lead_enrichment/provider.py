@@ -0,0 +1,341 @@
+"""
+Enrichment Provider Client
+
+HTTP client for the web-search enrichment provider, built to run at bulk
+volume without tripping the provider's rate limits:
+
+    token bucket    requests start at most RATE/s (bursts up to BURST);
+                    a 429 with Retry-After pauses the whole bucket
+    AIMD limit      in-flight requests are capped by an adaptive limit that
+                    grows by 1/limit per fast success and halves on a 429 or
+                    a response slower than LATENCY_TARGET
+    retries         429, 5xx and connection errors are retried with full
+                    jitter exponential backoff (Retry-After wins when longer)
+    keep-alive      connections are pooled and reused across requests
+
+    client = ProviderClient('http://127.0.0.1:8765', api_key='...')
+    client.company_facts('Coastal Construction Group')  -> dict or None
+    client.person('John Martinez', 'Coastal Construction Group', domain)
+
+Nothing here imports Django, so the stub provider and benchmarks can use it
+standalone; enrichment.py builds the shared client from settings.
+"""
+from urllib.parse import urlsplit
+import http.client
+import json
+import queue
+import random
+import socket
+import threading
+import time
+
+
+class ProviderError(Exception):
+    """The provider could not answer after all retries"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` banked"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # Nothing accrues while paused (_updated sits at the end of the pause)
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, sleeping until one is available. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds` (provider asked us to back off) and drain the bank"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit.
+    Additive increase (+1/limit per fast success), multiplicative decrease
+    on throttling or slow responses. Only requests that started after the last
+    decrease can trigger another one, so a burst of 429s from one overload
+    halves the limit once instead of collapsing it to the minimum.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, latency_target=None, decrease=0.5):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Wait for an in-flight slot; returns the start time to pass to release()"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                return None
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, overloaded=False):
+        """Give back a slot. overloaded=True for 429s; slow responses count as overloaded too."""
+        now = time.monotonic()
+        if self.latency_target and now - started > self.latency_target:
+            overloaded = True
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, most recently used first"""
+
+    def __init__(self, base_url, size=16, timeout=30):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.opened = 0
+        self.reused = 0
+
+    def get(self):
+        """(connection, reused)"""
+        try:
+            conn = self._idle.get_nowait()
+            self.reused += 1
+            return conn, True
+        except queue.Empty:
+            pass
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        self.opened += 1
+        return cls(self.host, self.port, timeout=self.timeout), False
+
+    def put(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def discard(self, conn):
+        conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def idle(self):
+        return self._idle.qsize()
+
+
+# Transport failures worth retrying on a fresh connection
+CONNECTION_ERRORS = (http.client.HTTPException, ConnectionError, socket.timeout, OSError)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ProviderClient:
+    """Rate-limited, retrying JSON client for the enrichment provider"""
+
+    def __init__(self, base_url, api_key='', rate=10, burst=None, initial_concurrency=4,
+                 min_concurrency=1, max_concurrency=16, latency_target=None, max_retries=4,
+                 backoff_base=0.5, backoff_max=30, timeout=30, pool_size=None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = AdaptiveLimit(initial_concurrency, min_concurrency, max_concurrency, latency_target)
+        self.pool = ConnectionPool(base_url, size=pool_size or max_concurrency, timeout=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._counters = {
+            'requests': 0, 'succeeded': 0, 'not_found': 0, 'failed': 0,
+            'attempts': 0, 'retries': 0, 'throttled': 0, 'server_errors': 0, 'connection_errors': 0,
+        }
+        self._latency_total = 0.0
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    def backoff(self, attempt, retry_after=None):
+        """Full jitter: uniform(0, min(max, base * 2^attempt)), never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _send(self, method, path, body):
+        """One HTTP exchange on a pooled connection: (status, headers, payload bytes)"""
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        path = self.pool.base_path + path
+        conn, reused = self.pool.get()
+        try:
+            response, payload = _exchange(conn, method, path, body, headers)
+        except CONNECTION_ERRORS:
+            self.pool.discard(conn)
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry once on a new one
+            conn, _ = self.pool.get()
+            try:
+                response, payload = _exchange(conn, method, path, body, headers)
+            except CONNECTION_ERRORS:
+                self.pool.discard(conn)
+                raise
+        if response.will_close:
+            self.pool.discard(conn)
+        else:
+            self.pool.put(conn)
+        return response.status, response.headers, payload
+
+    def request(self, method, path, data=None):
+        """
+        Decoded JSON object for a successful call, None for 404.
+        Raises ProviderError once retries are exhausted, on a non-retryable
+        status, or when a 2xx body is not a JSON object.
+        """
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        self._count(requests=1)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count(retries=1)
+            self.bucket.acquire()
+            started = self.limit.acquire()
+            self._count(attempts=1)
+            retry_after = None
+            try:
+                status, headers, payload = self._send(method, path, body)
+            except CONNECTION_ERRORS as e:
+                self.limit.release(started, overloaded=True)
+                self._count(connection_errors=1)
+                last_error = ProviderError(f'Connection to enrichment provider failed: {e}')
+            else:
+                throttled = status == 429
+                self.limit.release(started, overloaded=throttled)
+                with self._lock:
+                    self._latency_total += time.monotonic() - started
+                if status == 404:
+                    self._count(not_found=1)
+                    return None
+                if 200 <= status < 300:
+                    try:
+                        result = json.loads(payload) if payload else {}
+                    except ValueError:
+                        result = None
+                    if not isinstance(result, dict):
+                        # e.g. a proxy's HTML error page: not retried, the same proxy would answer again
+                        self._count(failed=1)
+                        raise ProviderError(f'Enrichment provider returned {status} without a JSON object',
+                                            status=status)
+                    self._count(succeeded=1)
+                    return result
+                if status not in RETRY_STATUSES:
+                    self._count(failed=1)
+                    raise ProviderError(f'Enrichment provider returned {status}', status=status)
+                if throttled:
+                    self._count(throttled=1)
+                    retry_after = _retry_after(headers.get('Retry-After'))
+                    if retry_after:
+                        self.bucket.pause(retry_after)
+                else:
+                    self._count(server_errors=1)
+                last_error = ProviderError(f'Enrichment provider returned {status}', status=status)
+            if attempt < self.max_retries:
+                time.sleep(self.backoff(attempt, retry_after))
+        self._count(failed=1)
+        raise last_error
+
+    def company_facts(self, company):
+        """Company facts dict, or None if the provider knows nothing about it"""
+        result = self.request('POST', '/v1/company', {'company': company})
+        return result.get('company') if result else None
+
+    def person(self, name, company, domain=None):
+        """Person details dict, or None if the provider found nobody"""
+        result = self.request('POST', '/v1/person', {'name': name, 'company': company, 'domain': domain})
+        return result.get('person') if result else None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            latency_total = self._latency_total
+        answered = counters['attempts'] - counters['connection_errors']
+        return {
+            **counters,
+            'avg_latency_ms': round(latency_total / answered * 1000, 1) if answered else None,
+            'concurrency_limit': round(self.limit.limit, 2),
+            'in_flight': self.limit.in_flight,
+            'rate_per_second': self.bucket.rate,
+            'tokens_available': round(self.bucket.available(), 2),
+            'connections_opened': self.pool.opened,
+            'connections_reused': self.pool.reused,
+            'connections_idle': self.pool.idle(),
+        }
+
+
+def _exchange(conn, method, path, body, headers):
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds form only)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,261 @@
+"""
+Priority-Scheduled Enrichment Queue
+
+Provider calls are the scarce resource, so queued leads are enriched
+highest value first, under a per-hour call budget:
+
+    score = STATUS_WEIGHTS[status]                     New 3, Qualified 4, Enriched 0, ...
+          + MISSING_FIELD_WEIGHT * blank(email, phone, title)
+          - AGE_WEIGHT_PER_DAY * days since the lead was created
+
+The age term falls at the same rate for every lead, so relative order never
+changes with time: the heap key is fixed at enqueue (score + AGE_WEIGHT_PER_DAY
+* created day) and today's score is key - AGE_WEIGHT_PER_DAY * today.
+
+Each dispatch reserves CALLS_PER_LEAD calls (company + person) from a rolling
+one-hour window, so in-flight leads can't overshoot the budget; cache hits
+refund their share once the lead is done. With the budget spent, the queue
+waits for the oldest calls to age out of the window. The budget lives in this
+process: with several workers, give each its share of the provider quota.
+
+    scheduler = EnrichmentScheduler(run, calls_per_hour=600)
+    scheduler.submit([(enrichment_id, lead_data), ...])
+    scheduler.stats()   -> depth, wait times, budget burn
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import heapq
+import itertools
+import threading
+import time
+
+
+DEFAULT_STATUS_WEIGHTS = {
+    'qualified': 4.0,
+    'new': 3.0,
+    'open - not contacted': 3.0,
+    'contacted': 2.0,
+    'working - contacted': 2.0,
+    'enriched': 0.0,
+    'closed - converted': 0.0,
+    'closed - not converted': 0.0,
+}
+MISSING_FIELDS = ('email', 'phone', 'title')
+DAY = 24 * 60 * 60
+
+
+def _created_timestamp(lead_data, default):
+    try:
+        return datetime.fromisoformat(str(lead_data['created_at'])).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class CallBudget:
+    """Provider calls allowed per rolling window (not thread-safe; EnrichmentScheduler locks it)"""
+
+    def __init__(self, limit, window=60 * 60):
+        self.limit = max(1, int(limit))
+        self.window = window
+        self._spent = deque()  # [timestamp, calls, in window], oldest first
+        self.used = 0
+
+    def _expire(self, now):
+        while self._spent and self._spent[0][0] <= now - self.window:
+            entry = self._spent.popleft()
+            self.used -= entry[1]
+            entry[2] = False
+
+    def wait_time(self, cost, now):
+        """Seconds until `cost` more calls fit in the window (0: now)"""
+        self._expire(now)
+        excess = self.used + min(cost, self.limit) - self.limit
+        if excess <= 0:
+            return 0.0
+        for timestamp, calls, _ in self._spent:
+            excess -= calls
+            if excess <= 0:
+                return timestamp + self.window - now
+        return self.window
+
+    def spend(self, cost, now):
+        """Reserve calls; returns the entry to settle() once the actual count is known"""
+        self._expire(now)
+        entry = [now, cost, True]
+        self._spent.append(entry)
+        self.used += cost
+        return entry
+
+    def settle(self, entry, calls):
+        if entry[2]:
+            self.used += calls - entry[1]
+            entry[1] = calls
+
+    def burned(self, since, now):
+        """Calls spent since a timestamp (within the window)"""
+        self._expire(now)
+        return sum(calls for timestamp, calls, _ in self._spent if timestamp >= since)
+
+
+class EnrichmentScheduler:
+    """
+    In-memory priority queue of leads drained by a dispatcher thread onto
+    `concurrency` workers. run(enrichment_id, lead_data) enriches one lead
+    and returns the provider calls it made; if it raises, the lead counts as
+    failed and its reservation stays spent.
+    """
+
+    def __init__(self, run, calls_per_hour=600, calls_per_lead=2, concurrency=4, max_queued=100000,
+                 status_weights=None, default_status_weight=1.0, missing_field_weight=1.0,
+                 age_weight_per_day=0.1):
+        self.run = run
+        self.budget = CallBudget(calls_per_hour)
+        self.calls_per_lead = calls_per_lead
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max_queued
+        self.status_weights = status_weights or DEFAULT_STATUS_WEIGHTS
+        self.default_status_weight = default_status_weight
+        self.missing_field_weight = missing_field_weight
+        self.age_weight_per_day = age_weight_per_day
+        self._heap = []                # [-key, seq, entry]
+        self._queued = set()           # lead keys queued or in flight, to drop repeats
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = None
+        self.in_flight = 0
+        self._waits = deque(maxlen=1000)   # seconds queued, most recent dispatches
+        self._counters = {
+            'enqueued': 0, 'duplicates': 0, 'dispatched': 0, 'completed': 0, 'failed': 0,
+            'provider_calls': 0, 'budget_waits': 0,
+        }
+
+    def score(self, lead_data, now=None):
+        """Today's priority score of a lead (see module docstring)"""
+        now = now or time.time()
+        return self._key(lead_data, now) - self.age_weight_per_day * now / DAY
+
+    def _key(self, lead_data, now):
+        status = str(lead_data.get('status') or '').strip().lower()
+        missing = sum(1 for field in MISSING_FIELDS if not str(lead_data.get(field) or '').strip())
+        base = self.status_weights.get(status, self.default_status_weight) + self.missing_field_weight * missing
+        return base + self.age_weight_per_day * _created_timestamp(lead_data, now) / DAY
+
+    def submit(self, items):
+        """
+        Queue (enrichment_id, lead_data) pairs.
+        Returns (queued ids, duplicate ids, ids refused because the queue is full).
+        A lead already queued or in flight (same lead id) is a duplicate.
+        """
+        now = time.time()
+        queued, duplicates, refused = [], [], []
+        with self._cond:
+            for enrichment_id, lead_data in items:
+                lead_key = lead_data.get('id') or enrichment_id
+                if lead_key in self._queued:
+                    duplicates.append(enrichment_id)
+                    continue
+                if len(self._heap) >= self.max_queued:
+                    refused.append(enrichment_id)
+                    continue
+                entry = {'id': enrichment_id, 'lead_key': lead_key, 'lead_data': lead_data, 'queued_at': now}
+                heapq.heappush(self._heap, [-self._key(lead_data, now), next(self._sequence), entry])
+                self._queued.add(lead_key)
+                queued.append(enrichment_id)
+            self._counters['enqueued'] += len(queued)
+            self._counters['duplicates'] += len(duplicates)
+            if queued:
+                self._start()
+                self._cond.notify_all()
+        return queued, duplicates, refused
+
+    def _start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='lead-queue')
+            threading.Thread(target=self._dispatch_loop, name='lead-queue-dispatcher', daemon=True).start()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap or self.in_flight >= self.concurrency:
+                        self._cond.wait()
+                        continue
+                    now = time.time()
+                    wait = self.budget.wait_time(self.calls_per_lead, now)
+                    if wait > 0:
+                        self._counters['budget_waits'] += 1
+                        self._cond.wait(timeout=wait)
+                        continue
+                    break
+                _, _, entry = heapq.heappop(self._heap)
+                reservation = self.budget.spend(min(self.calls_per_lead, self.budget.limit), now)
+                self.in_flight += 1
+                self._counters['dispatched'] += 1
+                self._waits.append(now - entry['queued_at'])
+            self._executor.submit(self._run_one, entry, reservation)
+
+    def _run_one(self, entry, reservation):
+        outcome = 'completed'
+        calls = None
+        try:
+            calls = self.run(entry['id'], entry['lead_data'])
+        except Exception as e:
+            print(f"❌ Queued enrichment {entry['id']} failed: {e}")
+            outcome = 'failed'
+        with self._cond:
+            if calls is not None:
+                self.budget.settle(reservation, calls)
+            self._counters['provider_calls'] += reservation[1] if calls is None else calls
+            self._counters[outcome] += 1
+            self._queued.discard(entry['lead_key'])
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def stats(self, preview=10):
+        now = time.time()
+        with self._cond:
+            waits = sorted(self._waits)
+            oldest = min((entry['queued_at'] for _, _, entry in self._heap), default=None)
+            next_up = [
+                {
+                    'enrichment_id': entry['id'],
+                    'lead_id': entry['lead_data'].get('id'),
+                    'name': entry['lead_data'].get('name'),
+                    'company': entry['lead_data'].get('company'),
+                    'status': entry['lead_data'].get('status'),
+                    'score': round(-key - self.age_weight_per_day * now / DAY, 2),
+                    'waiting_seconds': round(now - entry['queued_at'], 1),
+                }
+                for key, _, entry in heapq.nsmallest(preview, self._heap)
+            ]
+            budget_wait = self.budget.wait_time(self.calls_per_lead, now)
+            budget = {
+                'calls_per_hour': self.budget.limit,
+                'calls_per_lead': self.calls_per_lead,
+                'used_last_hour': self.budget.used,
+                'remaining': max(0, self.budget.limit - self.budget.used),
+                'burned_last_5_minutes': self.budget.burned(now - 5 * 60, now),
+                'exhausted': budget_wait > 0,
+                'seconds_until_capacity': round(budget_wait, 1),
+            }
+            return {
+                'depth': len(self._heap),
+                'in_flight': self.in_flight,
+                'concurrency': self.concurrency,
+                'oldest_wait_seconds': round(now - oldest, 1) if oldest is not None else None,
+                'wait_seconds': {
+                    'samples': len(waits),
+                    'avg': round(sum(waits) / len(waits), 2) if waits else None,
+                    'p50': round(_percentile(waits, 0.5), 2) if waits else None,
+                    'p95': round(_percentile(waits, 0.95), 2) if waits else None,
+                    'max': round(waits[-1], 2) if waits else None,
+                },
+                'budget': budget,
+                **self._counters,
+                'next_up': next_up,
+            }
@@ -0,0 +1,233 @@
+"""
+Local Stub Enrichment Provider
+
+A stand-in for the web-search enrichment provider that behaves like a real
+rate-limited API, so the provider client can be exercised and benchmarked
+offline:
+
+    python -m platforms.salesforce.lead_enrichment.stub_provider --port 8765 \\
+        --rate 20 --burst 20 --max-concurrent 8 --latency 0.05,0.2 --error-rate 0.02
+
+    POST /v1/company  {"company": ...}                    -> {"company": {...}} | 404
+    POST /v1/person   {"name": ..., "company": ..., "domain": ...} -> {"person": {...}} | 404
+    GET  /stats
+
+Requests over --rate/--burst or over --max-concurrent get 429 with a
+Retry-After (fractional seconds). Latency grows with --load-latency per
+request in flight, so overload shows up as slow responses before it shows
+up as 429s. --error-rate answers a share of requests with 503.
+
+mock_company() / mock_person() are also used in-process when no provider URL
+is configured.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import threading
+import time
+
+from .company_index import normalize_company
+from .provider import TokenBucket
+
+
+TITLES = [
+    "Vice President of Operations",
+    "Director of Construction",
+    "Project Manager",
+    "General Manager",
+    "Chief Operating Officer",
+    "President",
+    "Owner",
+    "Estimator",
+    "Superintendent"
+]
+
+
+def company_domain(company):
+    """'Coastal Construction Group, LLC' -> 'coastalconstruction.com'"""
+    return f"{normalize_company(company).replace(' ', '') or 'company'}.com"
+
+
+def mock_company(company):
+    """Made-up company facts, or None for an empty name"""
+    if not company:
+        return None
+    return {
+        'company': company,
+        'company_website': f"https://www.{company_domain(company)}",
+        'company_size': random.choice(['1-10', '11-50', '51-200', '201-500', '500+']),
+        'industry': random.choice(['Construction', 'Real Estate', 'General Contracting', 'Commercial Construction']),
+        'location': random.choice(['Florida', 'Texas', 'California', 'New York', 'Arizona']),
+    }
+
+
+def mock_person(name, domain=None):
+    """Made-up person details, or None for an empty name"""
+    if not name:
+        return None
+    first_name = name.split()[0]
+    last_name = name.split()[-1] if len(name.split()) > 1 else "User"
+    domain = domain or 'company.com'
+    return {
+        'name': name,
+        'title': random.choice(TITLES),
+        'email': f"{first_name.lower()}.{last_name.lower()}@{domain}",
+        'phone': f"+1 ({random.randint(200, 999)}) {random.randint(200, 999)}-{random.randint(1000, 9999)}",
+        'mobile': f"+1 ({random.randint(200, 999)}) {random.randint(200, 999)}-{random.randint(1000, 9999)}",
+        'linkedin': f"https://linkedin.com/in/{first_name.lower()}-{last_name.lower()}-{random.randint(1000, 9999)}",
+        'confidence_score': random.randint(75, 98),
+        'sources_checked': ['LinkedIn', 'Company Website', 'Business Directories', 'News Articles'],
+    }
+
+
+class StubProviderServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server holding the simulated limits and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, rate=20, burst=None, max_concurrent=8, latency=(0.05, 0.2),
+                 load_latency=0.01, error_rate=0.0, not_found_rate=0.0):
+        super().__init__(address, StubProviderHandler)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrent = max_concurrent
+        self.latency = latency
+        self.load_latency = load_latency
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {'requests': 0, 'ok': 0, 'not_found': 0, 'throttled': 0, 'errors': 0, 'peak_in_flight': 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def admit(self):
+        """None if the request may run, else the Retry-After seconds for a 429"""
+        with self.lock:
+            self.counters['requests'] += 1
+            if self.in_flight >= self.max_concurrent:
+                self.counters['throttled'] += 1
+                return 0.1
+            if not self.bucket.acquire(timeout=0):
+                self.counters['throttled'] += 1
+                return round((1 - self.bucket.available()) / self.bucket.rate, 3)
+            self.in_flight += 1
+            self.counters['peak_in_flight'] = max(self.counters['peak_in_flight'], self.in_flight)
+            return None
+
+    def finish(self, outcome):
+        with self.lock:
+            self.in_flight -= 1
+            self.counters[outcome] += 1
+
+    def simulated_latency(self):
+        low, high = self.latency
+        return random.uniform(low, high) + self.in_flight * self.load_latency
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so the client's pool is exercised
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/stats':
+            return self._reply(404, {'error': 'Not found'})
+        with self.server.lock:
+            return self._reply(200, {**self.server.counters, 'in_flight': self.server.in_flight})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {'error': 'Invalid JSON'})
+        if self.path not in ('/v1/company', '/v1/person'):
+            return self._reply(404, {'error': 'Not found'})
+
+        server = self.server
+        retry_after = server.admit()
+        if retry_after is not None:
+            return self._reply(429, {'error': 'Rate limit exceeded'}, {'Retry-After': str(retry_after)})
+        outcome = 'ok'
+        try:
+            time.sleep(server.simulated_latency())
+            if random.random() < server.error_rate:
+                outcome = 'errors'
+                return self._reply(503, {'error': 'Upstream search failed'})
+            if self.path == '/v1/company':
+                result = mock_company(data.get('company')) if random.random() >= server.not_found_rate else None
+                key = 'company'
+            else:
+                result = mock_person(data.get('name'), data.get('domain') or company_domain(data.get('company')))
+                key = 'person'
+            if result is None:
+                outcome = 'not_found'
+                return self._reply(404, {'error': 'No match'})
+            return self._reply(200, {key: result})
+        finally:
+            server.finish(outcome)
+
+
+def start_stub_provider(host='127.0.0.1', port=0, **options):
+    """Run a stub provider on a daemon thread; returns the server (see .base_url, .shutdown())"""
+    server = StubProviderServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='stub-provider', daemon=True).start()
+    return server
+
+
+def parse_latency(value):
+    """'0.1' -> (0.1, 0.1); '0.05,0.2' -> (0.05, 0.2)"""
+    parts = [float(p) for p in str(value).split(',')]
+    return (parts[0], parts[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stub enrichment provider with simulated rate limits and latency')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=20, help='Requests per second before 429s')
+    parser.add_argument('--burst', type=float, default=None)
+    parser.add_argument('--max-concurrent', type=int, default=8, help='In-flight requests before 429s')
+    parser.add_argument('--latency', default='0.05,0.2', help='Seconds, or "min,max"')
+    parser.add_argument('--load-latency', type=float, default=0.01, help='Extra seconds per request in flight')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='Share of companies with no match')
+    args = parser.parse_args(argv)
+
+    server = StubProviderServer(
+        (args.host, args.port),
+        rate=args.rate,
+        burst=args.burst,
+        max_concurrent=args.max_concurrent,
+        latency=parse_latency(args.latency),
+        load_latency=args.load_latency,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate
+    )
+    print(f"🧪 Stub enrichment provider on {server.base_url} "
+          f"({args.rate:g}/s, {args.max_concurrent} concurrent, latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Local Salesforce Stand-in
+
+Deterministic lead exports in the Bulk API CSV layout, so the importer can be
+run (and re-run incrementally) without a Salesforce org:
+
+    export_lines(count=100000)                       -> CSV lines, header first
+    export_lines(count=100000, touched=500)          -> the first 500 leads edited since
+    export_lines(count=120000, touched=500,
+                 modified_since=watermark)           -> only what changed after watermark
+
+Lead n is the same on every call: LastModifiedDate is EPOCH + n minutes, so a
+bigger `count` appends newer leads. `touched` is a mass update of the first
+leads: a new status, all stamped just before the next lead would be created. modified_since works like the
+SOQL filter `LastModifiedDate >= :since` (the importer re-reads the watermark
+itself, since records can share a timestamp).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+import csv
+
+from .stub_provider import TITLES, company_domain
+
+
+EXPORT_FIELDS = [
+    'Id', 'FirstName', 'LastName', 'Company', 'Email', 'Phone', 'Title', 'Status', 'LeadSource', 'LastModifiedDate'
+]
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+FIRST_NAMES = ['John', 'Sarah', 'Michael', 'Emily', 'David', 'Jessica', 'Robert', 'Amanda', 'Daniel', 'Laura', 'Chris']
+LAST_NAMES = ['Martinez', 'Johnson', 'Chen', 'Rodriguez', 'Thompson', 'Williams', 'Patel', 'Nguyen', 'Brooks']
+COMPANY_WORDS = ['Coastal', 'Summit', 'Pinnacle', 'Metro', 'Harbor', 'Granite', 'Sunbelt', 'Keystone', 'Prairie']
+COMPANY_KINDS = ['Construction', 'Builders', 'Developers', 'Contracting', 'Homes', 'Commercial Construction']
+STATUSES = ['Open - Not Contacted', 'Working - Contacted', 'Closed - Converted', 'Closed - Not Converted']
+SOURCES = ['Web', 'Phone Inquiry', 'Partner Referral', 'Trade Show', 'Purchased List']
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def stub_lead_id(n):
+    """15-character lead Id ('00Q' key prefix + base62 of n); the importer adds the 18-character suffix"""
+    digits = ''
+    while True:
+        n, digit = divmod(n, 62)
+        digits = BASE62[digit] + digits
+        if not n:
+            break
+    return '00Q' + digits.rjust(12, '0')
+
+
+def _touched_at(count):
+    return EPOCH + timedelta(minutes=count, seconds=-30)
+
+
+def stub_lead(n, count, touched=0):
+    first = FIRST_NAMES[n % len(FIRST_NAMES)]
+    last = LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    # Roughly 20 leads per company
+    company_number = n // 20
+    company = (f'{COMPANY_WORDS[company_number % len(COMPANY_WORDS)]} '
+               f'{COMPANY_KINDS[(company_number // len(COMPANY_WORDS)) % len(COMPANY_KINDS)]} {company_number}')
+    status = STATUSES[n % 2]
+    modified = EPOCH + timedelta(minutes=n)
+    if n < touched:
+        status = STATUSES[2 + n % 2]
+        modified = _touched_at(count)
+    return {
+        'Id': stub_lead_id(n),
+        'FirstName': first,
+        'LastName': last,
+        'Company': company,
+        'Email': f'{first.lower()}.{last.lower()}{n}@{company_domain(company)}',
+        'Phone': f'+1 (555) {n // 10000 % 1000:03d}-{n % 10000:04d}',
+        'Title': TITLES[n % len(TITLES)],
+        'Status': status,
+        'LeadSource': SOURCES[n % len(SOURCES)],
+        'LastModifiedDate': modified.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+    }
+
+
+def stub_leads(count, touched=0, modified_since=None):
+    """Lead rows (dicts keyed by EXPORT_FIELDS) in Id order, generated lazily"""
+    for n in range(count):
+        if modified_since is not None:
+            modified = _touched_at(count) if n < touched else EPOCH + timedelta(minutes=n)
+            if modified < modified_since:
+                continue
+        yield stub_lead(n, count, touched)
+
+
+class _Line:
+    """File-like target that hands csv.writer's output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(count, touched=0, modified_since=None):
+    """The export as CSV text lines, header first (feed to read_chunks or a streaming response)"""
+    writer = csv.DictWriter(_Line(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for lead in stub_leads(count, touched, modified_since):
+        yield writer.writerow(lead)
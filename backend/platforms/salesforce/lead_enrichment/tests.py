@@ -0,0 +1,533 @@
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.cache import CoalescingCache
+from api.journal import JournalFull
+from api.models import Enrichment, Lead, LeadImport
+
+from . import enrichment, views
+from .company_index import CompanyIndex, normalize_company
+from .history import EnrichmentHistory, parse_bound
+from .lead_import import ImportFormatError, import_chunk, parse_modified, read_chunks, salesforce_id
+from .provider import ProviderClient, ProviderError
+from .scheduler import CallBudget, EnrichmentScheduler
+from .stub_provider import start_stub_provider
+from .stub_salesforce import EPOCH, export_lines, stub_lead_id
+
+
+class HTMLHandler(BaseHTTPRequestHandler):
+    """Answers every request with a 200 HTML page, like a misconfigured proxy"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        body = b'<html>Gateway login</html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ProviderClientTests(SimpleTestCase):
+    def start(self, **options):
+        server = start_stub_provider(latency=(0, 0), **options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def provider_client(self, server, **options):
+        client = ProviderClient(server.base_url, rate=1000, backoff_base=0.01, backoff_max=0.05, **options)
+        self.addCleanup(client.pool.close)
+        return client
+
+    def test_company_and_person(self):
+        client = self.provider_client(self.start())
+        facts = client.company_facts('Coastal Construction Group')
+        self.assertIsInstance(facts, dict)
+        person = client.person('John Martinez', 'Coastal Construction Group')
+        self.assertIsInstance(person, dict)
+        stats = client.stats()
+        self.assertEqual((stats['requests'], stats['succeeded'], stats['failed']), (2, 2, 0))
+        self.assertEqual(stats['connections_opened'], 1)
+
+    def test_not_found_is_none(self):
+        client = self.provider_client(self.start(not_found_rate=1.0))
+        self.assertIsNone(client.company_facts('Nobody Inc'))
+        self.assertEqual(client.stats()['not_found'], 1)
+
+    def test_server_errors_are_retried_then_raised(self):
+        server = self.start(error_rate=1.0)
+        client = self.provider_client(server, max_retries=2)
+        with self.assertRaises(ProviderError) as raised:
+            client.company_facts('Coastal Construction Group')
+        self.assertEqual(raised.exception.status, 503)
+        stats = client.stats()
+        self.assertEqual((stats['attempts'], stats['retries'], stats['server_errors']), (3, 2, 3))
+        self.assertEqual(server.counters['errors'], 3)
+
+    def test_throttled_requests_are_retried(self):
+        # One token and a slow refill: the second call gets a 429 and waits it out
+        server = self.start(rate=5, burst=1)
+        client = self.provider_client(server, max_retries=5)
+        self.assertIsNotNone(client.company_facts('Coastal Construction Group'))
+        self.assertIsNotNone(client.company_facts('Summit Builders'))
+        stats = client.stats()
+        self.assertGreaterEqual(stats['throttled'], 1)
+        self.assertEqual(stats['succeeded'], 2)
+
+    def test_non_json_success_body_raises(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), HTMLHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        client = ProviderClient(f'http://{host}:{port}', rate=1000)
+        self.addCleanup(client.pool.close)
+
+        with self.assertRaises(ProviderError) as raised:
+            client.company_facts('Coastal Construction Group')
+        self.assertEqual(raised.exception.status, 200)
+        stats = client.stats()
+        self.assertEqual((stats['succeeded'], stats['failed'], stats['attempts']), (0, 1, 1))
+
+
+class FakeTask:
+    """Stands in for the worker pool's task handle"""
+
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, progress=None):
+        self.messages.append((message, progress))
+
+    def is_cancelled(self):
+        return False
+
+
+class BulkEnrichmentJournalTests(TestCase):
+    def setUp(self):
+        for n in range(3):
+            Enrichment.objects.create(id=f'e{n}', lead_data={'name': f'Lead {n}'}, status='pending', batch_id='b1')
+        enrich = mock.patch.object(views, '_enrich_one', return_value=({'email': 'lead@example.com'}, None))
+        flush = mock.patch.object(views.LEAD_ENRICHMENTS_JOURNAL, 'flush')
+        enrich.start()
+        self.flush = flush.start()
+        self.addCleanup(enrich.stop)
+        self.addCleanup(flush.stop)
+
+    def test_full_journal_is_retried_after_a_flush(self):
+        with mock.patch.object(views.LEAD_ENRICHMENTS_JOURNAL, 'append', side_effect=[JournalFull(), None, None, None]) as append:
+            result = views._bulk_enrichment_task(FakeTask(), 'b1', concurrency=2)
+        self.assertEqual(result['completed'], 3)
+        self.assertEqual(append.call_count, 4)
+        self.assertEqual(self.flush.call_count, 1)
+
+    def test_journal_that_stays_full_fails_the_job_with_results_saved(self):
+        task = FakeTask()
+        with mock.patch.object(views.LEAD_ENRICHMENTS_JOURNAL, 'append', side_effect=JournalFull()):
+            with self.assertRaises(JournalFull) as raised:
+                views._bulk_enrichment_task(task, 'b1', concurrency=2)
+        self.assertIn('3/3 leads were saved', str(raised.exception))
+        self.assertEqual(Enrichment.objects.filter(batch_id='b1', status='completed').count(), 3)
+        self.assertEqual(task.messages[-1][1], 100)
+
+
+    def test_unexpected_error_fails_the_unfinished_rows(self):
+        with mock.patch.object(views.Enrichment.objects, 'bulk_create', side_effect=RuntimeError('db gone')):
+            with self.assertRaises(RuntimeError):
+                views._bulk_enrichment_task(FakeTask(), 'b1', concurrency=2)
+        self.assertFalse(Enrichment.objects.filter(batch_id='b1', status='pending').exists())
+        failed = Enrichment.objects.filter(batch_id='b1', status='failed')
+        self.assertEqual(failed.count(), 3)
+        self.assertEqual(failed.first().enriched_data, {'error': 'Bulk job failed: db gone'})
+
+class CompanyIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = CompanyIndex(threshold=0.8)
+        self.index.add('Pinnacle Developers LLC')
+        self.index.add('Metro Commercial Construction')
+        self.index.add('Phase 1 Builders')
+        self.index.add('Summit Builders')
+
+    def test_normalize(self):
+        self.assertEqual(normalize_company('The Coastal Construction Group, LLC'), 'coastal construction')
+        self.assertEqual(normalize_company('Group'), 'group')
+        self.assertEqual(normalize_company('  '), '')
+
+    def test_docstring_cases(self):
+        for name, key, method in [
+            ('Pinnacle Developers LLC', 'pinnacle developers', 'exact'),
+            ('Pinnacle Developers', 'pinnacle developers', 'exact'),
+            ('PinnacleDevelopers', 'pinnacle developers', 'exact'),
+            ('metrocc', 'metro commercial construction', 'acronym'),
+            ('MCC', 'metro commercial construction', 'acronym'),
+            ('Metro Comercial Construction', 'metro commercial construction', 'fuzzy'),
+        ]:
+            match = self.index.resolve(name)
+            self.assertEqual((match.key, match.method), (key, method), name)
+        self.assertEqual(self.index.resolve('Pinnacle Developers').name, 'Pinnacle Developers LLC')
+
+    def test_numbers_and_word_count_never_fuzzy_match(self):
+        self.assertEqual(self.index.resolve('Phase 2 Builders').method, 'new')
+        self.assertEqual(self.index.resolve('Alpine Summit Builders').method, 'new')
+        self.assertEqual(self.index.resolve('Phase 2 Builders').method, 'exact')
+
+    def test_ambiguous_acronym_is_new(self):
+        self.index.add('Mountain Crest Contractors')
+        self.assertEqual(self.index.resolve('mcc', add=False).method, 'new')
+        self.assertEqual(len(self.index), 5)
+        self.assertIsNone(self.index.resolve(''))
+
+    def test_least_recently_resolved_company_is_evicted(self):
+        index = CompanyIndex(max_companies=2)
+        index.add('Coastal Builders')
+        index.add('Granite Homes')
+        index.resolve('Coastal Builders')
+        index.add('Harbor Contracting')
+        self.assertEqual(index.resolve('Granite Homes', add=False).method, 'new')
+        self.assertEqual(index.resolve('Coastal Builders').method, 'exact')
+        self.assertEqual(index.stats()['companies'], 2)
+
+
+class EnrichmentCacheTests(SimpleTestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(enrichment, 'COMPANY_CACHE', CoalescingCache(ttl=3600)),
+            mock.patch.object(enrichment, 'PERSON_CACHE', CoalescingCache(ttl=3600)),
+            mock.patch.object(enrichment, 'COMPANY_INDEX', CompanyIndex()),
+            mock.patch.object(enrichment, 'PROVIDER_CLIENT', None),
+            mock.patch.dict(enrichment._provider_calls, {'company': 0, 'person': 0}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_spellings_of_a_company_share_one_lookup(self):
+        _, cache = enrichment.enrich({'name': 'John Martinez', 'company': 'Pinnacle Developers LLC'})
+        self.assertEqual(cache, {'company': 'miss', 'person': 'miss'})
+        enriched, cache = enrichment.enrich({'name': 'Sarah Chen', 'company': 'pinnacle developers'})
+        self.assertEqual(cache, {'company': 'hit', 'person': 'miss'})
+        self.assertEqual(enriched['matched_company'], 'Pinnacle Developers LLC')
+        self.assertEqual(enriched['company'], 'pinnacle developers')
+        _, cache = enrichment.enrich({'name': ' john  MARTINEZ', 'company': 'Pinnacle Developers'})
+        self.assertEqual(cache, {'company': 'hit', 'person': 'hit'})
+        self.assertEqual(enrichment.cache_stats()['provider_calls'], {'company': 1, 'person': 2})
+
+    def test_empty_results_are_cached_for_the_negative_ttl(self):
+        lead = {'name': 'Nobody', 'company': 'Unknown Co'}
+        with mock.patch.object(enrichment, 'mock_company', return_value=None), \
+                mock.patch.object(enrichment, 'mock_person', return_value=None), \
+                mock.patch.dict(enrichment.COMPANY_CACHE_SETTINGS, {'NEGATIVE_TTL': 60}), \
+                mock.patch.dict(enrichment.PERSON_CACHE_SETTINGS, {'NEGATIVE_TTL': 60}):
+            with mock.patch('api.cache.time.monotonic', return_value=1000.0):
+                enriched, _ = enrichment.enrich(lead)
+                self.assertFalse(enriched['found'])
+                self.assertEqual(enriched['confidence_score'], 0)
+                self.assertEqual(enrichment.enrich(lead)[1], {'company': 'hit', 'person': 'hit'})
+            with mock.patch('api.cache.time.monotonic', return_value=1061.0):
+                self.assertEqual(enrichment.enrich(lead)[1], {'company': 'miss', 'person': 'miss'})
+
+    def test_lead_without_company_or_name(self):
+        enriched, cache = enrichment.enrich({'name': '', 'company': ''})
+        self.assertEqual(cache, {'company': 'skipped', 'person': 'skipped'})
+        self.assertFalse(enriched['found'])
+
+
+class HistoryFileMixin:
+    """A small lead_enrichments.csv in a temp dir with an EnrichmentHistory over it"""
+    ROWS = [
+        ('e0', 'Pinnacle Developers LLC', '90', 'completed', '2026-10-01T09:00:00'),
+        ('e1', 'Summit Builders', '40', 'completed', '2026-10-02T09:00:00'),
+        ('e2', 'pinnacle developers', '70', 'failed', '2026-10-03T09:00:00'),
+        ('e3', 'Pinnacle Developers', '', 'completed', '2026-10-04T09:00:00'),
+        ('e4', 'Summit Builders', '85', 'completed', '2026-10-05T09:00:00'),
+    ]
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'lead_enrichments.csv')
+        self.write(self.ROWS, header=True)
+        self.history = EnrichmentHistory(self.path, snapshot_every=1)
+
+    def write(self, rows, header=False):
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(['id', 'company', 'confidence_score', 'status', 'created_at'])
+            writer.writerows(rows)
+
+
+class EnrichmentHistoryTests(HistoryFileMixin, SimpleTestCase):
+    def ids(self, **filters):
+        rows, _ = self.history.query(**filters)
+        return [row['id'] for row in rows]
+
+    def test_filters(self):
+        self.assertEqual(self.history.refresh(), 5)
+        self.assertEqual(self.ids(), ['e4', 'e3', 'e2', 'e1', 'e0'])
+        self.assertEqual(self.ids(company='Pinnacle Developers, Inc.'), ['e3', 'e2', 'e0'])
+        self.assertEqual(self.ids(company='Pinnacle Developers', status='completed'), ['e3', 'e0'])
+        self.assertEqual(self.ids(since=parse_bound('2026-10-02'), until=parse_bound('2026-10-04', end=True)),
+                         ['e3', 'e2', 'e1'])
+        self.assertEqual(self.ids(min_confidence=80), ['e4', 'e0'])
+        self.assertEqual(self.ids(max_confidence=50), ['e1'])
+        self.assertEqual(self.ids(company='Nobody'), [])
+        self.assertEqual(self.ids(status='cancelled'), [])
+
+    def test_cursor_pages_and_appended_rows(self):
+        self.history.refresh()
+        rows, cursor = self.history.query(limit=2)
+        self.assertEqual([row['id'] for row in rows], ['e4', 'e3'])
+        # New rows, one of them older than the rest, don't move the cursor
+        self.write([('e5', 'Summit Builders', '60', 'completed', '2026-10-06T09:00:00'),
+                    ('e6', 'Summit Builders', '60', 'completed', '2026-09-30T09:00:00')])
+        self.assertEqual(self.history.refresh(), 7)
+        rows, cursor = self.history.query(limit=2, cursor=cursor)
+        self.assertEqual([row['id'] for row in rows], ['e2', 'e1'])
+        rows, cursor = self.history.query(limit=3, cursor=cursor)
+        self.assertEqual([row['id'] for row in rows], ['e0', 'e6'])
+        self.assertIsNone(cursor)
+        self.assertEqual(self.ids(company='summit builders'), ['e5', 'e4', 'e1', 'e6'])
+
+    def test_snapshot_is_reused_after_restart(self):
+        self.history.refresh()
+        self.assertTrue(os.path.exists(self.history.snapshot_path))
+        restarted = EnrichmentHistory(self.path, snapshot_every=1)
+        with mock.patch.object(restarted, '_ingest', wraps=restarted._ingest) as ingest:
+            self.assertEqual(restarted.refresh(), 5)
+        ingest.assert_not_called()
+        rows, _ = restarted.query(company='Pinnacle Developers', min_confidence=80)
+        self.assertEqual([row['id'] for row in rows], ['e0'])
+
+    def test_replaced_file_is_reindexed(self):
+        self.history.refresh()
+        os.remove(self.path)
+        self.write(self.ROWS[:2], header=True)
+        self.assertEqual(self.history.refresh(), 2)
+        self.assertEqual(self.ids(), ['e1', 'e0'])
+
+
+class EnrichmentHistoryApiTests(HistoryFileMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        patch = mock.patch.object(views, 'ENRICHMENT_HISTORY', self.history)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def get(self, **params):
+        return self.client.get('/api/v1/salesforce/leads/history/', params)
+
+    def test_history_endpoint(self):
+        body = self.get(company='Summit Builders', per_page=1).json()
+        self.assertEqual([row['id'] for row in body['enrichments']], ['e4'])
+        body = self.get(company='Summit Builders', per_page=1, cursor=body['next_cursor']).json()
+        self.assertEqual([row['id'] for row in body['enrichments']], ['e1'])
+        self.assertEqual(self.get().json()['count'], 5)
+        self.assertEqual(self.get(since='last week').status_code, 400)
+        self.assertEqual(self.get(status='completed', cursor='bogus').status_code, 400)
+
+
+class LeadImportTests(TestCase):
+    def import_csv(self, text, **options):
+        counts = {}
+        for chunk in read_chunks(io.StringIO(text)):
+            chunk_counts, _ = import_chunk(chunk, **options)
+            for name, value in chunk_counts.items():
+                counts[name] = counts.get(name, 0) + value
+        return counts
+
+    def test_full_then_incremental_import(self):
+        LeadImport.objects.create(id='imp1', source='stub')
+        result = views._lead_import_task(FakeTask(), 'imp1', count=50)
+        self.assertEqual((result['status'], result['rows'], result['created']), ('completed', 50, 50))
+        self.assertEqual(Lead.objects.count(), 50)
+        watermark = LeadImport.objects.get(pk='imp1').watermark
+        self.assertEqual(watermark, EPOCH + timedelta(minutes=49))
+
+        # A mass update of the first 5 leads: only they are rewritten, plus the re-read at the watermark
+        LeadImport.objects.create(id='imp2', source='stub', since=watermark)
+        result = views._lead_import_task(FakeTask(), 'imp2', count=50, touched=5)
+        self.assertEqual((result['rows'], result['updated'], result['unchanged']), (6, 5, 1))
+        lead = Lead.objects.get(pk=salesforce_id(stub_lead_id(0)))
+        self.assertEqual((lead.status, lead.import_id), ('Closed - Converted', 'imp2'))
+        self.assertEqual(Lead.objects.filter(import_id='imp1').count(), 45)
+
+    def test_chunks_are_bounded(self):
+        chunks = list(read_chunks(export_lines(45), chunk_size=20))
+        self.assertEqual([len(chunk) for chunk in chunks], [20, 20, 5])
+        self.assertEqual(chunks[0][0]['name'], 'John Martinez')
+
+    def test_report_export_matches_api_ids(self):
+        lead_id = stub_lead_id(7)
+        self.import_csv(f'Id,Email,Last Name\n{salesforce_id(lead_id)},a@x.com,Chen\n')
+        counts = self.import_csv(
+            f'Lead ID,Email,Last Name,Last Modified Date\n{lead_id},a@x.com,Chen,"10/17/2026, 8:15 AM"\n'
+            f'Grand Totals (1 record),,,\n'
+        )
+        self.assertEqual((counts['unchanged'], counts['invalid']), (1, 1))
+        self.assertEqual(Lead.objects.count(), 1)
+        self.assertEqual(parse_modified('10/17/2026, 8:15 AM').isoformat(), '2026-10-17T08:15:00+00:00')
+
+    def test_dedupe_and_stale_rows(self):
+        counts = self.import_csv(
+            'Id,Email,Status,LastModifiedDate\n'
+            '00Q000000000001AAA,a@x.com,Open,2026-10-02T00:00:00Z\n'
+            '00Q000000000001AAA,a@x.com,Working,2026-10-01T00:00:00Z\n'
+            ',b@x.com,Open,2026-10-01T00:00:00Z\n'
+            ',B@x.com ,Working,2026-10-03T00:00:00Z\n'
+            ',a@x.com,Closed,2026-10-04T00:00:00Z\n'
+        )
+        self.assertEqual((counts['created'], counts['duplicates']), (2, 3))
+        self.assertEqual(Lead.objects.get(pk='00Q000000000001AAA').status, 'Closed')
+        self.assertEqual(Lead.objects.get(email='B@x.com').status, 'Working')
+
+        counts = self.import_csv('Id,Status,LastModifiedDate\n00Q000000000001AAA,Open,2026-09-01T00:00:00Z\n')
+        self.assertEqual(counts['stale'], 1)
+
+    def test_header_without_id_or_email(self):
+        with self.assertRaises(ImportFormatError):
+            list(read_chunks(io.StringIO('Name,Company\nJohn,Acme\n')))
+
+
+class SchedulerTests(SimpleTestCase):
+    def wait_for(self, scheduler, **expected):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            stats = scheduler.stats()
+            if all(stats[name] == value for name, value in expected.items()):
+                return stats
+            time.sleep(0.01)
+        self.fail(f'scheduler stuck at {scheduler.stats()}')
+
+    def test_dispatches_highest_score_first(self):
+        order = []
+        scheduler = EnrichmentScheduler(lambda enrichment_id, lead: order.append(enrichment_id) or 2,
+                                        calls_per_hour=1000, concurrency=1)
+        full = {'email': 'a@x.com', 'phone': '555', 'title': 'PM'}
+        twenty_days_ago = datetime.fromtimestamp(time.time() - 20 * 86400).isoformat()
+        leads = [
+            ('enriched', {'id': 'l1', 'status': 'Enriched', **full}),
+            ('new', {'id': 'l2', 'status': 'New', **full}),
+            ('qualified-no-email', {'id': 'l3', 'status': 'Qualified', **full, 'email': ''}),
+            ('new-blank', {'id': 'l4', 'status': 'New'}),
+            ('new-old', {'id': 'l5', 'status': 'New', **full, 'created_at': twenty_days_ago}),
+        ]
+        self.assertAlmostEqual(scheduler.score(leads[4][1]), 1.0, places=2)
+        scheduler.submit(leads)
+        self.wait_for(scheduler, completed=5)
+        self.assertEqual(order, ['new-blank', 'qualified-no-email', 'new', 'new-old', 'enriched'])
+
+    def test_duplicates_and_full_queue(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        scheduler = EnrichmentScheduler(lambda enrichment_id, lead: release.wait(5) and 2,
+                                        calls_per_hour=1000, concurrency=1, max_queued=1)
+        queued, duplicates, refused = scheduler.submit([('e1', {'id': 'l1'}), ('e2', {'id': 'l1'})])
+        self.assertEqual((queued, duplicates, refused), (['e1'], ['e2'], []))
+        self.wait_for(scheduler, in_flight=1)
+        queued, _, refused = scheduler.submit([('e3', {'id': 'l3'}), ('e4', {'id': 'l4'})])
+        self.assertEqual((queued, refused), (['e3'], ['e4']))
+        release.set()
+        self.wait_for(scheduler, completed=2, depth=0)
+
+    def test_budget_holds_leads_until_calls_age_out(self):
+        scheduler = EnrichmentScheduler(lambda enrichment_id, lead: 2, calls_per_hour=4, calls_per_lead=2)
+        scheduler.submit([(f'e{n}', {'id': f'l{n}'}) for n in range(3)])
+        stats = self.wait_for(scheduler, completed=2)
+        self.assertEqual(stats['depth'], 1)
+        self.assertTrue(stats['budget']['exhausted'])
+        self.assertEqual((stats['budget']['used_last_hour'], stats['provider_calls']), (4, 4))
+
+    def test_cache_hits_refund_their_reservation(self):
+        scheduler = EnrichmentScheduler(lambda enrichment_id, lead: 0, calls_per_hour=4, calls_per_lead=2,
+                                        concurrency=1)
+        scheduler.submit([(f'e{n}', {'id': f'l{n}'}) for n in range(5)])
+        stats = self.wait_for(scheduler, completed=5)
+        self.assertEqual((stats['budget']['used_last_hour'], stats['provider_calls']), (0, 0))
+
+    def test_failed_lead_keeps_its_reservation(self):
+        def run(enrichment_id, lead):
+            raise RuntimeError('provider down')
+
+        scheduler = EnrichmentScheduler(run, calls_per_hour=10, calls_per_lead=2)
+        scheduler.submit([('e1', {'id': 'l1'})])
+        stats = self.wait_for(scheduler, failed=1)
+        self.assertEqual((stats['budget']['used_last_hour'], stats['provider_calls']), (2, 2))
+
+
+class QueueLeaseTests(TestCase):
+    def setUp(self):
+        submit = mock.patch.object(views.ENRICHMENT_SCHEDULER, 'submit',
+                                   side_effect=lambda rows: ([row[0] for row in rows], [], []))
+        self.submit = submit.start()
+        self.addCleanup(submit.stop)
+        self.addCleanup(views._held.clear)
+        lease_thread = mock.patch.object(views, '_start_lease_thread')
+        lease_thread.start()
+        self.addCleanup(lease_thread.stop)
+
+    def row(self, id, claimed_by='', lease_expires=None, status='queued'):
+        return Enrichment.objects.create(id=id, lead_data={'id': f'l-{id}'}, status=status,
+                                         claimed_by=claimed_by, lease_expires=lease_expires)
+
+    def test_only_unowned_or_expired_rows_are_recovered(self):
+        now = timezone.now()
+        self.row('live', 'other:1:aa', now + timedelta(minutes=5))
+        self.row('dead', 'other:2:bb', now - timedelta(seconds=1))
+        self.row('stuck', 'other:3:cc', now - timedelta(seconds=1), status='running')
+        self.row('orphan')
+        views._recover_queued_enrichments()
+        submitted = sorted(row[0] for row in self.submit.call_args[0][0])
+        self.assertEqual(submitted, ['dead', 'orphan', 'stuck'])
+        self.assertEqual(Enrichment.objects.get(pk='live').claimed_by, 'other:1:aa')
+        for pk in submitted:
+            row = Enrichment.objects.get(pk=pk)
+            self.assertEqual((row.status, row.claimed_by), ('queued', views.QUEUE_OWNER))
+        # Rows already held here are not submitted twice
+        self.submit.reset_mock()
+        Enrichment.objects.update(lease_expires=now - timedelta(seconds=1))
+        views._recover_queued_enrichments()
+        self.assertEqual([row[0] for row in self.submit.call_args[0][0]], ['live'])
+
+    def test_run_is_skipped_once_the_lease_is_lost(self):
+        self.row('taken', 'other:1:aa', timezone.now() + timedelta(minutes=5))
+        with mock.patch.object(views, 'enrich') as enrich:
+            self.assertEqual(views._run_queued_enrichment('taken', {'id': 'l-taken'}), 0)
+        enrich.assert_not_called()
+        self.assertEqual(Enrichment.objects.get(pk='taken').status, 'queued')
+
+
+class CallBudgetTests(SimpleTestCase):
+    def test_wait_time_settle_and_expiry(self):
+        budget = CallBudget(limit=4, window=60)
+        first = budget.spend(2, now=0)
+        budget.spend(2, now=10)
+        self.assertEqual(budget.wait_time(2, now=20), 40)
+        self.assertEqual(budget.wait_time(4, now=20), 50)
+        budget.settle(first, 0)
+        self.assertEqual(budget.wait_time(2, now=20), 0)
+        self.assertEqual(budget.burned(since=5, now=20), 2)
+        # Settling after the entry aged out changes nothing
+        self.assertEqual(budget.wait_time(4, now=70), 0)
+        budget.settle(first, 2)
+        self.assertEqual(budget.used, 0)
+        # A cost above the limit is capped at the limit, so it can still run
+        self.assertEqual(CallBudget(limit=1).wait_time(5, now=0), 0)
@@ -7,9 +7,21 @@ from . import views
 urlpatterns = [
     # Lead enrichment endpoints
     path('enrich/', views.enrich_lead, name='enrich_lead'),
+    path('bulk/', views.enrich_leads_bulk, name='enrich_leads_bulk'),
+    path('bulk/<str:batch_id>/', views.bulk_enrichment_detail, name='bulk_enrichment_detail'),
     path('history/', views.get_enrichment_history, name='enrichment_history'),
+    path('cache/', views.enrichment_cache_stats, name='enrichment_cache_stats'),
+    path('companies/resolve/', views.resolve_company_name, name='resolve_company_name'),
+    path('queue/', views.queue_enrichments, name='queue_enrichments'),
+    path('queue/metrics/', views.enrichment_queue_metrics, name='enrichment_queue_metrics'),
     path('status/<str:enrichment_id>/', views.get_enrichment_status, name='enrichment_status'),
     
+    # Streaming Salesforce lead import
+    path('import/', views.import_leads, name='import_leads'),
+    path('import/<str:import_id>/', views.lead_import_detail, name='lead_import_detail'),
+    path('records/', views.list_imported_leads, name='list_imported_leads'),
+    path('stub-salesforce/export/', views.stub_salesforce_export, name='stub_salesforce_export'),
+    
     # Mock data endpoints for portal demo
     path('mock-leads/', views.get_mock_leads, name='mock_leads'),
 ]
@@ -2,106 +2,104 @@
 Salesforce Lead Enrichment Module Views
 Uses OpenAI Web Search to enrich lead/contact data
 """
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+import io
 import uuid
 import csv
 import os
-import random
+import socket
+import threading
+import time
 
+from api.journal import CSVJournal, JournalFull
+from api.models import Enrichment, Lead, LeadImport
+from api.pagination import get_page_size, InvalidCursor, keyset_queryset_page
+from api.workers import WORKER_POOL, QueueFull
+from .enrichment import enrich, cache_stats, resolve_company
+from .history import EnrichmentHistory, parse_bound
+from .lead_import import (
+    LEAD_COLUMNS, ImportFormatError, add_counts, email_hash, import_chunk, parse_modified, read_chunks
+)
+from .provider import ProviderError
+from .scheduler import EnrichmentScheduler
+from .stub_salesforce import export_lines
+
+
+ENRICHMENT_SETTINGS = getattr(settings, 'LEAD_ENRICHMENT', {})
+IMPORT_SETTINGS = ENRICHMENT_SETTINGS.get('IMPORT', {})
+SCHEDULER_SETTINGS = ENRICHMENT_SETTINGS.get('SCHEDULER', {})
 
 # CSV file paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data')
 LEAD_ENRICHMENTS_CSV = os.path.join(DATA_DIR, 'lead_enrichments.csv')
+# Uploaded lead exports wait here for their import job
+LEAD_IMPORTS_DIR = os.path.join(DATA_DIR, 'imports')
+
+LEAD_ENRICHMENT_FIELDS = [
+    'id', 'lead_name', 'company', 'original_email', 'original_phone', 'enriched_email',
+    'enriched_phone', 'enriched_title', 'enriched_linkedin', 'enriched_company_website',
+    'enriched_company_size', 'enriched_industry', 'confidence_score', 'source', 'status', 'created_at'
+]
+
+# Filterable history over the CSV; its indexes pick up new rows as the journal flushes them
+ENRICHMENT_HISTORY = EnrichmentHistory(
+    LEAD_ENRICHMENTS_CSV,
+    snapshot_every=ENRICHMENT_SETTINGS.get('HISTORY_SNAPSHOT_EVERY', 10000)
+)
+
+# Write-behind journal: bulk jobs append thousands of rows without a file open per row
+LEAD_ENRICHMENTS_JOURNAL = CSVJournal(
+    LEAD_ENRICHMENTS_CSV, LEAD_ENRICHMENT_FIELDS,
+    on_flush=lambda journal: ENRICHMENT_HISTORY.refresh()
+)
 
-# In-memory storage for demo
-ENRICHMENT_JOBS = {}
+
+def enrichment_csv_row(lead_data, enriched_data, enrichment_id):
+    """One lead_enrichments.csv row"""
+    return {
+        'id': enrichment_id,
+        'lead_name': lead_data.get('name', 'N/A'),
+        'company': lead_data.get('company', 'N/A'),
+        'original_email': lead_data.get('email', ''),
+        'original_phone': lead_data.get('phone', ''),
+        'enriched_email': enriched_data.get('email', ''),
+        'enriched_phone': enriched_data.get('phone', ''),
+        'enriched_title': enriched_data.get('title', ''),
+        'enriched_linkedin': enriched_data.get('linkedin', ''),
+        'enriched_company_website': enriched_data.get('company_website', ''),
+        'enriched_company_size': enriched_data.get('company_size', ''),
+        'enriched_industry': enriched_data.get('industry', ''),
+        'confidence_score': enriched_data.get('confidence_score', 0),
+        'source': 'openai_web_search',
+        'status': 'completed',
+        'created_at': datetime.utcnow().isoformat()
+    }
 
 
 def save_enrichment_to_csv(lead_data, enriched_data, enrichment_id):
-    """Save lead enrichment result to CSV file"""
+    """Queue lead enrichment result for the CSV journal"""
     try:
-        row = {
-            'id': enrichment_id,
-            'lead_name': lead_data.get('name', 'N/A'),
-            'company': lead_data.get('company', 'N/A'),
-            'original_email': lead_data.get('email', ''),
-            'original_phone': lead_data.get('phone', ''),
-            'enriched_email': enriched_data.get('email', ''),
-            'enriched_phone': enriched_data.get('phone', ''),
-            'enriched_title': enriched_data.get('title', ''),
-            'enriched_linkedin': enriched_data.get('linkedin', ''),
-            'enriched_company_website': enriched_data.get('company_website', ''),
-            'enriched_company_size': enriched_data.get('company_size', ''),
-            'enriched_industry': enriched_data.get('industry', ''),
-            'confidence_score': enriched_data.get('confidence_score', 0),
-            'source': 'openai_web_search',
-            'status': 'completed',
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
-        # Ensure data directory exists
-        os.makedirs(DATA_DIR, exist_ok=True)
-        
-        # Append to CSV
-        file_exists = os.path.exists(LEAD_ENRICHMENTS_CSV)
-        with open(LEAD_ENRICHMENTS_CSV, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=row.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
+        # Written to disk in the background by the journal
+        LEAD_ENRICHMENTS_JOURNAL.append(enrichment_csv_row(lead_data, enriched_data, enrichment_id))
         
-        print(f"💾 Saved enrichment to CSV: {LEAD_ENRICHMENTS_CSV}")
+        print(f"💾 Queued enrichment for CSV: {LEAD_ENRICHMENTS_CSV}")
         return True
     except Exception as e:
         print(f"❌ Error saving enrichment to CSV: {e}")
         return False
 
 
-def generate_mock_enrichment(name, company):
-    """
-    Generate mock enriched data for development.
-    TODO: Replace with actual OpenAI Web Search API call
-    """
-    # Mock titles based on common roles
-    titles = [
-        "Vice President of Operations",
-        "Director of Construction", 
-        "Project Manager",
-        "General Manager",
-        "Chief Operating Officer",
-        "President",
-        "Owner",
-        "Estimator",
-        "Superintendent"
-    ]
-    
-    # Generate mock data
-    first_name = name.split()[0] if name else "Unknown"
-    last_name = name.split()[-1] if name and len(name.split()) > 1 else "User"
-    company_clean = company.replace(" ", "").lower() if company else "company"
-    
-    return {
-        'name': name,
-        'title': random.choice(titles),
-        'email': f"{first_name.lower()}.{last_name.lower()}@{company_clean}.com",
-        'phone': f"+1 ({random.randint(200, 999)}) {random.randint(200, 999)}-{random.randint(1000, 9999)}",
-        'mobile': f"+1 ({random.randint(200, 999)}) {random.randint(200, 999)}-{random.randint(1000, 9999)}",
-        'linkedin': f"https://linkedin.com/in/{first_name.lower()}-{last_name.lower()}-{random.randint(1000, 9999)}",
-        'company': company,
-        'company_website': f"https://www.{company_clean}.com",
-        'company_size': random.choice(['1-10', '11-50', '51-200', '201-500', '500+']),
-        'industry': random.choice(['Construction', 'Real Estate', 'General Contracting', 'Commercial Construction']),
-        'location': random.choice(['Florida', 'Texas', 'California', 'New York', 'Arizona']),
-        'confidence_score': random.randint(75, 98),
-        'sources_checked': ['LinkedIn', 'Company Website', 'Business Directories', 'News Articles'],
-        'last_updated': datetime.utcnow().isoformat()
-    }
-
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def enrich_lead(request):
@@ -134,18 +132,23 @@ def enrich_lead(request):
     # Generate enrichment ID
     enrichment_id = str(uuid.uuid4())[:8]
     
-    # TODO: Replace with actual OpenAI Web Search API call
-    # For now, generate mock enriched data
-    enriched_data = generate_mock_enrichment(name, company)
+    # Company facts and person details come from the two-level cache when possible
+    try:
+        enriched_data, cache = enrich(lead_data)
+    except ProviderError as e:
+        print(f"❌ Enrichment provider error: {e}")
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_502_BAD_GATEWAY)
     
-    # Store in memory
-    ENRICHMENT_JOBS[enrichment_id] = {
-        'id': enrichment_id,
-        'lead_data': lead_data,
-        'enriched_data': enriched_data,
-        'status': 'completed',
-        'created_at': datetime.utcnow().isoformat()
-    }
+    # Store in database
+    Enrichment.objects.create(
+        id=enrichment_id,
+        lead_data=lead_data,
+        enriched_data=enriched_data,
+        status='completed'
+    )
     
     # Save to CSV
     save_enrichment_to_csv(lead_data, enriched_data, enrichment_id)
@@ -161,28 +164,365 @@ def enrich_lead(request):
         'enrichment_id': enrichment_id,
         'lead': lead_data,
         'enriched_data': enriched_data,
+        'cache': cache,
         'message': 'Lead enriched successfully'
     })
 
 
+def _leads_from_csv(upload):
+    """Lead dicts from an uploaded CSV (Salesforce report export or name,company,... columns)"""
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    leads = []
+    for row in csv.DictReader(text):
+        lead = {}
+        for column, value in row.items():
+            key = LEAD_COLUMNS.get((column or '').strip().lower())
+            if key and value and value.strip():
+                lead[key] = value.strip()
+        first, last = lead.pop('first_name', ''), lead.pop('last_name', '')
+        if not lead.get('name') and (first or last):
+            lead['name'] = f'{first} {last}'.strip()
+        leads.append(lead)
+    return leads
+
+
+def _enrich_one(lead_data):
+    """(enriched_data, error) for one lead"""
+    try:
+        enriched_data, _ = enrich(lead_data)
+        return enriched_data, None
+    except Exception as e:
+        return None, str(e)
+
+
+def _append_to_journal(rows, attempts=3):
+    """
+    Append CSV rows to the enrichment journal. A full journal is flushed and the
+    row retried, up to `attempts` times; returns how many rows were left unwritten.
+    """
+    for written, row in enumerate(rows):
+        for attempt in range(attempts):
+            try:
+                LEAD_ENRICHMENTS_JOURNAL.append(row)
+                break
+            except JournalFull:
+                if attempt + 1 == attempts:
+                    return len(rows) - written
+                LEAD_ENRICHMENTS_JOURNAL.flush(timeout=ENRICHMENT_SETTINGS.get('JOURNAL_FULL_WAIT', 10))
+    return 0
+
+
+def _bulk_enrichment_task(task, batch_id, concurrency=8):
+    """
+    Worker-pool body of enrich_leads_bulk.
+    If the job fails, its still-pending rows are marked failed so the batch
+    never looks in progress forever; the worker pool records the error.
+    """
+    try:
+        return _enrich_batch(task, batch_id, concurrency)
+    except Exception as e:
+        Enrichment.objects.filter(batch_id=batch_id, status='pending').update(
+            status='failed', enriched_data={'error': f'Bulk job failed: {e}'}
+        )
+        raise
+
+
+def _enrich_batch(task, batch_id, concurrency):
+    """
+    Enrich the batch's pending rows chunk by chunk on `concurrency` threads;
+    each chunk is one bulk upsert and one batch of CSV journal rows.
+    """
+    chunk_size = max(ENRICHMENT_SETTINGS.get('BULK_CHUNK_SIZE', 100), concurrency)
+    total = Enrichment.objects.filter(batch_id=batch_id).count()
+    counts = {'completed': 0, 'failed': 0}
+    task.log(f'Enriching {total} leads with {concurrency} workers', progress=0)
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='lead-enrichment') as executor:
+        while True:
+            if task.is_cancelled():
+                cancelled = Enrichment.objects.filter(batch_id=batch_id, status='pending').update(status='cancelled')
+                return {'batch_id': batch_id, **counts, 'cancelled': cancelled}
+            
+            rows = list(Enrichment.objects.filter(batch_id=batch_id, status='pending').order_by('id')[:chunk_size])
+            if not rows:
+                break
+            
+            csv_rows = []
+            for row, (enriched_data, error) in zip(rows, executor.map(_enrich_one, [r.lead_data for r in rows])):
+                if error is None:
+                    row.enriched_data = enriched_data
+                    row.status = 'completed'
+                    csv_rows.append(enrichment_csv_row(row.lead_data, enriched_data, row.id))
+                else:
+                    row.enriched_data = {'error': error}
+                    row.status = 'failed'
+                counts[row.status] += 1
+            # An upsert on the primary key is one INSERT ... ON CONFLICT, much cheaper than bulk_update's CASE
+            Enrichment.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['id'], update_fields=['enriched_data', 'status']
+            )
+            
+            done = counts['completed'] + counts['failed']
+            task.log(f'Enriched {done}/{total} leads ({counts["failed"]} failed)', progress=done * 100 // max(total, 1))
+            # Results are saved before their CSV rows, so a journal that stays full fails the job with its progress kept
+            unwritten = _append_to_journal(csv_rows)
+            if unwritten:
+                raise JournalFull(
+                    f'CSV journal stayed full after {done}/{total} leads were saved; '
+                    f'{unwritten} enriched rows missing from {LEAD_ENRICHMENTS_CSV}'
+                )
+    
+    print(f"✅ Bulk enrichment {batch_id}: {counts['completed']} completed, {counts['failed']} failed")
+    return {'batch_id': batch_id, **counts, 'cancelled': 0}
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, MultiPartParser])
+def enrich_leads_bulk(request):
+    """
+    Start a bulk enrichment job.
+    JSON body {"leads": [lead_data, ...], "concurrency": 8} or a multipart
+    upload with a CSV "file" (plus optional "concurrency" field).
+    Returns 202 with the batch id; follow progress on the automation job
+    (or its SSE stream) and page through results at bulk/<batch_id>/.
+    """
+    if 'file' in request.FILES:
+        try:
+            leads = _leads_from_csv(request.FILES['file'])
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({
+                'success': False,
+                'error': f'Could not read CSV: {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        leads = request.data.get('leads')
+    
+    max_leads = ENRICHMENT_SETTINGS.get('BULK_MAX_LEADS', 10000)
+    if not isinstance(leads, list) or not leads:
+        return Response({
+            'success': False,
+            'error': 'leads (or a CSV file) with at least one lead is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(leads) > max_leads:
+        return Response({
+            'success': False,
+            'error': f'At most {max_leads} leads per job'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        concurrency = int(request.data.get('concurrency', ENRICHMENT_SETTINGS.get('BULK_CONCURRENCY', 8)))
+    except (TypeError, ValueError):
+        return Response({
+            'success': False,
+            'error': 'concurrency must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    concurrency = max(1, min(concurrency, ENRICHMENT_SETTINGS.get('BULK_MAX_CONCURRENCY', 32)))
+    
+    batch_id = str(uuid.uuid4())[:8]
+    now = timezone.now()
+    rows = []
+    rejected = []
+    for position, lead_data in enumerate(leads):
+        if not isinstance(lead_data, dict) or not (lead_data.get('name') or lead_data.get('company')):
+            rejected.append(position)
+            continue
+        # Zero-padded ids keep results in upload order within the batch
+        rows.append(Enrichment(
+            id=f'{batch_id}-{position:05d}',
+            lead_data=lead_data,
+            enriched_data={},
+            status='pending',
+            batch_id=batch_id,
+            created_at=now
+        ))
+    if not rows:
+        return Response({
+            'success': False,
+            'error': 'Every lead is missing both name and company'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    Enrichment.objects.bulk_create(rows, batch_size=1000)
+    try:
+        job = WORKER_POOL.enqueue(
+            'salesforce', 'bulk_enrichment', _bulk_enrichment_task,
+            params={'batch_id': batch_id, 'concurrency': concurrency}
+        )
+    except QueueFull as e:
+        Enrichment.objects.filter(batch_id=batch_id).delete()
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    print(f"🔍 Bulk enrichment {batch_id} queued: {len(rows)} leads, {len(rejected)} rejected, concurrency {concurrency}")
+    
+    return Response({
+        'success': True,
+        'batch_id': batch_id,
+        'automation_id': job.id,
+        'status': job.status,
+        'total': len(rows),
+        'rejected': rejected[:100],
+        'total_rejected': len(rejected),
+        'concurrency': concurrency,
+        'results_url': f'/api/v1/salesforce/leads/bulk/{batch_id}/',
+        'poll_url': f'/api/v1/automations/{job.id}/',
+        'events_url': f'/api/v1/events/?automations={job.id}'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def get_enrichment_history(request):
+def bulk_enrichment_detail(request, batch_id):
     """
-    Get all lead enrichment records from CSV for portal display.
+    Progress and results of a bulk enrichment job, readable while it runs.
+    ?status=completed|failed|pending filters the results page;
+    pass next_cursor back as ?cursor= for the next page.
     """
+    counts = dict(
+        Enrichment.objects.filter(batch_id=batch_id).values_list('status').annotate(n=Count('id')).order_by()
+    )
+    if not counts:
+        return Response({
+            'success': False,
+            'error': 'Enrichment batch not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    queryset = Enrichment.objects.filter(batch_id=batch_id)
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
     try:
-        enrichments = []
-        if os.path.exists(LEAD_ENRICHMENTS_CSV):
-            with open(LEAD_ENRICHMENTS_CSV, 'r') as f:
-                reader = csv.DictReader(f)
-                enrichments = list(reader)
-        
+        results, next_cursor = keyset_queryset_page(
+            queryset, request.query_params.get('cursor'), get_page_size(request), serialize=Enrichment.to_dict
+        )
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    total = sum(counts.values())
+    finished = total - counts.get('pending', 0)
+    return Response({
+        'success': True,
+        'batch_id': batch_id,
+        'total': total,
+        'counts': counts,
+        'progress': finished * 100 // total,
+        'done': not counts.get('pending'),
+        'results': results,
+        'next_cursor': next_cursor
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def enrichment_cache_stats(request):
+    """
+    Company and person cache counters, provider call totals and provider client state
+    (rate limit, adaptive concurrency, retries, pooled connections).
+    """
+    return Response({
+        'success': True,
+        **cache_stats()
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def resolve_company_name(request):
+    """
+    Canonical company a spelling resolves to (?company=metrocc).
+    Read-only: unknown names are not added to the index.
+    """
+    company = request.query_params.get('company', '').strip()
+    if not company:
+        return Response({
+            'success': False,
+            'error': 'company is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    match = resolve_company(company)
+    return Response({
+        'success': True,
+        'company': company,
+        'resolved': match.method != 'new',
+        'canonical_key': match.key,
+        'canonical_name': match.name,
+        'method': match.method,
+        'score': match.score
+    })
+
+
+HISTORY_FILTER_PARAMS = ('company', 'status', 'since', 'until', 'min_confidence', 'max_confidence')
+HISTORY_QUERY_PARAMS = HISTORY_FILTER_PARAMS + ('per_page', 'limit', 'cursor')
+
+
+def enrichment_history_response(request):
+    """
+    Filters (any combination, newest first, paginated with next_cursor):
+    ?company=  ?status=  ?since=/?until= (date or datetime, inclusive)
+    ?min_confidence=/?max_confidence=  ?per_page=  ?cursor=
+    Without any of them every row is returned in file order, as before.
+    """
+    params = request.query_params
+    # Include rows still waiting in the journal queue
+    LEAD_ENRICHMENTS_JOURNAL.flush(timeout=5)
+    total = ENRICHMENT_HISTORY.refresh()
+
+    if not any(p in params for p in HISTORY_QUERY_PARAMS):
+        enrichments = ENRICHMENT_HISTORY.index.read_rows(0, total)
         return Response({
             'success': True,
             'count': len(enrichments),
             'enrichments': enrichments
         })
+
+    try:
+        filters = {
+            'company': params.get('company') or None,
+            'status': params.get('status') or None,
+            'since': parse_bound(params['since']) if params.get('since') else None,
+            'until': parse_bound(params['until'], end=True) if params.get('until') else None,
+            'min_confidence': int(params['min_confidence']) if params.get('min_confidence') else None,
+            'max_confidence': int(params['max_confidence']) if params.get('max_confidence') else None,
+        }
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'since/until must be ISO dates and confidence bounds integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        enrichments, next_cursor = ENRICHMENT_HISTORY.query(
+            cursor=params.get('cursor'), limit=get_page_size(request), **filters
+        )
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'count': len(enrichments),
+        'total_rows': total,
+        'filters': {key: params[key] for key in HISTORY_FILTER_PARAMS if params.get(key)},
+        'next_cursor': next_cursor,
+        'enrichments': enrichments
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_enrichment_history(request):
+    """
+    Get lead enrichment records from CSV for portal display.
+    Supports company/status/date/confidence filters with cursor pagination.
+    """
+    try:
+        return enrichment_history_response(request)
     except Exception as e:
         return Response({
             'success': False,
@@ -196,11 +536,11 @@ def get_enrichment_status(request, enrichment_id):
     """
     Get status of a specific enrichment job.
     """
-    if enrichment_id in ENRICHMENT_JOBS:
-        job = ENRICHMENT_JOBS[enrichment_id]
+    job = Enrichment.objects.filter(pk=enrichment_id).first()
+    if job:
         return Response({
             'success': True,
-            'enrichment': job
+            'enrichment': job.to_dict()
         })
     
     return Response({
@@ -209,105 +549,548 @@ def get_enrichment_status(request, enrichment_id):
     }, status=status.HTTP_404_NOT_FOUND)
 
 
+def _lead_import_task(task, import_id, path=None, count=None, touched=0):
+    """
+    Worker-pool body of import_leads.
+    Streams the uploaded file (or the Salesforce stand-in's export) through
+    read_chunks and upserts chunk by chunk, so memory stays flat whatever the size.
+    """
+    lead_import = LeadImport.objects.get(pk=import_id)
+    since = lead_import.since
+    chunk_size = IMPORT_SETTINGS.get('CHUNK_SIZE', 2000)
+    counts = {}
+    watermark = since
+    LeadImport.objects.filter(pk=import_id).update(status='running')
+
+    if path:
+        size = os.path.getsize(path) or 1
+        raw = open(path, 'rb')
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        position = lambda rows: raw.tell() * 100 // size
+        task.log(f'Importing {size // 1024} KB of leads in chunks of {chunk_size}', progress=0)
+    else:
+        stream = export_lines(count, touched, modified_since=since)
+        position = lambda rows: rows * 100 // max(count, 1)
+        task.log(f'Importing up to {count} leads from the Salesforce stand-in', progress=0)
+
+    # Anything that escapes the loop leaves the import marked failed
+    result_status = 'failed'
+    error = 'Import stopped unexpectedly'
+    progress = 0
+    try:
+        for chunk in read_chunks(stream, chunk_size):
+            if task.is_cancelled():
+                result_status = 'cancelled'
+                break
+            chunk_counts, latest = import_chunk(chunk, since=since, import_id=import_id)
+            add_counts(counts, chunk_counts)
+            if latest is not None and (watermark is None or latest > watermark):
+                watermark = latest
+            # Progress lands on the job row at most once per percent
+            if position(counts['rows']) > progress:
+                progress = min(position(counts['rows']), 99)
+                task.log(f"Imported {counts['rows']} rows ({counts['created']} new, {counts['updated']} updated)",
+                         progress=progress)
+                LeadImport.objects.filter(pk=import_id).update(counts=counts, watermark=watermark)
+        else:
+            result_status = 'completed'
+        error = ''
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        error = str(e)
+    finally:
+        if path:
+            stream.close()
+            if os.path.exists(path):
+                os.remove(path)
+        LeadImport.objects.filter(pk=import_id).update(
+            status=result_status, counts=counts, watermark=watermark, error=error, finished_at=timezone.now()
+        )
+
+    print(f"✅ Lead import {import_id} {result_status}: {counts.get('rows', 0)} rows, "
+          f"{counts.get('created', 0)} created, {counts.get('updated', 0)} updated")
+    if error:
+        raise ImportFormatError(error)
+    return {'import_id': import_id, 'status': result_status, **counts,
+            'watermark': watermark.isoformat() if watermark else None}
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, MultiPartParser])
+def import_leads(request):
+    """
+    Start a streaming lead import.
+    Multipart upload of a Salesforce report / Bulk API CSV "file", or
+    {"source": "stub", "count": 100000, "touched": 0} to pull from the local
+    Salesforce stand-in. "since" (ISO timestamp) skips leads last modified
+    before it; "incremental": true uses the last completed import's watermark
+    from the same source. Returns 202; follow the automation job or poll
+    import/<import_id>/.
+    """
+    upload = request.FILES.get('file')
+    source = 'upload' if upload else request.data.get('source', '')
+    if source not in ('upload', 'stub'):
+        return Response({
+            'success': False,
+            'error': 'A CSV file or source "stub" is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    params = {}
+    try:
+        if source == 'stub':
+            max_leads = IMPORT_SETTINGS.get('STUB_MAX_LEADS', 5000000)
+            params['count'] = max(0, min(int(request.data.get('count', 1000)), max_leads))
+            params['touched'] = max(0, int(request.data.get('touched', 0)))
+    except (TypeError, ValueError):
+        return Response({
+            'success': False,
+            'error': 'count and touched must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    since = None
+    if request.data.get('since'):
+        since = parse_modified(request.data['since'])
+        if since is None:
+            return Response({
+                'success': False,
+                'error': 'since must be an ISO timestamp'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif str(request.data.get('incremental', '')).lower() in ('1', 'true', 'yes'):
+        previous = LeadImport.objects.filter(
+            source=source, status='completed', watermark__isnull=False
+        ).order_by('-created_at').first()
+        since = previous.watermark if previous else None
+
+    import_id = str(uuid.uuid4())[:8]
+    if upload:
+        os.makedirs(LEAD_IMPORTS_DIR, exist_ok=True)
+        params['path'] = os.path.join(LEAD_IMPORTS_DIR, f'{import_id}.csv')
+        with open(params['path'], 'wb') as f:
+            for piece in upload.chunks():
+                f.write(piece)
+
+    lead_import = LeadImport.objects.create(id=import_id, source=source, since=since)
+    try:
+        job = WORKER_POOL.enqueue(
+            'salesforce', 'lead_import', _lead_import_task, params={'import_id': import_id, **params}
+        )
+    except QueueFull as e:
+        lead_import.delete()
+        if upload:
+            os.remove(params['path'])
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    LeadImport.objects.filter(pk=import_id).update(automation_id=job.id)
+
+    print(f"📥 Lead import {import_id} queued from {source}" + (f" since {since.isoformat()}" if since else ''))
+
+    return Response({
+        'success': True,
+        'import_id': import_id,
+        'source': source,
+        'since': since.isoformat() if since else None,
+        'automation_id': job.id,
+        'status': job.status,
+        'import_url': f'/api/v1/salesforce/leads/import/{import_id}/',
+        'poll_url': f'/api/v1/automations/{job.id}/',
+        'events_url': f'/api/v1/events/?automations={job.id}'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def lead_import_detail(request, import_id):
+    """
+    Status, counters and watermark of a lead import (counters update while it runs).
+    """
+    lead_import = LeadImport.objects.filter(pk=import_id).first()
+    if lead_import is None:
+        return Response({
+            'success': False,
+            'error': 'Lead import not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'success': True,
+        'import': lead_import.to_dict()
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_imported_leads(request):
+    """
+    Imported leads in import order.
+    ?email= looks a lead up by email hash, ?import_id= limits to one import's writes;
+    pass next_cursor back as ?cursor= for the next page.
+    """
+    queryset = Lead.objects.all()
+    if request.query_params.get('email'):
+        queryset = queryset.filter(email_hash=email_hash(request.query_params['email']))
+    if request.query_params.get('import_id'):
+        queryset = queryset.filter(import_id=request.query_params['import_id'])
+    try:
+        leads, next_cursor = keyset_queryset_page(
+            queryset, request.query_params.get('cursor'), get_page_size(request), serialize=Lead.to_dict
+        )
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'success': True,
+        'count': len(leads),
+        'leads': leads,
+        'next_cursor': next_cursor
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stub_salesforce_export(request):
+    """
+    Streamed Bulk API style CSV from the local Salesforce stand-in
+    (?count=1000&touched=0&modified_since=ISO), for trying the importer by upload.
+    """
+    try:
+        max_leads = IMPORT_SETTINGS.get('STUB_MAX_LEADS', 5000000)
+        count = max(0, min(int(request.query_params.get('count', 1000)), max_leads))
+        touched = max(0, int(request.query_params.get('touched', 0)))
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'count and touched must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    modified_since = parse_modified(request.query_params.get('modified_since'))
+
+    response = StreamingHttpResponse(export_lines(count, touched, modified_since), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="leads.csv"'
+    return response
+
+
+# Each process schedules only the queued rows it has claimed, so no lead is enriched twice
+QUEUE_OWNER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+QUEUE_LEASE = timedelta(seconds=SCHEDULER_SETTINGS.get('LEASE_SECONDS', 300))
+
+
+def _run_queued_enrichment(enrichment_id, lead_data):
+    """Scheduler body: enrich one queued lead and record it; returns the provider calls it made"""
+    try:
+        # Lost the lease (this process stalled and another took the row over): leave it to them
+        if not Enrichment.objects.filter(pk=enrichment_id, status='queued', claimed_by=QUEUE_OWNER).update(
+            status='running', lease_expires=timezone.now() + QUEUE_LEASE
+        ):
+            return 0
+        try:
+            enriched_data, cache = enrich(lead_data)
+        except Exception as e:
+            Enrichment.objects.filter(pk=enrichment_id).update(enriched_data={'error': str(e)}, status='failed')
+            raise
+        Enrichment.objects.filter(pk=enrichment_id).update(enriched_data=enriched_data, status='completed')
+        LEAD_ENRICHMENTS_JOURNAL.append(enrichment_csv_row(lead_data, enriched_data, enrichment_id))
+        # Cache hits and coalesced lookups cost nothing
+        return sum(1 for outcome in cache.values() if outcome == 'miss')
+    finally:
+        with _queue_lock:
+            _held.discard(enrichment_id)
+        close_old_connections()
+
+
+# Highest-value leads first, within the hourly provider call budget.
+# The budget is per process: with N workers, set CALLS_PER_HOUR to the provider quota / N.
+ENRICHMENT_SCHEDULER = EnrichmentScheduler(
+    _run_queued_enrichment,
+    calls_per_hour=SCHEDULER_SETTINGS.get('CALLS_PER_HOUR', 600),
+    calls_per_lead=SCHEDULER_SETTINGS.get('CALLS_PER_LEAD', 2),
+    concurrency=SCHEDULER_SETTINGS.get('CONCURRENCY', 4),
+    max_queued=SCHEDULER_SETTINGS.get('MAX_QUEUED', 100000),
+    status_weights=SCHEDULER_SETTINGS.get('STATUS_WEIGHTS'),
+    default_status_weight=SCHEDULER_SETTINGS.get('DEFAULT_STATUS_WEIGHT', 1.0),
+    missing_field_weight=SCHEDULER_SETTINGS.get('MISSING_FIELD_WEIGHT', 1.0),
+    age_weight_per_day=SCHEDULER_SETTINGS.get('AGE_WEIGHT_PER_DAY', 0.1)
+)
+
+_queue_lock = threading.Lock()
+_held = set()              # enrichment ids this process has submitted and not finished
+_lease_thread = None
+
+
+def _submit_claimed(rows):
+    """Submit (enrichment_id, lead_data) pairs this process has claimed; returns scheduler.submit's lists"""
+    queued, duplicates, refused = ENRICHMENT_SCHEDULER.submit(rows)
+    with _queue_lock:
+        _held.update(queued)
+    _start_lease_thread()
+    return queued, duplicates, refused
+
+
+def _recover_queued_enrichments():
+    """
+    Claim queued (or running) leads whose lease has expired, i.e. left by a
+    process that died, and schedule them here. Each row is claimed with a
+    conditional UPDATE, so only one live process wins it.
+    """
+    now = timezone.now()
+    expired = Q(status__in=('queued', 'running')) & (Q(claimed_by='') | Q(lease_expires__isnull=True) | Q(lease_expires__lt=now))
+    candidates = list(Enrichment.objects.filter(expired).order_by('created_at').values_list('id', flat=True)[:10000])
+    if not candidates:
+        return
+    Enrichment.objects.filter(expired, pk__in=candidates).update(
+        status='queued', claimed_by=QUEUE_OWNER, lease_expires=now + QUEUE_LEASE
+    )
+    with _queue_lock:
+        held = set(_held)
+    won = [
+        (enrichment_id, lead_data)
+        for enrichment_id, lead_data in Enrichment.objects.filter(
+            pk__in=candidates, status='queued', claimed_by=QUEUE_OWNER
+        ).order_by('created_at').values_list('id', 'lead_data')
+        if enrichment_id not in held
+    ]
+    if won:
+        queued, duplicates, refused = _submit_claimed(won)
+        Enrichment.objects.filter(pk__in=duplicates + refused).update(status='cancelled')
+        print(f"🔁 Re-queued {len(queued)} enrichments left by a stopped process")
+
+
+def _renew_leases():
+    """Keep this process's claims alive and pick up leads whose owner has stopped"""
+    while True:
+        time.sleep(QUEUE_LEASE.total_seconds() / 3)
+        try:
+            Enrichment.objects.filter(
+                claimed_by=QUEUE_OWNER, status__in=('queued', 'running')
+            ).update(lease_expires=timezone.now() + QUEUE_LEASE)
+            _recover_queued_enrichments()
+        except Exception as e:
+            print(f"❌ Enrichment lease renewal failed: {e}")
+        finally:
+            close_old_connections()
+
+
+def _start_lease_thread():
+    global _lease_thread
+    with _queue_lock:
+        if _lease_thread is None:
+            _lease_thread = threading.Thread(target=_renew_leases, name='lead-queue-leases', daemon=True)
+            _lease_thread.start()
+
+
+def _imported_lead_data(lead):
+    return {
+        'id': lead.id,
+        'name': lead.name,
+        'company': lead.company,
+        'email': lead.email,
+        'phone': lead.phone,
+        'title': lead.title,
+        'status': lead.status,
+        'source': lead.lead_source,
+        'created_at': lead.created_at.isoformat(),
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def queue_enrichments(request):
+    """
+    Queue leads for priority-scheduled enrichment.
+    {"leads": [lead_data, ...]}, {"lead_ids": [...]} for imported leads, or
+    {"mock": true} for the demo leads. Leads are enriched by status, missing
+    fields and age under the hourly provider call budget; poll each result at
+    status/<enrichment_id>/ and the queue at queue/metrics/.
+    """
+    _recover_queued_enrichments()
+    if request.data.get('mock'):
+        leads = [dict(lead) for lead in MOCK_LEADS]
+    elif request.data.get('lead_ids'):
+        lead_ids = request.data['lead_ids']
+        if not isinstance(lead_ids, list):
+            return Response({
+                'success': False,
+                'error': 'lead_ids must be a list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        leads = [_imported_lead_data(lead) for lead in Lead.objects.filter(pk__in=lead_ids)]
+    else:
+        leads = request.data.get('leads')
+
+    max_leads = ENRICHMENT_SETTINGS.get('BULK_MAX_LEADS', 10000)
+    if not isinstance(leads, list) or not leads:
+        return Response({
+            'success': False,
+            'error': 'leads, lead_ids or mock is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(leads) > max_leads:
+        return Response({
+            'success': False,
+            'error': f'At most {max_leads} leads per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    now = timezone.now()
+    rows = []
+    rejected = []
+    for position, lead_data in enumerate(leads):
+        if not isinstance(lead_data, dict) or not (lead_data.get('name') or lead_data.get('company')):
+            rejected.append(position)
+            continue
+        rows.append(Enrichment(
+            id=str(uuid.uuid4())[:8], lead_data=lead_data, status='queued', created_at=now,
+            claimed_by=QUEUE_OWNER, lease_expires=now + QUEUE_LEASE
+        ))
+    # Rows exist (claimed by this process) before the dispatcher can pick their leads up
+    Enrichment.objects.bulk_create(rows, batch_size=1000)
+    queued, duplicates, refused = _submit_claimed([(row.id, row.lead_data) for row in rows])
+    if duplicates or refused:
+        Enrichment.objects.filter(pk__in=duplicates + refused).delete()
+    if refused and not queued:
+        return Response({
+            'success': False,
+            'error': 'Enrichment queue is full'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    queued_ids = set(queued)
+    print(f"📬 Queued {len(queued)} leads for enrichment ({len(duplicates)} already queued, {len(refused)} refused)")
+
+    return Response({
+        'success': True,
+        'queued': len(queued),
+        'duplicates': len(duplicates),
+        'refused': len(refused),
+        'rejected': rejected[:100],
+        'enrichments': [
+            {
+                'enrichment_id': row.id,
+                'lead_id': row.lead_data.get('id'),
+                'score': round(ENRICHMENT_SCHEDULER.score(row.lead_data), 2),
+                'status_url': f'/api/v1/salesforce/leads/status/{row.id}/'
+            }
+            for row in rows if row.id in queued_ids
+        ][:1000],
+        'metrics_url': '/api/v1/salesforce/leads/queue/metrics/'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def enrichment_queue_metrics(request):
+    """
+    Queue depth, wait times (avg/p50/p95 over recent dispatches), hourly
+    budget burn and the next leads in line (?preview=10, at most 50).
+    """
+    _recover_queued_enrichments()
+    try:
+        preview = max(0, min(int(request.query_params.get('preview', 10)), 50))
+    except ValueError:
+        preview = 10
+    return Response({
+        'success': True,
+        **ENRICHMENT_SCHEDULER.stats(preview=preview)
+    })
+
+
+# Salesforce leads for the portal demo page
+MOCK_LEADS = [
+    {
+        'id': 'lead_001',
+        'name': 'John Martinez',
+        'company': 'Coastal Construction Group',
+        'email': '',
+        'phone': '',
+        'title': '',
+        'status': 'New',
+        'source': 'Website',
+        'created_at': '2025-12-05T10:30:00Z'
+    },
+    {
+        'id': 'lead_002', 
+        'name': 'Sarah Thompson',
+        'company': 'Bay Area Builders',
+        'email': 'sthompson@baybuilders.com',
+        'phone': '',
+        'title': 'Project Manager',
+        'status': 'Contacted',
+        'source': 'Referral',
+        'created_at': '2025-12-04T14:15:00Z'
+    },
+    {
+        'id': 'lead_003',
+        'name': 'Michael Chen',
+        'company': 'Pacific General Contractors',
+        'email': '',
+        'phone': '+1 (415) 555-0123',
+        'title': '',
+        'status': 'New',
+        'source': 'Trade Show',
+        'created_at': '2025-12-03T09:45:00Z'
+    },
+    {
+        'id': 'lead_004',
+        'name': 'Emily Rodriguez',
+        'company': 'Sunshine State Developers',
+        'email': '',
+        'phone': '',
+        'title': '',
+        'status': 'Qualified',
+        'source': 'LinkedIn',
+        'created_at': '2025-12-02T16:20:00Z'
+    },
+    {
+        'id': 'lead_005',
+        'name': 'David Wilson',
+        'company': 'Metro Commercial Construction',
+        'email': 'dwilson@metrocc.com',
+        'phone': '+1 (305) 555-0456',
+        'title': 'VP Operations',
+        'status': 'Enriched',
+        'source': 'Cold Outreach',
+        'created_at': '2025-12-01T11:00:00Z'
+    },
+    {
+        'id': 'lead_006',
+        'name': 'Jennifer Adams',
+        'company': 'Elite Home Builders',
+        'email': '',
+        'phone': '',
+        'title': '',
+        'status': 'New',
+        'source': 'Website',
+        'created_at': '2025-11-30T13:30:00Z'
+    },
+    {
+        'id': 'lead_007',
+        'name': 'Robert Taylor',
+        'company': 'Summit Construction Inc',
+        'email': '',
+        'phone': '',
+        'title': 'Owner',
+        'status': 'Contacted',
+        'source': 'Referral',
+        'created_at': '2025-11-29T08:15:00Z'
+    },
+    {
+        'id': 'lead_008',
+        'name': 'Amanda Foster',
+        'company': 'Pinnacle Developers LLC',
+        'email': 'afoster@pinnacledev.com',
+        'phone': '',
+        'title': 'Director of Projects',
+        'status': 'Enriched',
+        'source': 'Conference',
+        'created_at': '2025-11-28T15:45:00Z'
+    }
+]
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_mock_leads(request):
     """
     Get mock Salesforce leads for the portal demo page.
     """
-    mock_leads = [
-        {
-            'id': 'lead_001',
-            'name': 'John Martinez',
-            'company': 'Coastal Construction Group',
-            'email': '',
-            'phone': '',
-            'title': '',
-            'status': 'New',
-            'source': 'Website',
-            'created_at': '2025-12-05T10:30:00Z'
-        },
-        {
-            'id': 'lead_002', 
-            'name': 'Sarah Thompson',
-            'company': 'Bay Area Builders',
-            'email': 'sthompson@baybuilders.com',
-            'phone': '',
-            'title': 'Project Manager',
-            'status': 'Contacted',
-            'source': 'Referral',
-            'created_at': '2025-12-04T14:15:00Z'
-        },
-        {
-            'id': 'lead_003',
-            'name': 'Michael Chen',
-            'company': 'Pacific General Contractors',
-            'email': '',
-            'phone': '+1 (415) 555-0123',
-            'title': '',
-            'status': 'New',
-            'source': 'Trade Show',
-            'created_at': '2025-12-03T09:45:00Z'
-        },
-        {
-            'id': 'lead_004',
-            'name': 'Emily Rodriguez',
-            'company': 'Sunshine State Developers',
-            'email': '',
-            'phone': '',
-            'title': '',
-            'status': 'Qualified',
-            'source': 'LinkedIn',
-            'created_at': '2025-12-02T16:20:00Z'
-        },
-        {
-            'id': 'lead_005',
-            'name': 'David Wilson',
-            'company': 'Metro Commercial Construction',
-            'email': 'dwilson@metrocc.com',
-            'phone': '+1 (305) 555-0456',
-            'title': 'VP Operations',
-            'status': 'Enriched',
-            'source': 'Cold Outreach',
-            'created_at': '2025-12-01T11:00:00Z'
-        },
-        {
-            'id': 'lead_006',
-            'name': 'Jennifer Adams',
-            'company': 'Elite Home Builders',
-            'email': '',
-            'phone': '',
-            'title': '',
-            'status': 'New',
-            'source': 'Website',
-            'created_at': '2025-11-30T13:30:00Z'
-        },
-        {
-            'id': 'lead_007',
-            'name': 'Robert Taylor',
-            'company': 'Summit Construction Inc',
-            'email': '',
-            'phone': '',
-            'title': 'Owner',
-            'status': 'Contacted',
-            'source': 'Referral',
-            'created_at': '2025-11-29T08:15:00Z'
-        },
-        {
-            'id': 'lead_008',
-            'name': 'Amanda Foster',
-            'company': 'Pinnacle Developers LLC',
-            'email': 'afoster@pinnacledev.com',
-            'phone': '',
-            'title': 'Director of Projects',
-            'status': 'Enriched',
-            'source': 'Conference',
-            'created_at': '2025-11-28T15:45:00Z'
-        }
-    ]
-    
     return Response({
         'success': True,
-        'count': len(mock_leads),
-        'leads': mock_leads
+        'count': len(MOCK_LEADS),
+        'leads': MOCK_LEADS
     })
@@ -3,6 +3,11 @@ ASGI config for surfaceflow project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Server-Sent Events endpoint (/api/v1/events/) is an async view; serve it
+through this module so idle streams don't each hold a worker thread:
+
+    uvicorn surfaceflow.asgi:application --host 0.0.0.0 --port 8000
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -72,10 +72,18 @@ WSGI_APPLICATION = 'surfaceflow.wsgi.application'
 
 
 # Database - Using SQLite for development
+# WAL lets readers run alongside a writer, so several gunicorn workers can share
+# the file; IMMEDIATE transactions take the write lock up front instead of
+# failing with "database is locked" on upgrade.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -146,6 +154,11 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
     'x-extension-id',
+    'idempotency-key',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'idempotent-replayed',
 ]
 
 
@@ -155,3 +168,226 @@ CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+
+# Server-Sent Events hub (api/events.py)
+# HISTORY: recent events kept for Last-Event-ID resume
+# MAX_QUEUE: events buffered per slow client before the oldest are dropped
+# HEARTBEAT: seconds between keepalive comments on an idle stream
+EVENT_HUB = {
+    'HISTORY': 1000,
+    'MAX_QUEUE': 500,
+    'HEARTBEAT': 15,
+    'RETRY_MS': 3000,
+}
+
+# Idempotency-Key responses (api/idempotency.py, stored in the IdempotencyKey table)
+# TTL: seconds a key's response is replayed
+# WAIT_TIMEOUT: seconds a duplicate waits for the first request before a 409
+# STALE_AFTER: seconds before an unfinished key (its worker died) can be taken over
+IDEMPOTENCY = {
+    'TTL': int(os.getenv('IDEMPOTENCY_TTL', str(24 * 60 * 60))),
+    'WAIT_TIMEOUT': float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '30')),
+    'STALE_AFTER': int(os.getenv('IDEMPOTENCY_STALE_AFTER', '300')),
+}
+
+# Salesforce lead enrichment (platforms/salesforce/lead_enrichment)
+# BULK_CONCURRENCY: leads enriched at once per bulk job (clients may ask for up to BULK_MAX_CONCURRENCY)
+# BULK_CHUNK_SIZE: leads per progress update / bulk write
+LEAD_ENRICHMENT = {
+    'BULK_MAX_LEADS': int(os.getenv('LEAD_ENRICHMENT_BULK_MAX_LEADS', '10000')),
+    'BULK_CONCURRENCY': int(os.getenv('LEAD_ENRICHMENT_BULK_CONCURRENCY', '8')),
+    'BULK_MAX_CONCURRENCY': 32,
+    'BULK_CHUNK_SIZE': 100,
+    # Streaming lead import (lead_enrichment/lead_import.py): rows parsed and upserted per chunk,
+    # and the most leads one import may pull from the local Salesforce stand-in
+    'IMPORT': {
+        'CHUNK_SIZE': int(os.getenv('LEAD_IMPORT_CHUNK_SIZE', '2000')),
+        'STUB_MAX_LEADS': 5000000,
+    },
+    # Priority enrichment queue (lead_enrichment/scheduler.py): leads are scored by status weight,
+    # blank email/phone/title and age, and dispatched under CALLS_PER_HOUR provider calls.
+    # The budget is per process; queued rows are leased to one process for LEASE_SECONDS (renewed while alive)
+    'SCHEDULER': {
+        'CALLS_PER_HOUR': int(os.getenv('LEAD_ENRICHMENT_CALLS_PER_HOUR', '600')),
+        'CALLS_PER_LEAD': 2,
+        'CONCURRENCY': int(os.getenv('LEAD_ENRICHMENT_QUEUE_CONCURRENCY', '4')),
+        'MAX_QUEUED': 100000,
+        'STATUS_WEIGHTS': {
+            'qualified': 4.0, 'new': 3.0, 'open - not contacted': 3.0,
+            'contacted': 2.0, 'working - contacted': 2.0,
+            'enriched': 0.0, 'closed - converted': 0.0, 'closed - not converted': 0.0,
+        },
+        'DEFAULT_STATUS_WEIGHT': 1.0,
+        'MISSING_FIELD_WEIGHT': 1.0,
+        'AGE_WEIGHT_PER_DAY': 0.1,
+        'LEASE_SECONDS': 300,
+    },
+    # History indexes (lead_enrichment/history.py) snapshot their parsed columns every N new rows
+    'HISTORY_SNAPSHOT_EVERY': int(os.getenv('LEAD_ENRICHMENT_HISTORY_SNAPSHOT_EVERY', '10000')),
+    # Shared company facts and per-person results; NEGATIVE_TTL applies to lookups that found nothing
+    'COMPANY_CACHE': {
+        'TTL': int(os.getenv('LEAD_COMPANY_CACHE_TTL', str(30 * 24 * 60 * 60))),
+        'NEGATIVE_TTL': int(os.getenv('LEAD_COMPANY_CACHE_NEGATIVE_TTL', str(24 * 60 * 60))),
+        'MAX_ENTRIES': int(os.getenv('LEAD_COMPANY_CACHE_MAX_ENTRIES', '20000')),
+    },
+    'PERSON_CACHE': {
+        'TTL': int(os.getenv('LEAD_PERSON_CACHE_TTL', str(7 * 24 * 60 * 60))),
+        'NEGATIVE_TTL': int(os.getenv('LEAD_PERSON_CACHE_NEGATIVE_TTL', str(24 * 60 * 60))),
+        'MAX_ENTRIES': int(os.getenv('LEAD_PERSON_CACHE_MAX_ENTRIES', '100000')),
+    },
+    # Company entity resolution (lead_enrichment/company_index.py): THRESHOLD is the
+    # minimum trigram Jaccard similarity for two spellings to count as one company
+    'COMPANY_INDEX': {
+        'THRESHOLD': float(os.getenv('LEAD_COMPANY_MATCH_THRESHOLD', '0.8')),
+        'MAX_COMPANIES': int(os.getenv('LEAD_COMPANY_INDEX_MAX', '50000')),
+    },
+    # Web-search provider client (lead_enrichment/provider.py); mock data when URL is empty.
+    # RATE/BURST: token bucket in requests/s; the in-flight limit adapts (AIMD) between
+    # MIN_ and MAX_CONCURRENCY, halving on 429s or responses slower than LATENCY_TARGET seconds.
+    # Local stub: python -m platforms.salesforce.lead_enrichment.stub_provider
+    'PROVIDER': {
+        'URL': os.getenv('LEAD_PROVIDER_URL', ''),
+        'API_KEY': os.getenv('LEAD_PROVIDER_API_KEY', ''),
+        'RATE': float(os.getenv('LEAD_PROVIDER_RATE', '10')),
+        'BURST': float(os.getenv('LEAD_PROVIDER_BURST', '20')),
+        'INITIAL_CONCURRENCY': 4,
+        'MIN_CONCURRENCY': 1,
+        'MAX_CONCURRENCY': int(os.getenv('LEAD_PROVIDER_MAX_CONCURRENCY', '16')),
+        'LATENCY_TARGET': float(os.getenv('LEAD_PROVIDER_LATENCY_TARGET', '5.0')),
+        'MAX_RETRIES': 4,
+        'BACKOFF_BASE': 0.5,
+        'BACKOFF_MAX': 30,
+        'TIMEOUT': 30,
+    },
+}
+
+# In-process worker pool for automation jobs (api/workers.py)
+# MAX_PENDING: queued + running jobs per process before new ones are refused
+WORKER_POOL = {
+    'MAX_WORKERS': int(os.getenv('WORKER_POOL_MAX_WORKERS', '4')),
+    'MAX_PENDING': int(os.getenv('WORKER_POOL_MAX_PENDING', '100')),
+}
+
+
+# OTA Search Configuration
+# STUB_LATENCY: seconds (or [min, max]) each stub source sleeps before answering
+# SOURCE_TIMEOUTS: per-source deadline overrides in seconds
+# SOURCE_CONCURRENCY: threads per source (SOURCE_CONCURRENCIES overrides it per source);
+#   a source with all threads busy, or a timed-out call still running, is skipped as 'busy'
+OTA_SEARCH = {
+    'SOURCE_TIMEOUT': float(os.getenv('OTA_SOURCE_TIMEOUT', '5.0')),
+    'SOURCE_CONCURRENCY': int(os.getenv('OTA_SOURCE_CONCURRENCY', '16')),
+    'SOURCE_CONCURRENCIES': {},
+    'STUB_LATENCY': {
+        name: float(os.getenv('OTA_STUB_LATENCY', '0'))
+        for name in ['Internal Housing', 'Airbnb', 'Expedia', 'Kayak', 'Booking.com', 'Hotels.com']
+    },
+    'SOURCE_TIMEOUTS': {},
+    # hotel-booking/search/batch/: jobs searched at once per request, and jobs per request
+    'BATCH_CONCURRENCY': int(os.getenv('OTA_BATCH_CONCURRENCY', '8')),
+    'BATCH_MAX_JOBS': int(os.getenv('OTA_BATCH_MAX_JOBS', '500')),
+}
+
+# BuilderTrend job sync: jobs accepted per jobs/sync/bulk/ request
+JOB_SYNC = {
+    'BULK_MAX_JOBS': int(os.getenv('JOB_SYNC_BULK_MAX_JOBS', '1000')),
+}
+
+# Hotel search result cache (per process)
+HOTEL_SEARCH_CACHE = {
+    'TTL': int(os.getenv('HOTEL_SEARCH_CACHE_TTL', '600')),
+    'MAX_ENTRIES': int(os.getenv('HOTEL_SEARCH_CACHE_MAX_ENTRIES', '1000')),
+    'MAX_BYTES': int(os.getenv('HOTEL_SEARCH_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+}
+
+# OTA price history (buildertrend/price_history.py)
+# DIR: one append-only .bin file per (city, source); fresh search results are recorded
+# ADVICE_*: lead-time window and minimum past stays for book-now-vs-wait advice
+# WAIT_THRESHOLD: expected drop (fraction) before advising to wait
+PRICE_HISTORY = {
+    'ENABLED': os.getenv('PRICE_HISTORY_ENABLED', 'True') == 'True',
+    'DIR': os.getenv('PRICE_HISTORY_DIR', str(BASE_DIR / 'data' / 'price_history')),
+    'MAX_OPEN_MAPS': 256,
+    'ADVICE_WINDOW_DAYS': 3,
+    'ADVICE_MIN_STAYS': 5,
+    'WAIT_THRESHOLD': 0.05,
+}
+
+# Offline geocoding for job addresses
+# CSV: zip,city,state,latitude,longitude (ships with a seed list; swap in a full ZIP export)
+# CACHE_SIZE: distinct raw addresses kept in the normalization memo
+GAZETTEER = {
+    'CSV': os.getenv('GAZETTEER_CSV', str(BASE_DIR / 'data' / 'gazetteer.csv')),
+    'CACHE_SIZE': int(os.getenv('GAZETTEER_CACHE_SIZE', '10000')),
+}
+
+# Internal housing inventory
+# CELL_DEGREES: grid cell size of the spatial index (0.1 deg is about 7 miles)
+# REFRESH_INTERVAL: seconds between checks for units changed by other processes
+INTERNAL_HOUSING = {
+    'CELL_DEGREES': 0.1,
+    'MAX_DISTANCE_MILES': float(os.getenv('INTERNAL_HOUSING_MAX_MILES', '50')),
+    'MAX_RESULTS': 3,
+    'NIGHTLY_SAVINGS': float(os.getenv('INTERNAL_HOUSING_NIGHTLY_SAVINGS', '175')),
+    'REFRESH_INTERVAL': int(os.getenv('INTERNAL_HOUSING_REFRESH_INTERVAL', '60')),
+}
+
+# Booking auto-approval (buildertrend/approval_rules.py)
+# A new booking is approved at search time when its recommended offer meets
+# every condition of any policy. Conditions: max_price_per_night, max_total_price,
+# min_rating, max_distance_miles, is_internal, sources, available.
+HOTEL_AUTO_APPROVAL = {
+    # Off by default: approvals book real rooms, so turn it on deliberately
+    'ENABLED': os.getenv('HOTEL_AUTO_APPROVAL_ENABLED', 'False').lower() == 'true',
+    'POLICIES': [
+        {'name': 'internal-housing', 'conditions': {'is_internal': True}},
+        {
+            'name': 'under-threshold',
+            'conditions': {
+                'max_price_per_night': float(os.getenv('HOTEL_AUTO_APPROVE_THRESHOLD', '150.00')),
+                'min_rating': float(os.getenv('HOTEL_AUTO_APPROVE_MIN_RATING', '4.0')),
+            },
+        },
+    ],
+}
+
+# Hotel offer ranking
+# WEIGHTS: relative importance of each axis (each is min-max normalized per search)
+# DOMINANCE_FILTER: drop offers another offer matches or beats on every axis
+# VECTORIZED_MIN_OFFERS: searches with fewer offers are ranked without NumPy (faster below ~250)
+HOTEL_RANKING = {
+    'WEIGHTS': {
+        'price': float(os.getenv('HOTEL_RANKING_PRICE_WEIGHT', '0.40')),
+        'rating': float(os.getenv('HOTEL_RANKING_RATING_WEIGHT', '0.25')),
+        'distance': float(os.getenv('HOTEL_RANKING_DISTANCE_WEIGHT', '0.15')),
+        'amenities': float(os.getenv('HOTEL_RANKING_AMENITIES_WEIGHT', '0.10')),
+        'savings': float(os.getenv('HOTEL_RANKING_SAVINGS_WEIGHT', '0.10')),
+    },
+    'DOMINANCE_FILTER': True,
+    'VECTORIZED_MIN_OFFERS': int(os.getenv('HOTEL_RANKING_VECTORIZED_MIN_OFFERS', '250')),
+}
+
+# Write-behind CSV journal
+# FSYNC: 'never', 'batch' (every batch) or 'interval' (at most every FSYNC_INTERVAL seconds)
+CSV_JOURNAL = {
+    'FLUSH_INTERVAL': float(os.getenv('CSV_JOURNAL_FLUSH_INTERVAL', '0.5')),
+    'BATCH_SIZE': int(os.getenv('CSV_JOURNAL_BATCH_SIZE', '500')),
+    'FSYNC': os.getenv('CSV_JOURNAL_FSYNC', 'batch'),
+    'FSYNC_INTERVAL': float(os.getenv('CSV_JOURNAL_FSYNC_INTERVAL', '1.0')),
+    'MAX_QUEUE': int(os.getenv('CSV_JOURNAL_MAX_QUEUE', '10000')),
+    'PUT_TIMEOUT': float(os.getenv('CSV_JOURNAL_PUT_TIMEOUT', '2.0')),
+}
+
+# Booking store
+# Finished bookings older than FINISHED_TTL_DAYS and anything older than
+# PENDING_TTL_DAYS move to ARCHIVE_DIR; MAX_HOT_BOOKINGS caps the live table.
+# CACHE_MAX_BYTES bounds the in-process cache of interned offers.
+BOOKING_STORE = {
+    'FINISHED_TTL_DAYS': int(os.getenv('BOOKING_FINISHED_TTL_DAYS', '7')),
+    'PENDING_TTL_DAYS': int(os.getenv('BOOKING_PENDING_TTL_DAYS', '30')),
+    'MAX_HOT_BOOKINGS': int(os.getenv('BOOKING_MAX_HOT', '50000')),
+    'CACHE_MAX_BYTES': int(os.getenv('BOOKING_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    'CACHE_TTL': 3600,
+    'SWEEP_INTERVAL': int(os.getenv('BOOKING_SWEEP_INTERVAL', '300')),
+    'ARCHIVE_DIR': BASE_DIR / 'data' / 'archive' / 'bookings',
+}